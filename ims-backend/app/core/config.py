@@ -11,14 +11,55 @@ class Settings(BaseSettings):
     MONGODB_URL: str
     REDIS_URL: str
     
+    # MongoDB connection pool
+    MONGODB_MAX_POOL_SIZE: int = Field(default=100, description="Max connections per worker")
+    MONGODB_MIN_POOL_SIZE: int = Field(default=0, description="Connections kept open while idle")
+    MONGODB_MAX_IDLE_TIME_MS: Optional[int] = Field(default=None, description="Close pooled connections idle this long")
+    MONGODB_COMPRESSORS: str = Field(default="zstd,zlib", description="Wire compressors in order of preference (add snappy if python-snappy is installed)")
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_CONNECT_TIMEOUT_MS: int = 5000
+    MONGODB_SOCKET_TIMEOUT_MS: Optional[int] = Field(default=None, description="None waits forever")
+    MONGODB_REQUEST_TIMEOUT_MS: Optional[int] = Field(default=30000, description="Time all queries of one API request may take (exports, jobs and scripts are not bounded); None waits forever")
+    
+    # Redis connection pool
+    REDIS_MAX_CONNECTIONS: int = Field(default=100, description="Max connections per worker")
+    REDIS_POOL_TIMEOUT: float = Field(default=5.0, description="Seconds to wait for a free connection once all are in use")
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = Field(default=30, description="Seconds between PINGs on idle connections")
+    
     # Redis Config
     REDIS_TTL: int = Field(default=3600, description="Cache TTL in seconds")
+    CACHE_STALE_TTL: int = Field(default=300, description="Seconds an expired value may still be served while it refreshes")
+    
+    # In-process cache in front of Redis (0 entries disables it)
+    LOCAL_CACHE_MAXSIZE: int = Field(default=2048, description="Max entries per worker")
+    LOCAL_CACHE_TTL: int = Field(default=60, description="Local entry TTL in seconds")
     
     # Cloudinary
     CLOUDINARY_CLOUD_NAME: Optional[str] = None
     CLOUDINARY_API_KEY: Optional[str] = None
     CLOUDINARY_API_SECRET: Optional[str] = None
     
+    # Dashboard
+    DASHBOARD_RECONCILE_INTERVAL: int = Field(default=900, description="Seconds between dashboard stats reconciliations")
+    
+    # Party ledger
+    LEDGER_OVERDUE_SWEEP_INTERVAL: int = Field(default=60, description="Seconds between sweeps marking past-due ledger entries overdue")
+    
+    # Forecasts
+    FORECAST_REFRESH_INTERVAL: int = Field(default=3600, description="Seconds between forecast refreshes")
+    FORECAST_WINDOW_DAYS: int = Field(default=90, description="Days of sales history a forecast is based on")
+    FORECAST_LEAD_TIME_DAYS: float = Field(default=7, description="Days between placing a reorder and receiving it")
+    FORECAST_COVER_DAYS: float = Field(default=30, description="Days of demand a reorder should cover beyond the lead time")
+    
+    # Background jobs
+    JOB_QUEUE_BACKEND: str = Field(default="redis", description="redis, or local to keep jobs in process memory")
+    JOB_WORKERS: int = Field(default=2, description="Job workers run inside each app process (0 leaves jobs to app.scripts.run_job_worker)")
+    JOB_RESULT_TTL: int = Field(default=3600, description="Seconds a job and its result are kept after its last change")
+    JOB_TIMEOUT: int = Field(default=600, description="Seconds a job may run before it is failed")
+    JOB_LEASE_TTL: int = Field(default=60, description="Seconds a running job stays claimed without a heartbeat from its worker")
+    
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 100
     
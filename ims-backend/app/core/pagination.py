@@ -0,0 +1,64 @@
+import base64
+import binascii
+from typing import Optional
+from bson import ObjectId, json_util
+from fastapi import HTTPException, Response, status
+
+# Response header carrying the opaque cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort_field: str, document: dict) -> str:
+    """Encode the (sort_key, _id) position of a document as an opaque token."""
+    position = {"id": ObjectId(str(document["_id"]))}
+    if sort_field != "_id":
+        position["k"] = document.get(sort_field)
+    raw = json_util.dumps(position).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(sort_field: str, cursor: str) -> dict:
+    """Decode a cursor produced by encode_cursor for the same sort field."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(position.get("id"), ObjectId) or (sort_field != "_id" and "k" not in position):
+            raise ValueError("incomplete cursor")
+        return position
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def keyset_query(query: dict, sort_field: str, cursor: Optional[str]) -> dict:
+    """
+    Restrict a query to documents after the cursor position in (sort_field, _id)
+    ascending order. The range is served by an index ending in (sort_field, _id).
+    """
+    if not cursor:
+        return query
+    position = decode_cursor(sort_field, cursor)
+    if sort_field == "_id":
+        after = {"_id": {"$gt": position["id"]}}
+    else:
+        after = {"$or": [
+            {sort_field: {"$gt": position["k"]}},
+            {sort_field: position["k"], "_id": {"$gt": position["id"]}},
+        ]}
+    return {"$and": [query, after]} if query else after
+
+def keyset_sort(sort_field: str) -> list:
+    """Sort specification matching keyset_query."""
+    if sort_field == "_id":
+        return [("_id", 1)]
+    return [(sort_field, 1), ("_id", 1)]
+
+def next_cursor(documents: list, sort_field: str, limit: int) -> Optional[str]:
+    """Cursor for the page after documents, or None when this was the last page."""
+    if len(documents) < limit or not documents:
+        return None
+    return encode_cursor(sort_field, documents[-1])
+
+def set_next_cursor(response: Response, cursor: Optional[str]):
+    """Expose the next-page cursor on the response."""
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
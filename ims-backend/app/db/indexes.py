@@ -0,0 +1,150 @@
+import logging
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Declarative index registry: collection name -> indexes ensured at startup.
+INDEXES = {
+    "products": [
+        IndexModel([("slug", ASCENDING)], name="slug_unique", unique=True),
+        IndexModel([("model_number", ASCENDING)], name="model_number_unique", unique=True),
+        IndexModel([("category_id", ASCENDING), ("_id", ASCENDING)], name="category_id"),
+        IndexModel([("dealer_id", ASCENDING), ("_id", ASCENDING)], name="dealer_id"),
+        IndexModel([("status", ASCENDING), ("_id", ASCENDING)], name="status"),
+        IndexModel([("image_id", ASCENDING)], name="image_id", sparse=True),
+        IndexModel([("search_prefixes", ASCENDING)], name="search_prefixes"),
+        # Partial: only low-stock products are indexed, most urgent first
+        IndexModel(
+            [("stock_ratio", ASCENDING), ("_id", ASCENDING)],
+            name="low_stock", partialFilterExpression={"is_low_stock": True}
+        ),
+        IndexModel(
+            [("dealer_id", ASCENDING), ("stock_ratio", ASCENDING), ("_id", ASCENDING)],
+            name="dealer_low_stock", partialFilterExpression={"is_low_stock": True}
+        ),
+    ],
+    "dealers": [
+        IndexModel([("slug", ASCENDING)], name="slug_unique", unique=True),
+        IndexModel([("dealer_status", ASCENDING), ("_id", ASCENDING)], name="dealer_status"),
+        IndexModel([("image_id", ASCENDING)], name="image_id", sparse=True),
+    ],
+    "categories": [
+        IndexModel([("slug", ASCENDING)], name="slug_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("_id", ASCENDING)], name="status"),
+    ],
+    "party_ledger": [
+        IndexModel([("dealer_id", ASCENDING), ("due_date", ASCENDING), ("_id", ASCENDING)], name="dealer_id_due_date"),
+        IndexModel([("status", ASCENDING), ("due_date", ASCENDING), ("_id", ASCENDING)], name="status_due_date"),
+        IndexModel([("due_date", ASCENDING), ("_id", ASCENDING)], name="due_date"),
+        IndexModel([("paid_at", DESCENDING)], name="paid_at", sparse=True),
+    ],
+    "inventory_movements": [
+        IndexModel([("product_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], name="product_id_date"),
+        IndexModel([("type", ASCENDING), ("date", ASCENDING)], name="type_date"),
+    ],
+    "daily_rollups": [
+        IndexModel([("day", ASCENDING)], name="day"),
+        IndexModel([("product_id", ASCENDING), ("day", ASCENDING)], name="product_id_day"),
+        IndexModel([("category_id", ASCENDING), ("day", ASCENDING)], name="category_id_day"),
+        IndexModel([("dealer_id", ASCENDING), ("day", ASCENDING)], name="dealer_id_day"),
+    ],
+    "monthly_rollups": [
+        IndexModel([("month", ASCENDING)], name="month"),
+    ],
+    "product_forecasts": [
+        IndexModel([("needs_reorder", ASCENDING), ("days_of_cover", ASCENDING)], name="needs_reorder_days_of_cover"),
+        IndexModel([("dealer_id", ASCENDING), ("needs_reorder", ASCENDING)], name="dealer_id_needs_reorder"),
+        IndexModel([("days_of_cover", ASCENDING)], name="days_of_cover"),
+    ],
+    "media_center": [
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+}
+
+# Representative query shapes issued by the routes, checked by the coverage report.
+# Values are placeholders; only the shape matters to the query planner.
+QUERY_SHAPES = [
+    {"route": "GET /api/products/{slug}", "collection": "products", "filter": {"slug": "x"}},
+    {"route": "POST /api/products/ (model_number check)", "collection": "products", "filter": {"model_number": "x"}},
+    {"route": "GET /api/products/?category_id", "collection": "products", "filter": {"category_id": "x"}, "sort": {"_id": 1}},
+    {"route": "GET /api/products/?dealer_id", "collection": "products", "filter": {"dealer_id": "x"}, "sort": {"_id": 1}},
+    {"route": "GET /api/products/?status", "collection": "products", "filter": {"status": "in_stock"}, "sort": {"_id": 1}},
+    {"route": "DELETE /api/media-center/{id} (product usage)", "collection": "products", "filter": {"image_id": "x"}},
+    {"route": "GET /api/dealers/{slug}", "collection": "dealers", "filter": {"slug": "x"}},
+    {"route": "GET /api/dealers/?status", "collection": "dealers", "filter": {"dealer_status": "active"}, "sort": {"_id": 1}},
+    {"route": "DELETE /api/media-center/{id} (dealer usage)", "collection": "dealers", "filter": {"image_id": "x"}},
+    {"route": "GET /api/categories/{slug}", "collection": "categories", "filter": {"slug": "x"}},
+    {"route": "GET /api/categories/?status", "collection": "categories", "filter": {"status": "active"}, "sort": {"_id": 1}},
+    {"route": "GET /api/party-ledger/", "collection": "party_ledger", "filter": {}, "sort": {"due_date": 1, "_id": 1}},
+    {"route": "GET /api/party-ledger/?dealer_id", "collection": "party_ledger", "filter": {"dealer_id": "x"}, "sort": {"due_date": 1, "_id": 1}},
+    {"route": "GET /api/party-ledger/?status", "collection": "party_ledger", "filter": {"status": "pending"}, "sort": {"due_date": 1, "_id": 1}},
+    {"route": "GET /api/party-ledger/?date_from", "collection": "party_ledger", "filter": {"due_date": {"$gte": 0}}, "sort": {"due_date": 1, "_id": 1}},
+    {"route": "GET /api/products/{slug}/movements", "collection": "inventory_movements", "filter": {"product_id": "x"}, "sort": {"date": -1, "_id": -1}},
+    {"route": "GET /api/reports/monthly-stock", "collection": "monthly_rollups", "filter": {"quantity_received": {"$gt": 0}}, "sort": {"month": 1}},
+    {"route": "GET /api/reports/rollups", "collection": "daily_rollups", "filter": {"day": {"$gte": 0, "$lte": 0}}},
+    {"route": "GET /api/reports/rollups?category_id", "collection": "daily_rollups", "filter": {"category_id": "x", "day": {"$gte": 0, "$lte": 0}}},
+    {"route": "GET /api/reports/sales/*", "collection": "daily_rollups", "filter": {"day": {"$gte": 0, "$lte": 0}, "quantity_sold": {"$gt": 0}}},
+    {"route": "GET /api/reports/sales/*?dealer_id", "collection": "daily_rollups", "filter": {"dealer_id": "x", "day": {"$gte": 0, "$lte": 0}, "quantity_sold": {"$gt": 0}}},
+    {"route": "GET /api/products/?search", "collection": "products", "filter": {"search_prefixes": {"$all": ["sam", "tv"]}}},
+    {"route": "GET /api/dashboard/summary (low stock)", "collection": "products", "filter": {"is_low_stock": True}, "sort": {"stock_ratio": 1, "_id": 1}},
+    {"route": "GET /api/products/low-stock?dealer_id", "collection": "products", "filter": {"is_low_stock": True, "dealer_id": "x"}, "sort": {"stock_ratio": 1, "_id": 1}},
+    {"route": "GET /api/dashboard/summary (reorder alerts)", "collection": "product_forecasts", "filter": {"needs_reorder": True}, "sort": {"days_of_cover": 1}},
+    {"route": "GET /api/forecasts/", "collection": "product_forecasts", "filter": {"days_of_cover": {"$ne": None}}, "sort": {"days_of_cover": 1, "_id": 1}},
+    {"route": "GET /api/dashboard/summary (upcoming dues)", "collection": "party_ledger", "filter": {"status": "pending", "due_date": {"$gte": 0, "$lte": 0}}, "sort": {"due_date": 1}},
+    {"route": "GET /api/dashboard/summary (overdue dues)", "collection": "party_ledger", "filter": {"status": "overdue"}, "sort": {"due_date": 1}},
+    {"route": "ledger overdue sweeper", "collection": "party_ledger", "filter": {"status": {"$in": ["pending", None]}, "due_date": {"$lt": 0}}},
+    {"route": "GET /api/dashboard/summary (recent payments)", "collection": "party_ledger", "filter": {"paid_at": {"$ne": None}, "status": "paid"}, "sort": {"paid_at": -1}},
+    {"route": "GET /api/dashboard/summary (recent stock updates)", "collection": "inventory_movements", "filter": {"type": "stock_in"}, "sort": {"date": -1}},
+]
+
+async def ensure_indexes(db) -> list:
+    """
+    Create every index in the registry. Each index is its own createIndexes
+    command, so one that cannot be built (e.g. a unique index over legacy
+    duplicates) does not take the rest of its collection's indexes down with it.
+    Failures are logged, not fatal, so bad data cannot keep the API from
+    starting; they are returned as "collection.index" names.
+    """
+    failed = []
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                await db[collection].create_indexes([index])
+            except OperationFailure as e:
+                logger.error("Could not create index %s on %s: %s", name, collection, e)
+                failed.append(f"{collection}.{name}")
+    return failed
+
+def _plan_stages(plan: dict) -> list:
+    """Flatten the stage names of a query plan tree."""
+    stages = [plan.get("stage")]
+    if "inputStage" in plan:
+        stages.extend(_plan_stages(plan["inputStage"]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+async def index_coverage_report(db) -> list:
+    """Explain every registered query shape and report whether it uses an index."""
+    report = []
+    for shape in QUERY_SHAPES:
+        find = {"find": shape["collection"], "filter": shape["filter"]}
+        if shape.get("sort"):
+            find["sort"] = shape["sort"]
+        entry = {"route": shape["route"], "collection": shape["collection"]}
+        try:
+            explained = await db.command({"explain": find, "verbosity": "queryPlanner"})
+            winning_plan = explained["queryPlanner"]["winningPlan"]
+            # Newer servers wrap the classic plan under "queryPlan"
+            winning_plan = winning_plan.get("queryPlan", winning_plan)
+            stages = [s for s in _plan_stages(winning_plan) if s]
+            entry["stages"] = stages
+            entry["covered"] = "COLLSCAN" not in stages
+        except OperationFailure as e:
+            entry["stages"] = []
+            entry["covered"] = False
+            entry["error"] = str(e)
+        report.append(entry)
+    return report
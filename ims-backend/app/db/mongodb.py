@@ -1,16 +1,31 @@
+import pymongo
 from motor.motor_asyncio import AsyncIOMotorClient
 from ..core.config import settings
 
 class MongoDB:
     client: AsyncIOMotorClient = None
     
+async def get_client() -> AsyncIOMotorClient:
+    """Return client instance (needed to start sessions and transactions)"""
+    return MongoDB.client
+
 async def get_database() -> AsyncIOMotorClient:
     """Return database instance"""
     return MongoDB.client["inventory_db"]
 
 async def connect_to_mongo():
     """Create database connection."""
-    MongoDB.client = AsyncIOMotorClient(settings.MONGODB_URL)
+    MongoDB.client = AsyncIOMotorClient(
+        settings.MONGODB_URL,
+        maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+        maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+        # Compressors whose library is not installed are skipped by the driver
+        compressors=settings.MONGODB_COMPRESSORS,
+        serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=settings.MONGODB_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=settings.MONGODB_SOCKET_TIMEOUT_MS
+    )
     print("Connected to MongoDB!")
 
 async def close_mongo_connection():
@@ -18,3 +33,24 @@ async def close_mongo_connection():
     if MongoDB.client:
         MongoDB.client.close()
         print("MongoDB connection closed!")
+
+class RequestTimeoutMiddleware:
+    """
+    Bound the queries of each HTTP request by MONGODB_REQUEST_TIMEOUT_MS. Every
+    operation in the request gets the time left as its maxTimeMS, so a slow
+    query fails instead of holding a connection. Paths starting with one of
+    exclude_prefixes (e.g. streaming exports) run unbounded, as do background
+    jobs and scripts, which never pass through here.
+    """
+
+    def __init__(self, app, exclude_prefixes: tuple = ()):
+        self.app = app
+        self.exclude_prefixes = exclude_prefixes
+
+    async def __call__(self, scope, receive, send):
+        timeout_ms = settings.MONGODB_REQUEST_TIMEOUT_MS
+        if scope["type"] != "http" or not timeout_ms or scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+        with pymongo.timeout(timeout_ms / 1000):
+            await self.app(scope, receive, send)
@@ -5,18 +5,28 @@ class RedisClient:
     client: redis.Redis = None
 
 async def connect_to_redis():
-    """Create Redis connection."""
-    RedisClient.client = redis.from_url(
+    """
+    Create Redis connection. The pool blocks for up to REDIS_POOL_TIMEOUT when
+    all REDIS_MAX_CONNECTIONS are in use, instead of failing the command.
+    """
+    pool = redis.BlockingConnectionPool.from_url(
         settings.REDIS_URL,
         encoding="utf-8",
-        decode_responses=True
+        decode_responses=True,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL
     )
+    # from_pool hands the pool to the client, so closing the client closes it
+    RedisClient.client = redis.Redis.from_pool(pool)
     print("Connected to Redis!")
 
 async def close_redis_connection():
     """Close Redis connection."""
     if RedisClient.client:
-        await RedisClient.client.close()
+        await RedisClient.client.aclose()
         print("Redis connection closed!")
 
 async def get_redis() -> redis.Redis:
@@ -1,15 +1,25 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 import logging
 
-from .db.mongodb import connect_to_mongo, close_mongo_connection
-from .db.redis import connect_to_redis, close_redis_connection
+from .db.mongodb import connect_to_mongo, close_mongo_connection, get_database, RequestTimeoutMiddleware
+from .db.indexes import ensure_indexes
+from .services.sequences import ensure_sequences
+from .db.redis import connect_to_redis, close_redis_connection, get_redis
+from .services.cache import listen_for_invalidations
+from .services.dashboard import run_dashboard_reconciler
+from .services.forecasts import run_forecast_refresher
+from .services.ledger import run_overdue_sweeper
+from .services.jobs import get_job_queue, run_job_workers
 from .core.config import settings
-from .routes import dealers, categories, media_center, products, party_ledger, dashboard, reports
+from .core.pagination import NEXT_CURSOR_HEADER
+from .routes import dealers, categories, media_center, products, party_ledger, dashboard, reports, admin, export, forecasts
 
 # WARNING
 logging.basicConfig(level=logging.WARNING)
@@ -19,8 +29,23 @@ logging.getLogger("urllib3").setLevel(logging.WARNING)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await connect_to_mongo()
+    db = await get_database()
+    await ensure_indexes(db)
+    await ensure_sequences(db)
     await connect_to_redis()
+    redis_client = await get_redis()
+    background_tasks = [
+        asyncio.create_task(listen_for_invalidations(redis_client)),
+        asyncio.create_task(run_dashboard_reconciler(db, redis_client)),
+        asyncio.create_task(run_forecast_refresher(db, redis_client)),
+        asyncio.create_task(run_overdue_sweeper(db, redis_client)),
+    ]
+    if settings.JOB_WORKERS > 0:
+        background_tasks.append(asyncio.create_task(run_job_workers(db, await get_job_queue())))
     yield
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
     await close_mongo_connection()
     await close_redis_connection()
 
@@ -28,7 +53,8 @@ app = FastAPI(
     title="Inventory Management System",
     description="Backend API for Inventory Management System",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Setup rate limiter
@@ -43,8 +69,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Bound the queries of API requests; exports stream for as long as they need
+app.add_middleware(RequestTimeoutMiddleware, exclude_prefixes=("/api/export",))
+
 # Include routers
 app.include_router(dealers.router)
 app.include_router(categories.router)
@@ -53,6 +83,9 @@ app.include_router(products.router)
 app.include_router(party_ledger.router)
 app.include_router(dashboard.router)
 app.include_router(reports.router)
+app.include_router(admin.router)
+app.include_router(export.router)
+app.include_router(forecasts.router)
 
 @app.get("/")
 @limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
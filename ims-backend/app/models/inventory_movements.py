@@ -0,0 +1,24 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+from enum import Enum
+
+class MovementType(str, Enum):
+    STOCK_IN = "stock_in"
+    SALE = "sale"
+
+class InventoryMovementModel(BaseModel):
+    id: str = Field(alias="_id")
+    product_id: str  # Reference to products _id
+    category_id: str  # Denormalized from the product at the time of the movement
+    dealer_id: str  # Denormalized from the product at the time of the movement
+    type: MovementType
+    quantity: int = Field(..., ge=0)
+    sale_price: Optional[float] = None  # Only set for sales
+    unit_cost: Optional[float] = None  # Dealer price at the time of a sale
+    notes: Optional[str] = None
+    date: datetime = Field(default_factory=datetime.now)
+
+    class Config:
+        populate_by_name = True
+        arbitrary_types_allowed = True
@@ -34,8 +34,8 @@ class ProductModel(BaseModel):
     status: ProductStatus = ProductStatus.OUT_OF_STOCK
     description: Optional[str] = None
     image_id: Optional[str] = None  # Reference to media_center _id
-    stock_updates: List[StockUpdate] = []  # History of all stock updates
-    sales_history: List[SaleRecord] = []  # History of all sales
+    stock_updates: List[StockUpdate] = []  # Most recent stock updates (full history in inventory_movements)
+    sales_history: List[SaleRecord] = []  # Most recent sales (full history in inventory_movements)
     first_added_date: datetime = Field(default_factory=datetime.now)
     last_updated_date: datetime = Field(default_factory=datetime.now)
     created_at: datetime = Field(default_factory=datetime.now)
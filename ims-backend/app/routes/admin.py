@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from ..db.mongodb import get_database
+from ..db.indexes import index_coverage_report
+from ..services.cache import cache_stats
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+@router.get("/index-coverage")
+async def index_coverage():
+    """Report which route queries are served by an index and which fall back to a collection scan."""
+    db = await get_database()
+    queries = await index_coverage_report(db)
+    uncovered = [q["route"] for q in queries if not q["covered"]]
+    return {
+        "total": len(queries),
+        "covered": len(queries) - len(uncovered),
+        "uncovered": uncovered,
+        "queries": queries
+    }
+
+@router.get("/cache-stats")
+async def local_cache_stats():
+    """Counters of the in-process cache tier of the worker serving this request."""
+    return cache_stats()
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Query, Request
+from fastapi import APIRouter, HTTPException, status, Query, Request, Response
 from typing import List, Optional
 from ..schemas.categories import CategoryCreate, CategoryUpdate, CategoryResponse, CategoryStatus
 from ..models.categories import CategoryModel
@@ -6,27 +6,26 @@ from ..db.mongodb import get_database
 from ..db.redis import get_redis
 from datetime import datetime
 from bson import ObjectId
-import json
 from ..core.config import settings
-from slugify import slugify
+from ..services.sequences import allocate_slug
+from ..services.cache import cache_key, cache_get, cache_set, cache_snapshot, invalidate, category_tag
+from ..core.pagination import keyset_query, keyset_sort, next_cursor, set_next_cursor
 
 router = APIRouter(prefix="/api/categories", tags=["categories"])
 
-async def invalidate_category_cache(redis_client, slug: str = None):
-    if slug:
-        await redis_client.delete(f"category:{slug}")
-    await redis_client.delete("categories:list")
+async def invalidate_category_cache(redis_client, category_id=None, slug: str = None):
+    # The category tag also invalidates cached products showing this category's name
+    await invalidate(
+        redis_client,
+        tags=[category_tag(category_id)] if category_id else [],
+        keys=[cache_key("category", slug)] if slug else []
+    )
 
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 async def create_category(category: CategoryCreate):
     db = await get_database()
-    # Generate slug from name
-    base_slug = slugify(category.name)
-    slug = base_slug
-    counter = 1
-    while await db.categories.find_one({"slug": slug}):
-        slug = f"{base_slug}-{counter}"
-        counter += 1
+    # Generate unique slug from name
+    slug = await allocate_slug(db, "categories", category.name)
     category_dict = category.model_dump()
     category_dict["slug"] = slug
     category_dict["created_at"] = datetime.now()
@@ -37,21 +36,25 @@ async def create_category(category: CategoryCreate):
         if new_category:
             new_category["_id"] = str(new_category["_id"])
             redis_client = await get_redis()
-            await invalidate_category_cache(redis_client)
+            await invalidate_category_cache(redis_client, slug=slug)
             return new_category
         else:
             raise HTTPException(status_code=500, detail="Category created but not found.")
     raise HTTPException(status_code=400, detail="Failed to create category.")
 
 @router.get("/", response_model=List[CategoryResponse])
-async def get_categories(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), status_filter: Optional[CategoryStatus] = Query(None, alias="status"), search: Optional[str] = None):
+async def get_categories(response: Response, skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), status_filter: Optional[CategoryStatus] = Query(None, alias="status"), search: Optional[str] = None, cursor: Optional[str] = None):
     db = await get_database()
     query = {}
     if status_filter:
         query["status"] = status_filter
     if search:
         query["name"] = {"$regex": search, "$options": "i"}
-    categories = await db.categories.find(query).skip(skip).limit(limit).to_list(length=limit)
+    categories_cursor = db.categories.find(keyset_query(query, "_id", cursor)).sort(keyset_sort("_id"))
+    if not cursor:
+        categories_cursor = categories_cursor.skip(skip)
+    categories = await categories_cursor.limit(limit).to_list(length=limit)
+    set_next_cursor(response, next_cursor(categories, "_id", limit))
     for cat in categories:
         if cat.get("_id"):
             cat["_id"] = str(cat["_id"])
@@ -60,26 +63,23 @@ async def get_categories(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1
 @router.get("/{slug}", response_model=CategoryResponse)
 async def get_category(slug: str):
     redis_client = await get_redis()
-    cache_key = f"category:{slug}"
+    category_key = cache_key("category", slug)
     try:
-        cached_category = await redis_client.get(cache_key)
-        if cached_category:
-            category = json.loads(cached_category)
+        category = await cache_get(redis_client, category_key, local=True)
+        if category:
             if category.get("_id"):
                 category["_id"] = str(category["_id"])
             return category
     except Exception:
         pass
     db = await get_database()
+    since = await cache_snapshot(redis_client)
     category = await db.categories.find_one({"slug": slug})
     if not category:
         raise HTTPException(status_code=404, detail="Category not found.")
     if category.get("_id"):
         category["_id"] = str(category["_id"])
-    try:
-        await redis_client.set(cache_key, json.dumps(category, default=str), ex=settings.REDIS_TTL)
-    except Exception:
-        pass
+    await cache_set(redis_client, category_key, category, tags=[category_tag(category["_id"])], local=True, since=since)
     return category
 
 @router.put("/{slug}", response_model=CategoryResponse)
@@ -91,13 +91,9 @@ async def update_category(slug: str, category_update: CategoryUpdate):
     update_data = {k: v for k, v in category_update.model_dump(exclude_unset=True).items() if v is not None}
     # If name is updated, update slug as well
     if "name" in update_data:
-        base_slug = slugify(update_data["name"])
-        new_slug = base_slug
-        counter = 1
-        while await db.categories.find_one({"slug": new_slug, "_id": {"$ne": existing_category["_id"]}}):
-            new_slug = f"{base_slug}-{counter}"
-            counter += 1
-        update_data["slug"] = new_slug
+        update_data["slug"] = await allocate_slug(
+            db, "categories", update_data["name"], current_slug=existing_category.get("slug")
+        )
     update_data["updated_at"] = datetime.now()
     updated_category = await db.categories.find_one_and_update(
         {"slug": slug},
@@ -108,18 +104,16 @@ async def update_category(slug: str, category_update: CategoryUpdate):
         updated_category["_id"] = str(updated_category["_id"])
     if updated_category:
         redis_client = await get_redis()
-        await invalidate_category_cache(redis_client, slug)
-        if "slug" in update_data:
-            await invalidate_category_cache(redis_client, update_data["slug"])
+        await invalidate_category_cache(redis_client, updated_category["_id"], slug)
         return updated_category
     raise HTTPException(status_code=404, detail="Category not found.")
 
 @router.delete("/{slug}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_category(slug: str):
     db = await get_database()
-    result = await db.categories.delete_one({"slug": slug})
-    if result.deleted_count:
+    deleted = await db.categories.find_one_and_delete({"slug": slug}, projection={"_id": 1})
+    if deleted:
         redis_client = await get_redis()
-        await invalidate_category_cache(redis_client, slug)
+        await invalidate_category_cache(redis_client, deleted["_id"], slug)
         return
     raise HTTPException(status_code=404, detail="Category not found.")
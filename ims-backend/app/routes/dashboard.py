@@ -1,106 +1,136 @@
 from fastapi import APIRouter, HTTPException
+from bson import ObjectId
 from ..db.mongodb import get_database
+from ..services.dashboard import get_dashboard_stats
+from ..services.ledger import PENDING, OVERDUE
+from ..models.inventory_movements import MovementType
 from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
+# Maximum entries returned in each dashboard list; counts are always complete
+DASHBOARD_LIST_LIMIT = 20
+RECENT_LIMIT = 5
+
+def _due(entry: dict) -> dict:
+    return {
+        "amount": entry.get("amount", 0),
+        "due_date": entry.get("due_date"),
+        "dealer_id": entry.get("dealer_id"),
+        "id": str(entry.get("_id")),
+        "notes": entry.get("notes")
+    }
+
+async def recent_stock_updates(db) -> list:
+    """Latest stock-in per product for the most recently restocked products."""
+    latest = {}
+    movements = db.inventory_movements.find(
+        {"type": MovementType.STOCK_IN.value}, {"product_id": 1, "date": 1, "notes": 1}
+    ).sort("date", -1).limit(RECENT_LIMIT * 10)
+    async for movement in movements:
+        latest.setdefault(movement["product_id"], movement)
+        if len(latest) == RECENT_LIMIT:
+            break
+    product_ids = [ObjectId(pid) for pid in latest if ObjectId.is_valid(pid)]
+    products = {
+        str(p["_id"]): p
+        for p in await db.products.find(
+            {"_id": {"$in": product_ids}}, {"name": 1, "product_code": 1}
+        ).to_list(None)
+    }
+    return [
+        {
+            "name": products[pid].get("name"),
+            "product_code": products[pid].get("product_code"),
+            "last_stock_update": movement.get("date"),
+            "notes": movement.get("notes"),
+            "id": pid
+        }
+        for pid, movement in latest.items() if pid in products
+    ]
+
 @router.get("/summary")
 async def dashboard_summary():
+    """
+    Dashboard totals come from the incrementally maintained dashboard_stats
+    document; each list is one bounded, index-backed query, so the cost does not
+    grow with the size of the catalog or the ledger.
+    """
     db = await get_database()
     now = datetime.now()
     seven_days = now + timedelta(days=7)
-    # Products
-    total_products = await db.products.count_documents({})
-    total_stock_quantity = 0
-    total_stock_value = 0.0
-    low_stock_alerts = []
-    out_of_stock_count = 0
-    recent_stock_updates = []
-    async for product in db.products.find({}):
-        stock = product.get("stock", 0)
-        dealer_price = product.get("dealer_price", 0)
-        total_stock_quantity += stock
-        total_stock_value += stock * dealer_price
-        if stock < 5:
-            low_stock_alerts.append({
-                "name": product.get("name"),
-                "stock": stock,
-                "product_code": product.get("product_code"),
-                "id": str(product.get("_id"))
-            })
-        if stock == 0:
-            out_of_stock_count += 1
-        # For recent stock updates, collect product and latest stock_update date
-        if product.get("stock_updates"):
-            last_update = max(product["stock_updates"], key=lambda s: s.get("date", datetime.min))
-            recent_stock_updates.append({
-                "name": product.get("name"),
-                "product_code": product.get("product_code"),
-                "last_stock_update": last_update.get("date"),
-                "notes": last_update.get("notes"),
-                "id": str(product.get("_id"))
-            })
-    # Sort and limit recent stock updates
-    recent_stock_updates = sorted(recent_stock_updates, key=lambda x: x["last_stock_update"] or datetime.min, reverse=True)[:5]
-    # Party Ledger
-    total_outstanding_dues = 0.0
-    upcoming_dues = []
-    overdue_dues = []
-    recent_payments = []
-    async for entry in db.party_ledger.find({}):
-        status = entry.get("status", "pending")
-        amount = entry.get("amount", 0)
-        due_date = entry.get("due_date")
-        paid_at = entry.get("paid_at")
-        # Outstanding
-        if status in ("pending", "overdue"):
-            total_outstanding_dues += amount
-        # Upcoming
-        if status != "paid" and due_date and now <= due_date <= seven_days:
-            upcoming_dues.append({
-                "amount": amount,
-                "due_date": due_date,
-                "dealer_id": entry.get("dealer_id"),
-                "id": str(entry.get("_id")),
-                "notes": entry.get("notes")
-            })
-        # Overdue
-        if status != "paid" and due_date and due_date < now:
-            overdue_dues.append({
-                "amount": amount,
-                "due_date": due_date,
-                "dealer_id": entry.get("dealer_id"),
-                "id": str(entry.get("_id")),
-                "notes": entry.get("notes")
-            })
-        # Recent payments
-        if status == "paid" and paid_at:
-            recent_payments.append({
-                "amount": amount,
-                "paid_at": paid_at,
-                "dealer_id": entry.get("dealer_id"),
-                "id": str(entry.get("_id")),
-                "notes": entry.get("notes")
-            })
-    recent_payments = sorted(recent_payments, key=lambda x: x["paid_at"] or datetime.min, reverse=True)[:5]
+    stats = await get_dashboard_stats(db)
+
+    low_stock_products = await db.products.find(
+        {"is_low_stock": True}, {"name": 1, "stock": 1, "product_code": 1, "reorder_threshold": 1}
+    ).sort([("stock_ratio", 1), ("_id", 1)]).limit(DASHBOARD_LIST_LIMIT).to_list(DASHBOARD_LIST_LIMIT)
+
+    # Stored statuses, kept current by the overdue sweeper
+    upcoming_query = {"status": PENDING, "due_date": {"$gte": now, "$lte": seven_days}}
+    overdue_query = {"status": OVERDUE}
+    upcoming_dues = await db.party_ledger.find(upcoming_query).sort("due_date", 1).limit(DASHBOARD_LIST_LIMIT).to_list(DASHBOARD_LIST_LIMIT)
+    overdue_dues = await db.party_ledger.find(overdue_query).sort("due_date", 1).limit(DASHBOARD_LIST_LIMIT).to_list(DASHBOARD_LIST_LIMIT)
+    reorder_query = {"needs_reorder": True}
+    reorder_products = await db.product_forecasts.find(
+        reorder_query,
+        {"name": 1, "product_code": 1, "stock": 1, "days_of_cover": 1, "suggested_reorder_qty": 1, "dealer_id": 1}
+    ).sort("days_of_cover", 1).limit(DASHBOARD_LIST_LIMIT).to_list(DASHBOARD_LIST_LIMIT)
+    recent_payments = await db.party_ledger.find(
+        {"paid_at": {"$ne": None}, "status": "paid"}
+    ).sort("paid_at", -1).limit(RECENT_LIMIT).to_list(RECENT_LIMIT)
+
     return {
-        "total_products": total_products,
-        "total_stock_quantity": total_stock_quantity,
-        "total_stock_value": total_stock_value,
+        "total_products": stats["total_products"],
+        "total_stock_quantity": stats["total_stock_quantity"],
+        "total_stock_value": stats["total_stock_value"],
         "low_stock_alerts": {
-            "count": len(low_stock_alerts),
-            "products": low_stock_alerts
+            "count": stats["low_stock_count"],
+            "products": [
+                {
+                    "name": product.get("name"),
+                    "stock": product.get("stock"),
+                    "reorder_threshold": product.get("reorder_threshold"),
+                    "product_code": product.get("product_code"),
+                    "id": str(product.get("_id"))
+                }
+                for product in low_stock_products
+            ]
+        },
+        "reorder_alerts": {
+            "count": await db.product_forecasts.count_documents(reorder_query),
+            "products": [
+                {
+                    "name": product.get("name"),
+                    "stock": product.get("stock"),
+                    "product_code": product.get("product_code"),
+                    "days_of_cover": product.get("days_of_cover"),
+                    "suggested_reorder_qty": product.get("suggested_reorder_qty"),
+                    "dealer_id": product.get("dealer_id"),
+                    "id": product.get("_id")
+                }
+                for product in reorder_products
+            ]
         },
-        "out_of_stock_count": out_of_stock_count,
-        "total_outstanding_dues": total_outstanding_dues,
+        "out_of_stock_count": stats["out_of_stock_count"],
+        "total_outstanding_dues": stats["total_outstanding_dues"],
         "upcoming_dues": {
-            "count": len(upcoming_dues),
-            "dues": upcoming_dues
+            "count": await db.party_ledger.count_documents(upcoming_query),
+            "dues": [_due(entry) for entry in upcoming_dues]
         },
         "overdue_dues": {
-            "count": len(overdue_dues),
-            "dues": overdue_dues
+            "count": await db.party_ledger.count_documents(overdue_query),
+            "dues": [_due(entry) for entry in overdue_dues]
         },
-        "recent_stock_updates": recent_stock_updates,
-        "recent_payments": recent_payments
-    } 
\ No newline at end of file
+        "recent_stock_updates": await recent_stock_updates(db),
+        "recent_payments": [
+            {
+                "amount": entry.get("amount", 0),
+                "paid_at": entry.get("paid_at"),
+                "dealer_id": entry.get("dealer_id"),
+                "id": str(entry.get("_id")),
+                "notes": entry.get("notes")
+            }
+            for entry in recent_payments
+        ],
+        "stats_reconciled_at": stats.get("reconciled_at")
+    }
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Query, Request, File, UploadFile, Form, Body
+from fastapi import APIRouter, HTTPException, status, Query, Request, File, UploadFile, Form, Body, Response
 from typing import List, Optional
 from ..schemas.dealers import DealerCreate, DealerUpdate, DealerResponse, DealerStatus, DealerImage
 from ..models.dealers import DealerModel
@@ -6,10 +6,13 @@ from ..db.mongodb import get_database
 from ..db.redis import get_redis
 from datetime import datetime
 from bson import ObjectId
-from slugify import slugify
-import json
 import logging
 from ..core.config import settings
+from ..services.sequences import next_code, allocate_slug
+from ..services.cache import (
+    cache_key, cache_get, cache_set, cache_snapshot, invalidate, dealer_tag, media_tag
+)
+from ..core.pagination import keyset_query, keyset_sort, next_cursor, set_next_cursor
 from ..routes.media_center import create_media  # Import if needed for shared logic
 from ..schemas.media_center import MediaCenterResponse
 from ..models.media_center import MediaCenterModel
@@ -21,11 +24,16 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/dealers", tags=["dealers"])
 
-async def invalidate_dealer_cache(redis_client, slug: str = None):
-    """Invalidate dealer cache. If slug is provided, only invalidate that dealer's cache."""
-    if slug:
-        await redis_client.delete(f"dealer:{slug}")
-    await redis_client.delete("dealers:list")
+async def invalidate_dealer_cache(redis_client, dealer_id=None, slug: str = None):
+    """
+    Invalidate dealer cache. The dealer tag also invalidates cached products that
+    show this dealer's name; the slug key drops entries for renamed or reused slugs.
+    """
+    await invalidate(
+        redis_client,
+        tags=[dealer_tag(dealer_id)] if dealer_id else [],
+        keys=[cache_key("dealer", slug)] if slug else []
+    )
 
 async def validate_and_get_media(db, image_id: str):
     """Validate image_id exists and return media details."""
@@ -86,19 +94,8 @@ async def create_dealer(
         if image_id:
             await validate_and_get_media(db, image_id)
             
-        last_dealer = await db.dealers.find_one(sort=[("dealer_code", -1)])
-        if last_dealer:
-            last_number = int(last_dealer["dealer_code"].split("DLR")[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-        dealer_code = f"DLR{new_number:03d}"
-        base_slug = slugify(company_name)
-        slug = base_slug
-        counter = 1
-        while await db.dealers.find_one({"slug": slug}):
-            slug = f"{base_slug}-{counter}"
-            counter += 1
+        dealer_code = await next_code(db, "dealer_code")
+        slug = await allocate_slug(db, "dealers", company_name)
         dealer_dict = {
             "company_name": company_name,
             "contact_person": contact_person,
@@ -122,7 +119,7 @@ async def create_dealer(
                 # Add image_url to response
                 await enrich_dealer_with_media(db, dealer)
                 redis_client = await get_redis()
-                await invalidate_dealer_cache(redis_client)
+                await invalidate_dealer_cache(redis_client, slug=slug)
                 return dealer
             else:
                 raise HTTPException(
@@ -143,7 +140,9 @@ async def create_dealer(
 
 @router.get("/", response_model=List[DealerResponse])
 async def get_dealers(
+    response: Response,
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     limit: int = Query(10, ge=1, le=100),    
     status_filter: Optional[DealerStatus] = Query(None, alias="status"),
     search: Optional[str] = None
@@ -161,7 +160,11 @@ async def get_dealers(
             {"email": {"$regex": search, "$options": "i"}},
             {"slug": {"$regex": search, "$options": "i"}}
         ]
-    dealers = await db.dealers.find(query).skip(skip).limit(limit).to_list(limit)
+    dealers_cursor = db.dealers.find(keyset_query(query, "_id", cursor)).sort(keyset_sort("_id"))
+    if not cursor:
+        dealers_cursor = dealers_cursor.skip(skip)
+    dealers = await dealers_cursor.limit(limit).to_list(limit)
+    set_next_cursor(response, next_cursor(dealers, "_id", limit))
     for dealer in dealers:
         if dealer.get("_id"):
             dealer["_id"] = str(dealer["_id"])
@@ -172,11 +175,10 @@ async def get_dealers(
 @router.get("/{slug}", response_model=DealerResponse)
 async def get_dealer(slug: str):
     redis_client = await get_redis()
-    cache_key = f"dealer:{slug}"
+    dealer_key = cache_key("dealer", slug)
     try:
-        cached_dealer = await redis_client.get(cache_key)
-        if cached_dealer:
-            dealer = json.loads(cached_dealer)
+        dealer = await cache_get(redis_client, dealer_key, local=True)
+        if dealer:
             if dealer.get("_id"):
                 dealer["_id"] = str(dealer["_id"])
             # Add image_url to cached dealer
@@ -186,6 +188,7 @@ async def get_dealer(slug: str):
     except Exception as e:
         pass
     db = await get_database()
+    since = await cache_snapshot(redis_client)
     dealer = await db.dealers.find_one({"slug": slug})
     if not dealer:
         raise HTTPException(
@@ -196,14 +199,10 @@ async def get_dealer(slug: str):
         dealer["_id"] = str(dealer["_id"])
     # Add image_url before caching and returning
     await enrich_dealer_with_media(db, dealer)
-    try:
-        await redis_client.set(
-            cache_key,
-            json.dumps(dealer, default=str),
-            ex=settings.REDIS_TTL
-        )
-    except Exception as e:
-        pass
+    tags = [dealer_tag(dealer["_id"])]
+    if dealer.get("image_id"):
+        tags.append(media_tag(dealer["image_id"]))
+    await cache_set(redis_client, dealer_key, dealer, tags=tags, local=True, since=since)
     return dealer
 
 @router.put("/{slug}", response_model=DealerResponse)
@@ -252,14 +251,9 @@ async def update_dealer(
         if image_id is not None:
             update_data["image_id"] = image_id
         if company_name is not None:
-            new_slug = slugify(company_name)
+            new_slug = await allocate_slug(db, "dealers", company_name, current_slug=slug)
             if new_slug != slug:
-                temp_slug = new_slug
-                counter = 1
-                while await db.dealers.find_one({"slug": temp_slug, "_id": {"$ne": existing_dealer["_id"]}}):
-                    temp_slug = f"{new_slug}-{counter}"
-                    counter += 1
-                update_data["slug"] = temp_slug
+                update_data["slug"] = new_slug
         if update_data:
             update_data["updated_at"] = datetime.now()
             updated = await db.dealers.find_one_and_update(
@@ -272,9 +266,7 @@ async def update_dealer(
                 # Add image_url to response
                 await enrich_dealer_with_media(db, updated)
                 redis_client = await get_redis()
-                await invalidate_dealer_cache(redis_client, slug)
-                if "slug" in update_data:
-                    await invalidate_dealer_cache(redis_client, update_data["slug"])
+                await invalidate_dealer_cache(redis_client, updated["_id"], slug)
                 return updated
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -306,7 +298,7 @@ async def delete_dealer(slug: str):
     if result.deleted_count:
         # Invalidate cache
         redis_client = await get_redis()
-        await invalidate_dealer_cache(redis_client, slug)
+        await invalidate_dealer_cache(redis_client, dealer["_id"], slug)
     else:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,176 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import datetime
+from enum import Enum
+import csv
+import io
+import orjson
+from ..db.mongodb import get_database
+from ..models.inventory_movements import MovementType
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+# Rows fetched per cursor batch and written per chunk; memory stays bounded by one batch
+EXPORT_BATCH_SIZE = 1000
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+PRODUCT_EXPORT_FIELDS = [
+    "_id", "product_code", "name", "slug", "model_number", "category_id", "dealer_id",
+    "dealer_price", "stock", "total_stock_received", "total_sales", "status", "created_at",
+]
+SALE_EXPORT_FIELDS = ["_id", "product_id", "category_id", "dealer_id", "quantity", "sale_price", "unit_cost", "notes", "date"]
+STOCK_UPDATE_EXPORT_FIELDS = ["_id", "product_id", "category_id", "dealer_id", "quantity", "notes", "date"]
+LEDGER_EXPORT_FIELDS = ["_id", "dealer_id", "amount", "due_date", "status", "notes", "created_at", "paid_at"]
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value if isinstance(value, (int, float)) else str(value)
+
+def _encode_ndjson(rows: list, fields: list) -> bytes:
+    return b"".join(
+        orjson.dumps({field: row.get(field) for field in fields}, default=str) + b"\n"
+        for row in rows
+    )
+
+def _encode_csv(rows: list, fields: list, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(fields)
+    writer.writerows([_csv_value(row.get(field)) for field in fields] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+def _encode(rows: list, fields: list, export_format: ExportFormat, header: bool) -> bytes:
+    if export_format == ExportFormat.CSV:
+        return _encode_csv(rows, fields, header)
+    return _encode_ndjson(rows, fields)
+
+async def _stream_rows(cursor, fields: list, export_format: ExportFormat):
+    """Encode cursor rows one batch at a time; only the current batch is held in memory."""
+    header = export_format == ExportFormat.CSV
+    batch = []
+    async for row in cursor:
+        batch.append(row)
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield _encode(batch, fields, export_format, header)
+            header = False
+            batch = []
+    if batch or header:
+        yield _encode(batch, fields, export_format, header)
+
+def _export_response(cursor, name: str, fields: list, export_format: ExportFormat) -> StreamingResponse:
+    filename = f"{name}-{datetime.now():%Y%m%d-%H%M%S}.{export_format.value}"
+    return StreamingResponse(
+        _stream_rows(cursor, fields, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def _date_range(field: str, date_from: Optional[datetime], date_to: Optional[datetime]) -> dict:
+    if not date_from and not date_to:
+        return {}
+    bounds = {}
+    if date_from:
+        bounds["$gte"] = date_from
+    if date_to:
+        bounds["$lte"] = date_to
+    return {field: bounds}
+
+def _movement_query(
+    movement_type: MovementType,
+    product_id: Optional[str],
+    category_id: Optional[str],
+    dealer_id: Optional[str],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime]
+) -> dict:
+    query = {"type": movement_type.value, **_date_range("date", date_from, date_to)}
+    if product_id:
+        query["product_id"] = product_id
+    if category_id:
+        query["category_id"] = category_id
+    if dealer_id:
+        query["dealer_id"] = dealer_id
+    return query
+
+def _projection(fields: list) -> dict:
+    return {field: 1 for field in fields}
+
+@router.get("/products")
+async def export_products(
+    format: ExportFormat = Query(ExportFormat.NDJSON),
+    category_id: Optional[str] = None,
+    dealer_id: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    """Stream every matching product as NDJSON or CSV, in _id order."""
+    db = await get_database()
+    query = {}
+    if category_id:
+        query["category_id"] = category_id
+    if dealer_id:
+        query["dealer_id"] = dealer_id
+    if status:
+        query["status"] = status
+    cursor = db.products.find(query, _projection(PRODUCT_EXPORT_FIELDS)).sort("_id", 1).batch_size(EXPORT_BATCH_SIZE)
+    return _export_response(cursor, "products", PRODUCT_EXPORT_FIELDS, format)
+
+@router.get("/sales")
+async def export_sales(
+    format: ExportFormat = Query(ExportFormat.NDJSON),
+    product_id: Optional[str] = None,
+    category_id: Optional[str] = None,
+    dealer_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    """Stream sale movements as NDJSON or CSV, oldest first."""
+    db = await get_database()
+    query = _movement_query(MovementType.SALE, product_id, category_id, dealer_id, date_from, date_to)
+    cursor = db.inventory_movements.find(query, _projection(SALE_EXPORT_FIELDS)).sort("date", 1).batch_size(EXPORT_BATCH_SIZE)
+    return _export_response(cursor, "sales", SALE_EXPORT_FIELDS, format)
+
+@router.get("/stock-updates")
+async def export_stock_updates(
+    format: ExportFormat = Query(ExportFormat.NDJSON),
+    product_id: Optional[str] = None,
+    category_id: Optional[str] = None,
+    dealer_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    """Stream stock receipts as NDJSON or CSV, oldest first."""
+    db = await get_database()
+    query = _movement_query(MovementType.STOCK_IN, product_id, category_id, dealer_id, date_from, date_to)
+    cursor = db.inventory_movements.find(query, _projection(STOCK_UPDATE_EXPORT_FIELDS)).sort("date", 1).batch_size(EXPORT_BATCH_SIZE)
+    return _export_response(cursor, "stock-updates", STOCK_UPDATE_EXPORT_FIELDS, format)
+
+@router.get("/party-ledger")
+async def export_party_ledger(
+    format: ExportFormat = Query(ExportFormat.NDJSON),
+    dealer_id: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    """Stream ledger entries as NDJSON or CSV in due_date order; the date range applies to due_date."""
+    db = await get_database()
+    query = _date_range("due_date", date_from, date_to)
+    if dealer_id:
+        query["dealer_id"] = dealer_id
+    if status:
+        query["status"] = status
+    cursor = db.party_ledger.find(query, _projection(LEDGER_EXPORT_FIELDS)).sort([("due_date", 1), ("_id", 1)]).batch_size(EXPORT_BATCH_SIZE)
+    return _export_response(cursor, "party-ledger", LEDGER_EXPORT_FIELDS, format)
@@ -0,0 +1,113 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import List, Optional
+from ..db.mongodb import get_database
+from ..schemas.forecasts import (
+    ProductForecastResponse, DealerReorderResponse, ForecastRefreshJobResponse
+)
+from ..services.forecasts import refresh_forecasts
+from ..services.jobs import register_job, get_job_queue, submit_job, get_job
+
+router = APIRouter(prefix="/api/forecasts", tags=["forecasts"])
+
+# Forecasts are precomputed in product_forecasts by the scheduled refresh;
+# these endpoints only read that collection.
+
+FORECAST_LIST_LIMIT_MAX = 500
+REFRESH_JOB_KIND = "forecast:refresh"
+
+@register_job(REFRESH_JOB_KIND)
+async def refresh_forecasts_job(db, params):
+    return await refresh_forecasts(db)
+
+@router.get("/", response_model=List[ProductForecastResponse])
+async def list_forecasts(
+    needs_reorder: Optional[bool] = None,
+    dealer_id: Optional[str] = None,
+    category_id: Optional[str] = None,
+    include_idle: bool = Query(False, description="Include products without sales in the window"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=FORECAST_LIST_LIMIT_MAX),
+):
+    """Product forecasts, the products that run out soonest first."""
+    db = await get_database()
+    query = {}
+    if needs_reorder is not None:
+        query["needs_reorder"] = needs_reorder
+    if dealer_id:
+        query["dealer_id"] = dealer_id
+    if category_id:
+        query["category_id"] = category_id
+    if not include_idle:
+        query["days_of_cover"] = {"$ne": None}
+    cursor = db.product_forecasts.find(query, {"_id": 0}).sort([("days_of_cover", 1), ("_id", 1)])
+    return await cursor.skip(skip).limit(limit).to_list(limit)
+
+@router.get("/reorders", response_model=List[DealerReorderResponse])
+async def dealer_reorders(dealer_id: Optional[str] = None):
+    """Suggested reorders grouped by dealer, largest order value first."""
+    db = await get_database()
+    match = {"needs_reorder": True}
+    if dealer_id:
+        match["dealer_id"] = dealer_id
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"days_of_cover": 1}},
+        {"$group": {
+            "_id": "$dealer_id",
+            "total_quantity": {"$sum": "$suggested_reorder_qty"},
+            "total_cost": {"$sum": "$reorder_cost"},
+            "products": {"$push": {
+                "product_id": "$product_id",
+                "name": "$name",
+                "product_code": "$product_code",
+                "stock": "$stock",
+                "days_of_cover": "$days_of_cover",
+                "suggested_reorder_qty": "$suggested_reorder_qty",
+                "reorder_cost": "$reorder_cost",
+            }},
+        }},
+        {"$sort": {"total_cost": -1, "_id": 1}},
+        {"$addFields": {"_dealer_oid": {"$convert": {
+            "input": "$_id", "to": "objectId", "onError": None, "onNull": None
+        }}}},
+        {"$lookup": {
+            "from": "dealers",
+            "localField": "_dealer_oid",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"_id": 0, "company_name": 1}}],
+            "as": "_dealer",
+        }},
+        {"$project": {
+            "_id": 0,
+            "dealer_id": "$_id",
+            "dealer_name": {"$arrayElemAt": ["$_dealer.company_name", 0]},
+            "total_quantity": 1,
+            "total_cost": 1,
+            "products": 1,
+        }},
+    ]
+    return await db.product_forecasts.aggregate(pipeline).to_list(None)
+
+@router.post("/refresh", response_model=ForecastRefreshJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def request_forecast_refresh():
+    """
+    Recompute every forecast now (in the background) instead of waiting for the
+    scheduled refresh. A refresh that is already queued or running is returned
+    instead of starting another.
+    """
+    return await submit_job(await get_job_queue(), REFRESH_JOB_KIND, reuse_completed=False)
+
+@router.get("/refresh/{job_id}", response_model=ForecastRefreshJobResponse)
+async def get_forecast_refresh(job_id: str):
+    job = await get_job(await get_job_queue(), job_id)
+    if not job or job["kind"] != REFRESH_JOB_KIND:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+@router.get("/{product_id}", response_model=ProductForecastResponse)
+async def get_forecast(product_id: str):
+    db = await get_database()
+    forecast = await db.product_forecasts.find_one({"_id": product_id}, {"_id": 0})
+    if not forecast:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Forecast not found")
+    return forecast
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form, Query
+from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form, Query, Response
 from ..schemas.media_center import MediaCenterCreate, MediaCenterResponse, MediaCenterUpdate
 from ..models.media_center import MediaCenterModel
 from ..db.mongodb import get_database
+from ..db.redis import get_redis
+from ..services.cache import invalidate_tags, media_tag
 from ..services.cloudinary_service import upload_image, delete_image, update_image
+from ..core.pagination import keyset_query, keyset_sort, next_cursor, set_next_cursor
 from datetime import datetime
 from bson import ObjectId
 from typing import List, Optional
@@ -38,9 +41,13 @@ async def create_media(
     raise HTTPException(status_code=400, detail="Failed to create media.")
 
 @router.get("/", response_model=List[MediaCenterResponse])
-async def list_media(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100)):
+async def list_media(response: Response, skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), cursor: Optional[str] = None):
     db = await get_database()
-    media_list = await db.media_center.find().skip(skip).limit(limit).to_list(length=limit)
+    media_cursor = db.media_center.find(keyset_query({}, "_id", cursor)).sort(keyset_sort("_id"))
+    if not cursor:
+        media_cursor = media_cursor.skip(skip)
+    media_list = await media_cursor.limit(limit).to_list(length=limit)
+    set_next_cursor(response, next_cursor(media_list, "_id", limit))
     for media in media_list:
         if media.get("_id"):
             media["_id"] = str(media["_id"])
@@ -98,6 +105,9 @@ async def update_media(
     )
     if not updated:
         raise HTTPException(status_code=404, detail="Media not found.")
+    # Cached products and dealers showing this image depend on its tag
+    redis_client = await get_redis()
+    await invalidate_tags(redis_client, media_tag(obj_id))
     updated["_id"] = str(updated["_id"])
     return updated
 
@@ -130,4 +140,6 @@ async def delete_media(id: str):
         raise HTTPException(status_code=500, detail=f"Failed to delete image from Cloudinary: {str(e)}")
     # Delete from database
     await db.media_center.delete_one({"_id": obj_id})
+    redis_client = await get_redis()
+    await invalidate_tags(redis_client, media_tag(obj_id))
     return
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, HTTPException, status, Query, Response
 from typing import List, Optional
 from ..schemas.party_ledger import PartyLedgerCreate, PartyLedgerUpdate, PartyLedgerOut
 from ..models.party_ledger import PartyLedgerModel
 from ..db.mongodb import get_database
+from ..core.pagination import keyset_query, keyset_sort, next_cursor, set_next_cursor
+from ..services.dashboard import apply_dashboard_delta, ledger_delta
+from ..services.ledger import ledger_status, ledger_status_stage
 from bson import ObjectId
+from pymongo import ReturnDocument
 from datetime import datetime
 
 router = APIRouter(prefix="/api/party-ledger", tags=["party_ledger"])
@@ -23,23 +27,27 @@ async def create_ledger(entry: PartyLedgerCreate):
     entry_dict = entry.model_dump()
     entry_dict.update({
         "created_at": now,
-        "status": entry_dict.get("status", "pending"),
         "paid_at": None
     })
+    # An unpaid entry created past its due date is stored as overdue straight away
+    entry_dict["status"] = ledger_status(entry_dict, now)
     result = await db.party_ledger.insert_one(entry_dict)
     if result.inserted_id:
+        await apply_dashboard_delta(db, ledger_delta(after=entry_dict))
         entry_dict["_id"] = str(result.inserted_id)
         return PartyLedgerOut(**entry_dict)
     raise HTTPException(status_code=500, detail="Failed to create ledger entry")
 
 @router.get("/", response_model=List[PartyLedgerOut])
 async def list_ledgers(
+    response: Response,
     dealer_id: Optional[str] = None,
     status: Optional[str] = None,
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
 ):
     db = await get_database()
     query = {}
@@ -53,7 +61,12 @@ async def list_ledgers(
             query["due_date"]["$gte"] = date_from
         if date_to:
             query["due_date"]["$lte"] = date_to
-    ledgers = await db.party_ledger.find(query).skip(skip).limit(limit).to_list(length=limit)
+    # Keyset pagination ordered by (due_date, _id); skip is only honoured without a cursor
+    ledger_cursor = db.party_ledger.find(keyset_query(query, "due_date", cursor)).sort(keyset_sort("due_date"))
+    if not cursor:
+        ledger_cursor = ledger_cursor.skip(skip)
+    ledgers = await ledger_cursor.limit(limit).to_list(length=limit)
+    set_next_cursor(response, next_cursor(ledgers, "due_date", limit))
     for l in ledgers:
         l["_id"] = str(l["_id"])
     return [PartyLedgerOut(**l) for l in ledgers]
@@ -76,20 +89,30 @@ async def update_ledger(ledger_id: str, update: PartyLedgerUpdate):
     # If paid_at is provided, set status to 'paid'
     if "paid_at" in update_data and update_data["paid_at"] is not None:
         update_data["status"] = "paid"
-    updated = await db.party_ledger.find_one_and_update(
+    # Re-derive pending / overdue from the due date as written, so moving the due
+    # date or reopening an entry leaves the stored status right
+    now = datetime.now()
+    previous = await db.party_ledger.find_one_and_update(
         {"_id": ObjectId(ledger_id)},
-        {"$set": update_data},
-        return_document=True
+        [
+            {"$set": {field: {"$literal": value} for field, value in update_data.items()}},
+            ledger_status_stage(now)
+        ],
+        return_document=ReturnDocument.BEFORE
     )
-    if not updated:
+    if not previous:
         raise HTTPException(status_code=404, detail="Ledger entry not found")
+    updated = {**previous, **update_data}
+    updated["status"] = ledger_status(updated, now)
+    await apply_dashboard_delta(db, ledger_delta(before=previous, after=updated))
     updated["_id"] = str(updated["_id"])
     return PartyLedgerOut(**updated)
 
 @router.delete("/{ledger_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_ledger(ledger_id: str):
     db = await get_database()
-    result = await db.party_ledger.delete_one({"_id": ObjectId(ledger_id)})
-    if result.deleted_count == 0:
+    deleted = await db.party_ledger.find_one_and_delete({"_id": ObjectId(ledger_id)})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Ledger entry not found")
+    await apply_dashboard_delta(db, ledger_delta(before=deleted))
     return
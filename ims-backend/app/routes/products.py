@@ -1,19 +1,50 @@
-from fastapi import APIRouter, HTTPException, status, Query, Body
+from fastapi import APIRouter, HTTPException, status, Query, Response, File, UploadFile
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional
 from ..schemas.products import (
     ProductCreate, ProductUpdate, ProductResponse, 
-    ProductStatus, StockUpdate, SaleCreate, SaleResponse
+    ProductStatus, StockUpdate, SaleCreate, SaleResponse,
+    ProductView, ProductSummaryResponse,
+    CheckoutCreate, CheckoutResponse,
+    BulkStockCreate, BulkStockResponse,
+    ProductImportFormat, ProductImportResponse, LowStockProductResponse
 )
 from ..models.products import ProductModel
-from ..db.mongodb import get_database
+from ..models.inventory_movements import MovementType
+from ..schemas.inventory_movements import InventoryMovementResponse
+from ..services.movements import build_movement, record_movements
+from ..services.rollups import apply_rollups
+from ..services.dashboard import (
+    apply_dashboard_delta, product_delta, stock_change_delta, price_change_delta,
+    threshold_change_delta
+)
+from ..services.cache import (
+    cache_key, cache_get_or_load, invalidate,
+    product_tag, product_tags
+)
+from ..services.sequences import next_code, next_codes, allocate_slug, allocate_slugs
+from ..services.stock import sale_filter, sale_update, stock_in_update, low_stock_fields, low_stock_stage
+from ..services.search import (
+    product_search_fields, search_query_tokens, search_filter, search_page_stages
+)
+from ..db.mongodb import get_database, get_client
 from ..db.redis import get_redis
 from datetime import datetime
 from bson import ObjectId
-import json
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pydantic import ValidationError
+from collections import defaultdict
+import asyncio
+import csv
+import io
 import logging
-from ..core.config import settings
+import orjson
+from ..core.pagination import (
+    NEXT_CURSOR_HEADER, keyset_query, keyset_sort, next_cursor, set_next_cursor
+)
 from ..routes.media_center import router as media_center_router
-from slugify import slugify
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -21,11 +52,16 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/products", tags=["products"])
 
-async def invalidate_product_cache(redis_client, model_number: str = None):
-    """Invalidate product cache."""
-    if model_number:
-        await redis_client.delete(f"product:{model_number}")
-    await redis_client.delete("products:list")
+async def invalidate_product_cache(redis_client, product_ids: list = (), slugs: list = ()):
+    """
+    Invalidate cached products: by id through their tags (covers every key that
+    depends on the product) and by slug key (drops entries for renamed or reused slugs).
+    """
+    await invalidate(
+        redis_client,
+        tags=[product_tag(product_id) for product_id in product_ids],
+        keys=[cache_key("product", slug) for slug in slugs]
+    )
 
 async def validate_references(db, category_id: str, dealer_id: str):
     """Validate that category and dealer exist."""
@@ -117,11 +153,147 @@ async def enrich_product_with_media(db, product: dict):
         product["images"] = []
     return product
 
-async def enrich_products_with_media(db, products: list):
-    """Add images array to multiple products."""
-    for product in products:
-        await enrich_product_with_media(db, product)
-    return products
+def _to_object_id(field: str) -> dict:
+    """Convert a stored string reference to an ObjectId, yielding null when malformed."""
+    return {"$convert": {"input": f"${field}", "to": "objectId", "onError": None, "onNull": None}}
+
+# Fields resolved from other collections: name -> (source reference, lookup collection)
+COMPUTED_PRODUCT_FIELDS = {
+    "category_name": ("category_id", "categories"),
+    "dealer_name": ("dealer_id", "dealers"),
+    "images": ("image_id", "media_center"),
+}
+
+# Stored fields that may be requested with ?fields=
+PRODUCT_FIELDS = {
+    field.alias or name
+    for name, field in ProductResponse.model_fields.items()
+    if name not in COMPUTED_PRODUCT_FIELDS
+} | {"image_id"}
+
+# Stored fields used internally and never returned
+INTERNAL_PRODUCT_FIELDS = ["search_words", "search_prefixes", "search_codes", "movements_backfilled"]
+
+PRODUCT_VIEW_FIELDS = {
+    ProductView.SUMMARY: {
+        field.alias or name for name, field in ProductSummaryResponse.model_fields.items()
+    },
+}
+
+def resolve_product_fields(view: ProductView, fields: Optional[str]) -> Optional[set]:
+    """
+    Return the set of product fields to return, or None for the full document.
+    An explicit fields list takes precedence over the view.
+    """
+    if fields:
+        requested = {f.strip() for f in fields.split(",") if f.strip()}
+        requested = {"_id" if f == "id" else f for f in requested}
+        unknown = requested - PRODUCT_FIELDS - set(COMPUTED_PRODUCT_FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        return requested | {"_id"}
+    return PRODUCT_VIEW_FIELDS.get(view)
+
+def product_projection(selected: set) -> dict:
+    """Mongo projection for the stored fields (and lookup references) a selection needs."""
+    projection = {f: 1 for f in selected if f in PRODUCT_FIELDS}
+    for field, (reference, _) in COMPUTED_PRODUCT_FIELDS.items():
+        if field in selected:
+            projection[reference] = 1
+    return projection
+
+def product_enrichment_stages(selected: Optional[set] = None) -> list:
+    """
+    Aggregation stages resolving category_name, dealer_name and images for products.
+    Each $lookup joins on the referenced collection's _id index, so the whole page
+    is enriched in the same round trip as the product query. When a field selection
+    is given, only the requested lookups run and only the selected fields are kept.
+    """
+    computed = [
+        field for field in COMPUTED_PRODUCT_FIELDS
+        if selected is None or field in selected
+    ]
+    stages = []
+    resolved = {"_id": {"$toString": "$_id"}}
+    temporary = []
+    for field in computed:
+        reference, collection = COMPUTED_PRODUCT_FIELDS[field]
+        stages.append({"$addFields": {f"_{field}_oid": _to_object_id(reference)}})
+        stages.append({"$lookup": {
+            "from": collection,
+            "localField": f"_{field}_oid",
+            "foreignField": "_id",
+            "as": f"_{field}",
+        }})
+        temporary += [f"_{field}_oid", f"_{field}"]
+    if "category_name" in computed:
+        resolved["category_name"] = {"$arrayElemAt": ["$_category_name.name", 0]}
+    if "dealer_name" in computed:
+        resolved["dealer_name"] = {"$arrayElemAt": ["$_dealer_name.company_name", 0]}
+    if "images" in computed:
+        resolved["images"] = {"$map": {
+            "input": "$_images",
+            "as": "media",
+            "in": {"image_id": {"$toString": "$$media._id"}, "image_url": "$$media.image_url"},
+        }}
+    stages.append({"$addFields": resolved})
+    if selected is None:
+        stages.append({"$project": {f: 0 for f in temporary + INTERNAL_PRODUCT_FIELDS + ["_score"]}})
+    else:
+        stages.append({"$project": {f: 1 for f in selected}})
+    return stages
+
+def encode_product(product: dict) -> dict:
+    """The JSON payload FastAPI would send for product with response_model=ProductResponse."""
+    return ProductResponse.model_validate(product).model_dump(mode="json", by_alias=True)
+
+def product_pipeline(query: dict, selected: Optional[set] = None) -> list:
+    """Match products, project only what the selection needs, then enrich."""
+    pipeline = [{"$match": query}]
+    if selected is not None:
+        pipeline.append({"$project": product_projection(selected)})
+    return pipeline
+
+def build_product_document(product: ProductCreate, product_code: str, slug: str, current_time: datetime) -> dict:
+    """The products document for a new product."""
+    return {
+        "category_id": product.category_id,
+        "product_code": product_code,
+        "model_number": product.model_number,
+        "name": product.name,
+        "slug": slug,
+        "dealer_id": product.dealer_id,
+        "dealer_price": product.dealer_price,
+        "stock": product.initial_stock,
+        "total_stock_received": product.initial_stock,
+        "total_sales": 0,
+        "status": ProductStatus.IN_STOCK if product.initial_stock > 0 else ProductStatus.OUT_OF_STOCK,
+        "description": product.description,
+        "image_id": product.image_id,
+        "reorder_threshold": product.reorder_threshold,
+        **low_stock_fields(product.initial_stock, product.reorder_threshold),
+        **product_search_fields({
+            "name": product.name,
+            "model_number": product.model_number,
+            "product_code": product_code,
+            "slug": slug
+        }),
+        "stock_updates": [{
+            "quantity": product.initial_stock,
+            "date": current_time,
+            "notes": product.stock_notes
+        }] if product.initial_stock > 0 else [],
+        "sales_history": [],
+        # Full history is written to inventory_movements from the start
+        "movements_backfilled": True,
+        "first_added_date": current_time,
+        "last_updated_date": current_time,
+        "created_at": current_time,
+        "updated_at": current_time
+    }
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(product: ProductCreate):
@@ -161,61 +333,39 @@ async def create_product(product: ProductCreate):
                 detail="Product with this model number already exists"
             )
 
-        # Generate product code
-        last_product = await db.products.find_one(sort=[("product_code", -1)])
-        if last_product:
-            last_number = int(last_product["product_code"].split("PRD")[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-        product_code = f"PRD{new_number:03d}"
-        
-        # Generate unique slug from name
-        base_slug = slugify(product.name)
-        slug = base_slug
-        counter = 1
-        while await db.products.find_one({"slug": slug}):
-            slug = f"{base_slug}-{counter}"
-            counter += 1
+        # Allocate product code and unique slug from atomic counters
+        product_code = await next_code(db, "product_code")
+        slug = await allocate_slug(db, "products", product.name)
         
         current_time = datetime.now()
         
-        # Create product dict
-        product_dict = {
-            "category_id": product.category_id,
-            "product_code": product_code,
-            "model_number": product.model_number,
-            "name": product.name,
-            "slug": slug,
-            "dealer_id": product.dealer_id,
-            "dealer_price": product.dealer_price,
-            "stock": product.initial_stock,
-            "total_stock_received": product.initial_stock,
-            "total_sales": 0,
-            "status": ProductStatus.IN_STOCK if product.initial_stock > 0 else ProductStatus.OUT_OF_STOCK,
-            "description": product.description,
-            "image_id": product.image_id,
-            "stock_updates": [{
-                "quantity": product.initial_stock,
-                "date": current_time,
-                "notes": product.stock_notes
-            }] if product.initial_stock > 0 else [],
-            "sales_history": [],
-            "first_added_date": current_time,
-            "last_updated_date": current_time,
-            "created_at": current_time,
-            "updated_at": current_time
-        }
+        product_dict = build_product_document(product, product_code, slug, current_time)
 
-        result = await db.products.insert_one(product_dict)
+        while True:
+            try:
+                result = await db.products.insert_one(product_dict)
+                break
+            except DuplicateKeyError as e:
+                if not _is_slug_conflict(e.details or {}):
+                    raise
+                # Slug taken since it was allocated; allocate again
+                slug = await allocate_slug(db, "products", product.name)
+                product_dict = build_product_document(product, product_code, slug, current_time)
         if result.inserted_id:
+            await apply_dashboard_delta(db, product_delta(product_dict))
+            if product.initial_stock > 0:
+                await record_movements(db, [build_movement(
+                    product_dict, MovementType.STOCK_IN, product.initial_stock,
+                    current_time, notes=product.stock_notes
+                )])
             product = await db.products.find_one({"_id": result.inserted_id})
             if product:
                 product["_id"] = str(product["_id"])
                 # Add image data
                 await enrich_product_with_media(db, product)
                 redis_client = await get_redis()
-                await invalidate_product_cache(redis_client)
+                # A reused slug must not serve a deleted product's cached entry
+                await invalidate_product_cache(redis_client, slugs=[slug])
                 return product
         
         raise HTTPException(
@@ -232,31 +382,40 @@ async def create_product(product: ProductCreate):
 
 @router.get("/", response_model=List[ProductResponse])
 async def get_products(
+    response: Response,
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     limit: int = Query(10, ge=1, le=100),
-    status: Optional[ProductStatus] = None,
+    status_filter: Optional[ProductStatus] = Query(None, alias="status"),
     category_id: Optional[str] = None,
     dealer_id: Optional[str] = None,
     search: Optional[str] = None,
     model_number: Optional[str] = None,
+    view: ProductView = ProductView.FULL,
+    fields: Optional[str] = None,
 ):
     """
     Get products with optional filters.
     
     Query parameters:
-    - skip: Number of records to skip
+    - skip: Number of records to skip (ignored when cursor is given)
+    - cursor: Opaque token from the X-Next-Cursor header of the previous page
     - limit: Number of records to return
     - status: Filter by status (in_stock, out_of_stock, discontinued)
     - category_id: Filter by category
     - dealer_id: Filter by dealer
-    - search: Search in name, model_number, product_code
+    - search: Prefix search over name, model_number, product_code and slug, ranked by relevance
+      (exact model number / product code first). Paginated with skip; cursor is not supported.
+    - view: summary (no stock/sales history) or full (default)
+    - fields: Comma-separated list of fields to return, e.g. fields=name,slug,stock
     """
     try:
         db = await get_database()
+        selected = resolve_product_fields(view, fields)
         query = {}
         
-        if status:
-            query["status"] = status
+        if status_filter:
+            query["status"] = status_filter
         if category_id:
             if not ObjectId.is_valid(category_id):
                 raise HTTPException(
@@ -271,29 +430,41 @@ async def get_products(
                     detail="Invalid dealer_id format"
                 )
             query["dealer_id"] = str(ObjectId(dealer_id))
-        if search:
-            query["$or"] = [
-                {"name": {"$regex": search, "$options": "i"}},
-                {"model_number": {"$regex": search, "$options": "i"}},
-                {"product_code": {"$regex": search, "$options": "i"}},
-                {"slug": {"$regex": search, "$options": "i"}}
-            ]
         if model_number:
             query["model_number"] = model_number
 
-        products = await db.products.find(query).skip(skip).limit(limit).to_list(limit)
-        
-        for product in products:
-            product["_id"] = str(product["_id"])
-            # Populate category_name
-            category = await db.categories.find_one({"_id": ObjectId(product["category_id"])})
-            product["category_name"] = category["name"] if category else None
-            # Populate dealer_name
-            dealer = await db.dealers.find_one({"_id": ObjectId(product["dealer_id"])})
-            product["dealer_name"] = dealer["company_name"] if dealer else None
-        
-        # Add image data to all products
-        await enrich_products_with_media(db, products)
+        if search:
+            if cursor:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="cursor cannot be combined with search; use skip"
+                )
+            tokens = search_query_tokens(search)
+            if not tokens:
+                return ORJSONResponse(content=[]) if selected is not None else []
+            query.update(search_filter(tokens))
+            # Rank the indexed candidates, then fetch the page
+            pipeline = [{"$match": query}, *search_page_stages(search, tokens, skip, limit)]
+            if selected is not None:
+                pipeline.append({"$project": product_projection(selected)})
+        else:
+            pipeline = [
+                *product_pipeline(keyset_query(query, "_id", cursor), selected),
+                {"$sort": dict(keyset_sort("_id"))},
+            ]
+            if not cursor:
+                pipeline.append({"$skip": skip})
+            pipeline.append({"$limit": limit})
+
+        # Page first, then enrich only the page: one round trip regardless of limit
+        pipeline += product_enrichment_stages(selected)
+        products = await db.products.aggregate(pipeline).to_list(limit)
+        page_cursor = None if search else next_cursor(products, "_id", limit)
+        if selected is not None:
+            # Partial documents are returned as-is instead of being validated as ProductResponse
+            headers = {NEXT_CURSOR_HEADER: page_cursor} if page_cursor else None
+            return ORJSONResponse(content=jsonable_encoder(products), headers=headers)
+        set_next_cursor(response, page_cursor)
         return products
         
     except HTTPException:
@@ -304,64 +475,92 @@ async def get_products(
             detail=f"An unexpected error occurred: {str(e)}"
         )
 
+@router.get("/low-stock", response_model=List[LowStockProductResponse])
+async def get_low_stock_products(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    dealer_id: Optional[str] = None
+):
+    """
+    Products below their reorder threshold, lowest stock-to-threshold ratio first.
+    Served from a partial index holding only low-stock products, so a page costs
+    the same however large the catalog is.
+    """
+    db = await get_database()
+    query = {"is_low_stock": True}
+    if dealer_id:
+        query["dealer_id"] = dealer_id
+    products = await db.products.find(
+        keyset_query(query, "stock_ratio", cursor),
+        {
+            "product_code": 1, "name": 1, "slug": 1, "model_number": 1, "dealer_id": 1,
+            "stock": 1, "reorder_threshold": 1, "stock_ratio": 1
+        }
+    ).sort(keyset_sort("stock_ratio")).limit(limit).to_list(limit)
+    set_next_cursor(response, next_cursor(products, "stock_ratio", limit))
+    for product in products:
+        product["_id"] = str(product["_id"])
+    return products
+
 @router.get("/{slug}", response_model=ProductResponse)
-async def get_product(slug: str):
-    """Get a product by its slug."""
+async def get_product(
+    slug: str,
+    view: ProductView = ProductView.FULL,
+    fields: Optional[str] = None,
+):
+    """
+    Get a product by its slug.
+    Use view=summary or fields=... to return only part of the document.
+    """
     try:
+        selected = resolve_product_fields(view, fields)
+        if selected is not None:
+            db = await get_database()
+            pipeline = [
+                *product_pipeline({"slug": slug}, selected),
+                {"$limit": 1},
+                *product_enrichment_stages(selected),
+            ]
+            products = await db.products.aggregate(pipeline).to_list(1)
+            if not products:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Product not found"
+                )
+            return ORJSONResponse(content=jsonable_encoder(products[0]))
+
         redis_client = await get_redis()
-        cache_key = f"product:{slug}"
-        
-        # Try to get from cache
-        try:
-            cached_product = await redis_client.get(cache_key)
-            if cached_product:
-                product = json.loads(cached_product)
-                # Add image data to cached product
-                db = await get_database()
-                await enrich_product_with_media(db, product)
-                # Populate category_name
-                category = await db.categories.find_one({"_id": ObjectId(product["category_id"])})
-                product["category_name"] = category["name"] if category else None
-                # Populate dealer_name
-                dealer = await db.dealers.find_one({"_id": ObjectId(product["dealer_id"])})
-                product["dealer_name"] = dealer["company_name"] if dealer else None
-                return product
-        except Exception:
-            pass
-            
-        # Get from database
-        db = await get_database()
-        product = await db.products.find_one({"slug": slug})
-        
-        if not product:
+        product_key = cache_key("product", slug)
+
+        async def load_product():
+            # Load and enrich in a single aggregation round trip
+            db = await get_database()
+            pipeline = [
+                {"$match": {"slug": slug}},
+                {"$limit": 1},
+                *product_enrichment_stages(),
+            ]
+            products = await db.products.aggregate(pipeline).to_list(1)
+            return products[0] if products else None
+
+        # A hit is the complete, already-enriched payload: no database calls.
+        # Concurrent misses share one load, and a stale payload (expired, or
+        # invalidated through its product, category, dealer or image tag) is
+        # served while a single request refreshes it.
+        # The payload is validated against ProductResponse once, when it is
+        # cached, and hits are sent as the stored JSON without re-validation.
+        body = await cache_get_or_load(
+            redis_client, product_key, load_product,
+            tags=product_tags, local=True, encode=encode_product, raw=True
+        )
+        if not body:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Product not found"
             )
             
-        product["_id"] = str(product["_id"])
-        
-        # Add image data
-        await enrich_product_with_media(db, product)
-        
-        # Populate category_name
-        category = await db.categories.find_one({"_id": ObjectId(product["category_id"])})
-        product["category_name"] = category["name"] if category else None
-        # Populate dealer_name
-        dealer = await db.dealers.find_one({"_id": ObjectId(product["dealer_id"])})
-        product["dealer_name"] = dealer["company_name"] if dealer else None
-        
-        # Cache the result
-        try:
-            await redis_client.set(
-                cache_key,
-                json.dumps(product, default=str),
-                ex=settings.REDIS_TTL
-            )
-        except Exception:
-            pass
-            
-        return product
+        return Response(content=body, media_type="application/json")
         
     except HTTPException:
         raise
@@ -417,32 +616,43 @@ async def update_product(slug: str, product_update: ProductUpdate):
         update_data = product_update.dict(exclude_unset=True)
         if "name" in update_data:
             # Update slug if name changes
-            base_slug = slugify(update_data["name"])
-            new_slug = base_slug
-            counter = 1
-            while await db.products.find_one({"slug": new_slug, "_id": {"$ne": existing_product["_id"]}}):
-                new_slug = f"{base_slug}-{counter}"
-                counter += 1
-            update_data["slug"] = new_slug
+            update_data["slug"] = await allocate_slug(
+                db, "products", update_data["name"], current_slug=existing_product.get("slug")
+            )
+            update_data.update(product_search_fields({**existing_product, **update_data}))
         if update_data:
             update_data["updated_at"] = datetime.now()
             
             # Update the product
+            if "reorder_threshold" in update_data:
+                # Re-derive the low-stock state from the stock at the time of the write
+                update = [
+                    {"$set": {field: {"$literal": value} for field, value in update_data.items()}},
+                    low_stock_stage()
+                ]
+            else:
+                update = {"$set": update_data}
             updated = await db.products.find_one_and_update(
                 {"slug": slug},
-                {"$set": update_data},
+                update,
                 return_document=True
             )
             
             if updated:
+                if "dealer_price" in update_data:
+                    await apply_dashboard_delta(
+                        db, price_change_delta(updated, existing_product.get("dealer_price", 0))
+                    )
+                if "reorder_threshold" in update_data:
+                    await apply_dashboard_delta(
+                        db, threshold_change_delta(updated, existing_product.get("reorder_threshold"))
+                    )
                 updated["_id"] = str(updated["_id"])
                 # Add image data
                 await enrich_product_with_media(db, updated)
                 # Invalidate cache
                 redis_client = await get_redis()
-                await invalidate_product_cache(redis_client, slug)
-                if "slug" in update_data:
-                    await invalidate_product_cache(redis_client, update_data["slug"])
+                await invalidate_product_cache(redis_client, [updated["_id"]], [slug])
                 return updated
                 
         raise HTTPException(
@@ -458,11 +668,319 @@ async def update_product(slug: str, product_update: ProductUpdate):
             detail=f"An unexpected error occurred: {str(e)}"
         )
 
+@router.post("/stock/bulk", response_model=BulkStockResponse)
+async def bulk_update_stock(shipment: BulkStockCreate):
+    """
+    Receive a supplier shipment: add stock to many products in one request.
+    
+    Lines reference a product by slug or model_number. Products are resolved with
+    one query, all lines are applied with a single unordered bulk_write, and each
+    line is reported as applied or failed.
+    
+    Example request body:
+    ```json
+    {
+        "notes": "Shipment INV-2024-118",
+        "lines": [
+            {"slug": "samsung-tv", "quantity": 5},
+            {"model_number": "LG-FR-220", "quantity": 12, "notes": "Damaged box x1"}
+        ]
+    }
+    ```
+    """
+    try:
+        db = await get_database()
+        current_time = datetime.now()
+        slugs = [line.slug for line in shipment.lines if line.slug]
+        model_numbers = [line.model_number for line in shipment.lines if line.model_number and not line.slug]
+        products = await db.products.find(
+            {"$or": [{"slug": {"$in": slugs}}, {"model_number": {"$in": model_numbers}}]},
+            {"slug": 1, "model_number": 1, "category_id": 1, "dealer_id": 1}
+        ).to_list(None)
+        by_slug = {p["slug"]: p for p in products}
+        by_model_number = {p["model_number"]: p for p in products}
+
+        results = []
+        operations = []
+        pending = []
+        for index, line in enumerate(shipment.lines):
+            product = by_slug.get(line.slug) if line.slug else by_model_number.get(line.model_number)
+            result = {
+                "index": index,
+                "slug": product["slug"] if product else line.slug,
+                "model_number": product["model_number"] if product else line.model_number,
+                "quantity": line.quantity,
+                "applied": False
+            }
+            if not product:
+                result["error"] = "Product not found"
+            else:
+                notes = line.notes or shipment.notes
+                operations.append(UpdateOne(
+                    {"_id": product["_id"]},
+                    stock_in_update(line.quantity, current_time, notes)
+                ))
+                pending.append((result, product, build_movement(
+                    product, MovementType.STOCK_IN, line.quantity, current_time, notes=notes
+                )))
+            results.append(result)
+
+        if operations:
+            write_errors = {}
+            try:
+                await db.products.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                # Unordered: the other operations were still applied. Error indexes
+                # are positions in operations, which pending mirrors
+                write_errors = {error["index"]: error for error in e.details.get("writeErrors", [])}
+            movements = []
+            received = defaultdict(int)
+            for offset, (result, product, movement) in enumerate(pending):
+                if offset in write_errors:
+                    result["error"] = _write_error_message(write_errors[offset])
+                    continue
+                result["applied"] = True
+                movements.append(movement)
+                received[product["_id"]] += result["quantity"]
+            if movements:
+                await record_movements(db, movements)
+                applied_ids = list(received)
+                updated_products = await db.products.find(
+                    {"_id": {"$in": applied_ids}}, {"stock": 1, "dealer_price": 1, "reorder_threshold": 1}
+                ).to_list(None)
+                stocks = {p["_id"]: p["stock"] for p in updated_products}
+                await apply_dashboard_delta(db, *(
+                    stock_change_delta(p, received[p["_id"]]) for p in updated_products
+                ))
+                redis_client = await get_redis()
+                await invalidate_product_cache(redis_client, applied_ids)
+                for result, product, _ in pending:
+                    if result["applied"]:
+                        result["stock"] = stocks.get(product["_id"])
+
+        applied = sum(1 for r in results if r["applied"])
+        return {"applied": applied, "failed": len(results) - applied, "results": results}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
+# Upper bound on records per import file, and documents per insert_many batch
+IMPORT_MAX_ROWS = 100000
+IMPORT_BATCH_SIZE = 1000
+
+def _import_format(file: UploadFile, import_format: Optional[ProductImportFormat]) -> ProductImportFormat:
+    if import_format:
+        return import_format
+    filename = (file.filename or "").lower()
+    if filename.endswith(".csv"):
+        return ProductImportFormat.CSV
+    if filename.endswith((".ndjson", ".jsonl")):
+        return ProductImportFormat.NDJSON
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Cannot infer the import format from the file name; pass format=csv or format=ndjson"
+    )
+
+def _parse_import_rows(content: bytes, import_format: ProductImportFormat) -> list:
+    """
+    (row number, record) for every record in the file. Empty CSV cells are left
+    out so optional fields fall back to their defaults; a record that cannot be
+    parsed is returned as the error message instead of a dict.
+    """
+    text = content.decode("utf-8-sig")
+    if import_format == ProductImportFormat.CSV:
+        return [
+            (row, {key.strip(): value.strip() for key, value in record.items() if key and value and value.strip()})
+            for row, record in enumerate(csv.DictReader(io.StringIO(text)), start=1)
+        ]
+    rows = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            record = "Invalid JSON"
+        if not isinstance(record, (dict, str)):
+            record = "Each line must be a JSON object"
+        rows.append((len(rows) + 1, record))
+    return rows
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()
+    )
+
+def _is_slug_conflict(error: dict) -> bool:
+    return error.get("code") == 11000 and "slug" in (error.get("keyPattern") or {})
+
+def _write_error_message(error: dict) -> str:
+    if error.get("code") == 11000 and "model_number" in (error.get("keyPattern") or {}):
+        return "Product with this model number already exists"
+    return error.get("errmsg", "Write failed")
+
+async def _existing_ids(collection, ids: set) -> set:
+    if not ids:
+        return set()
+    docs = await collection.find({"_id": {"$in": [ObjectId(i) for i in ids]}}, {"_id": 1}).to_list(None)
+    return {str(doc["_id"]) for doc in docs}
+
+async def _existing_model_numbers(db, model_numbers: set) -> set:
+    if not model_numbers:
+        return set()
+    docs = await db.products.find({"model_number": {"$in": list(model_numbers)}}, {"model_number": 1}).to_list(None)
+    return {doc["model_number"] for doc in docs}
+
+@router.post("/import", response_model=ProductImportResponse)
+async def import_products(
+    file: UploadFile = File(...),
+    format: Optional[ProductImportFormat] = Query(None, description="Defaults to the file extension (.csv, .ndjson, .jsonl)")
+):
+    """
+    Create many products from a CSV or NDJSON file.
+    
+    Each record has the fields of a create request (category_id, name, model_number,
+    dealer_id, dealer_price, initial_stock and optionally description, image_id,
+    stock_notes). Rows are validated up front; categories, dealers, images and
+    existing model numbers are each resolved with one query for the whole file;
+    product codes and slugs are allocated in bulk; and products are written with
+    unordered insert_many batches. Rows that fail are reported with their row
+    number and the rest are imported.
+    
+    Example CSV:
+    ```
+    category_id,name,model_number,dealer_id,dealer_price,initial_stock
+    65a12b3c4d5e6f7890123456,Samsung TV,SM-TV2024-001,65a12b3c4d5e6f7890123457,45000,10
+    ```
+    """
+    try:
+        import_format = _import_format(file, format)
+        rows = _parse_import_rows(await file.read(), import_format)
+        if len(rows) > IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Import files are limited to {IMPORT_MAX_ROWS} rows"
+            )
+        db = await get_database()
+        errors = []
+
+        valid = []
+        for row, record in rows:
+            if isinstance(record, str):
+                errors.append({"row": row, "error": record})
+                continue
+            try:
+                valid.append((row, ProductCreate.model_validate(record)))
+            except ValidationError as e:
+                model_number = record.get("model_number")
+                errors.append({
+                    "row": row,
+                    "model_number": model_number if isinstance(model_number, str) else None,
+                    "error": _validation_message(e)
+                })
+
+        categories, dealers, images, existing_model_numbers = await asyncio.gather(
+            _existing_ids(db.categories, {p.category_id for _, p in valid}),
+            _existing_ids(db.dealers, {p.dealer_id for _, p in valid}),
+            _existing_ids(db.media_center, {p.image_id for _, p in valid if p.image_id}),
+            _existing_model_numbers(db, {p.model_number for _, p in valid})
+        )
+
+        accepted = []
+        seen_model_numbers = set()
+        for row, product in valid:
+            if product.category_id not in categories:
+                error = "Category not found"
+            elif product.dealer_id not in dealers:
+                error = "Dealer not found"
+            elif product.image_id and product.image_id not in images:
+                error = "Invalid image_id: Media not found"
+            elif product.model_number in existing_model_numbers:
+                error = "Product with this model number already exists"
+            elif product.model_number in seen_model_numbers:
+                error = "Duplicate model number in file"
+            else:
+                seen_model_numbers.add(product.model_number)
+                accepted.append((row, product))
+                continue
+            errors.append({"row": row, "model_number": product.model_number, "error": error})
+
+        current_time = datetime.now()
+        codes = await next_codes(db, "product_code", len(accepted))
+        slugs = await allocate_slugs(db, "products", [product.name for _, product in accepted])
+        documents = [
+            build_product_document(product, product_code, slug, current_time)
+            for (_, product), product_code, slug in zip(accepted, codes, slugs)
+        ]
+
+        inserted = []
+        for start in range(0, len(documents), IMPORT_BATCH_SIZE):
+            batch = list(zip(accepted[start:start + IMPORT_BATCH_SIZE], documents[start:start + IMPORT_BATCH_SIZE]))
+            while batch:
+                write_errors = {}
+                try:
+                    await db.products.insert_many([document for _, document in batch], ordered=False)
+                except BulkWriteError as e:
+                    write_errors = {error["index"]: error for error in e.details.get("writeErrors", [])}
+                conflicts = []
+                for offset, ((row, product), document) in enumerate(batch):
+                    if offset not in write_errors:
+                        inserted.append((document, product))
+                    elif _is_slug_conflict(write_errors[offset]):
+                        conflicts.append((row, product, document["product_code"]))
+                    else:
+                        errors.append({
+                            "row": row,
+                            "model_number": product.model_number,
+                            "error": _write_error_message(write_errors[offset])
+                        })
+                # Slugs taken since they were allocated are allocated again
+                slugs = await allocate_slugs(db, "products", [product.name for _, product, _ in conflicts])
+                batch = [
+                    ((row, product), build_product_document(product, product_code, slug, current_time))
+                    for (row, product, product_code), slug in zip(conflicts, slugs)
+                ]
+
+        if inserted:
+            await record_movements(db, [
+                build_movement(document, MovementType.STOCK_IN, product.initial_stock,
+                               current_time, notes=product.stock_notes)
+                for document, product in inserted if product.initial_stock > 0
+            ])
+            await apply_dashboard_delta(db, *(product_delta(document) for document, _ in inserted))
+            redis_client = await get_redis()
+            # Reused slugs must not serve a deleted product's cached entry
+            await invalidate_product_cache(redis_client, slugs=[document["slug"] for document, _ in inserted])
+
+        errors.sort(key=lambda error: error["row"])
+        return {
+            "total": len(rows),
+            "imported": len(inserted),
+            "failed": len(rows) - len(inserted),
+            "errors": errors
+        }
+    except HTTPException:
+        raise
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Import files must be UTF-8 encoded"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
 @router.post("/{slug}/stock", response_model=ProductResponse)
 async def update_stock(slug: str, stock_update: StockUpdate):
     """
     Add stock to an existing product by slug.
-    This endpoint is specifically for adding new stock and maintains a history of all stock updates.
+    This endpoint is specifically for adding new stock and records every update in inventory_movements.
     
     Example request body:
     ```json
@@ -474,59 +992,37 @@ async def update_stock(slug: str, stock_update: StockUpdate):
     Note: 
     - This only adds to existing stock
     - Updates total_stock_received
-    - Maintains history in stock_updates array
+    - Appends the update to inventory_movements and keeps the latest few in stock_updates
     - Automatically updates status (in_stock/out_of_stock)
     """
     try:
         db = await get_database()
-        
-        # Find existing product
-        existing_product = await db.products.find_one({"slug": slug})
-        if not existing_product:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Product not found"
-            )
-            
         current_time = datetime.now()
-        new_stock = existing_product["stock"] + stock_update.quantity
-        new_total_received = existing_product["total_stock_received"] + stock_update.quantity
         
-        # Update product with new stock
+        # Add the stock in a single atomic update
         updated = await db.products.find_one_and_update(
             {"slug": slug},
-            {
-                "$set": {
-                    "stock": new_stock,
-                    "total_stock_received": new_total_received,
-                    "status": ProductStatus.IN_STOCK if new_stock > 0 else ProductStatus.OUT_OF_STOCK,
-                    "last_updated_date": current_time,
-                    "updated_at": current_time
-                },
-                "$push": {
-                    "stock_updates": {
-                        "quantity": stock_update.quantity,
-                        "date": current_time,
-                        "notes": stock_update.notes
-                    }
-                }
-            },
+            stock_in_update(stock_update.quantity, current_time, stock_update.notes),
             return_document=True
         )
+        if not updated:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
         
-        if updated:
-            updated["_id"] = str(updated["_id"])
-            # Add image data
-            await enrich_product_with_media(db, updated)
-            # Invalidate cache
-            redis_client = await get_redis()
-            await invalidate_product_cache(redis_client, slug)
-            return updated
-            
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to update stock"
-        )
+        await record_movements(db, [build_movement(
+            updated, MovementType.STOCK_IN, stock_update.quantity,
+            current_time, notes=stock_update.notes
+        )])
+        await apply_dashboard_delta(db, stock_change_delta(updated, stock_update.quantity))
+        updated["_id"] = str(updated["_id"])
+        # Add image data
+        await enrich_product_with_media(db, updated)
+        # Invalidate cache
+        redis_client = await get_redis()
+        await invalidate_product_cache(redis_client, [updated["_id"]])
+        return updated
         
     except HTTPException:
         raise
@@ -540,7 +1036,7 @@ async def update_stock(slug: str, stock_update: StockUpdate):
 async def delete_product(slug: str):
     """
     Delete a product by its slug.
-    Warning: This will permanently delete the product and its stock history.
+    Warning: This will permanently delete the product. Its inventory_movements are kept.
     """
     try:
         db = await get_database()
@@ -562,9 +1058,10 @@ async def delete_product(slug: str):
         # Delete the product
         result = await db.products.delete_one({"slug": slug})
         if result.deleted_count:
+            await apply_dashboard_delta(db, product_delta(product, sign=-1))
             # Invalidate cache
             redis_client = await get_redis()
-            await invalidate_product_cache(redis_client, slug)
+            await invalidate_product_cache(redis_client, [product["_id"]], [slug])
             return
             
         raise HTTPException(
@@ -585,7 +1082,10 @@ async def record_sale(slug: str, sale: SaleCreate):
     Record a sale for a product, which will:
     1. Decrease the stock by the sold quantity
     2. Increase total_sales counter
-    3. Add a record to sales_history
+    3. Append the sale to inventory_movements and keep the latest few in sales_history
+    
+    The stock check is part of the update filter, so concurrent sales can never
+    drive stock negative.
     
     Example request body:
     ```json
@@ -598,66 +1098,197 @@ async def record_sale(slug: str, sale: SaleCreate):
     """
     try:
         db = await get_database()
+        current_time = datetime.now()
         
-        # Find existing product
-        existing_product = await db.products.find_one({"slug": slug})
-        if not existing_product:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Product not found"
-            )
-            
-        # Check if we have enough stock
-        if existing_product["stock"] < sale.quantity:
+        # Check stock and apply the sale in a single atomic update
+        updated = await db.products.find_one_and_update(
+            {"slug": slug, **sale_filter(sale.quantity)},
+            sale_update(sale.quantity, sale.sale_price, current_time, sale.notes),
+            return_document=True
+        )
+        
+        if not updated:
+            # Only on failure: find out whether the product is missing or short on stock
+            existing_product = await db.products.find_one({"slug": slug}, {"stock": 1})
+            if not existing_product:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Product not found"
+                )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Insufficient stock. Available: {existing_product['stock']}, Requested: {sale.quantity}"
             )
             
-        current_time = datetime.now()
+        await record_movements(db, [build_movement(
+            updated, MovementType.SALE, sale.quantity, current_time,
+            notes=sale.notes, sale_price=sale.sale_price
+        )])
+        await apply_dashboard_delta(db, stock_change_delta(updated, -sale.quantity))
+        updated["_id"] = str(updated["_id"])
+        # Add image data
+        await enrich_product_with_media(db, updated)
+        # Invalidate cache
+        redis_client = await get_redis()
+        await invalidate_product_cache(redis_client, [updated["_id"]])
+        return updated
         
-        # Update product with sale information
-        updated = await db.products.find_one_and_update(
-            {"slug": slug},
-            {
-                "$inc": {
-                    "stock": -sale.quantity,
-                    "total_sales": sale.quantity
-                },
-                "$push": {
-                    "sales_history": {
-                        "quantity": sale.quantity,
-                        "sale_price": sale.sale_price,
-                        "date": current_time,
-                        "notes": sale.notes
-                    }
-                },
-                "$set": {
-                    "status": ProductStatus.OUT_OF_STOCK if existing_product["stock"] - sale.quantity == 0 else ProductStatus.IN_STOCK,
-                    "updated_at": current_time
-                }
-            },
-            return_document=True
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
         )
-        
-        if updated:
-            updated["_id"] = str(updated["_id"])
-            # Add image data
-            await enrich_product_with_media(db, updated)
-            # Invalidate cache
-            redis_client = await get_redis()
-            await invalidate_product_cache(redis_client, slug)
-            return updated
-            
+
+class CheckoutRejected(Exception):
+    """Raised inside the checkout transaction to abort it."""
+
+async def checkout_shortages(db, lines) -> list:
+    """Describe the checkout lines that cannot be fulfilled from current stock."""
+    requested = defaultdict(int)
+    for line in lines:
+        requested[line.slug] += line.quantity
+    products = await db.products.find(
+        {"slug": {"$in": list(requested)}}, {"slug": 1, "stock": 1}
+    ).to_list(None)
+    available = {p["slug"]: p.get("stock", 0) for p in products}
+    shortages = []
+    for slug, quantity in requested.items():
+        if slug not in available:
+            shortages.append({"slug": slug, "error": "Product not found"})
+        elif available[slug] < quantity:
+            shortages.append({
+                "slug": slug,
+                "error": f"Insufficient stock. Available: {available[slug]}, Requested: {quantity}"
+            })
+    return shortages
+
+@router.post("/checkout", response_model=CheckoutResponse)
+async def checkout(cart: CheckoutCreate):
+    """
+    Record a multi-line sale across many products with all-or-nothing semantics.
+    
+    All lines are applied in one transaction with a single bulk_write of
+    conditional updates; if any line lacks stock the whole checkout is rolled
+    back and the offending lines are reported. Requires MongoDB to run as a
+    replica set (transactions are not available on standalone servers).
+    
+    Example request body:
+    ```json
+    {
+        "lines": [
+            {"slug": "samsung-tv", "quantity": 1, "sale_price": 55000.00},
+            {"slug": "lg-fridge", "quantity": 2, "sale_price": 42000.00, "notes": "Festival offer"}
+        ]
+    }
+    ```
+    """
+    db = await get_database()
+    client = await get_client()
+    current_time = datetime.now()
+    operations = [
+        UpdateOne(
+            {"slug": line.slug, **sale_filter(line.quantity)},
+            sale_update(line.quantity, line.sale_price, current_time, line.notes)
+        )
+        for line in cart.lines
+    ]
+    slugs = list({line.slug for line in cart.lines})
+
+    async def apply_checkout(session):
+        # with_transaction may run this more than once (TransientTransactionError),
+        # so everything it returns is rebuilt on each attempt
+        result = await db.products.bulk_write(operations, ordered=True, session=session)
+        if result.matched_count != len(operations):
+            # Raising from the callback aborts the transaction
+            raise CheckoutRejected()
+        products = await db.products.find(
+            {"slug": {"$in": slugs}},
+            {"slug": 1, "stock": 1, "dealer_price": 1, "reorder_threshold": 1, "category_id": 1, "dealer_id": 1},
+            session=session
+        ).to_list(None)
+        by_slug = {p["slug"]: p for p in products}
+        movements = [
+            build_movement(
+                by_slug[line.slug], MovementType.SALE, line.quantity, current_time,
+                notes=line.notes, sale_price=line.sale_price
+            )
+            for line in cart.lines
+        ]
+        await db.inventory_movements.insert_many(movements, ordered=False, session=session)
+        return products, by_slug, movements
+
+    try:
+        # with_transaction retries the whole transaction on TransientTransactionError
+        # and the commit on UnknownTransactionCommitResult
+        async with await client.start_session() as session:
+            products, by_slug, movements = await session.with_transaction(apply_checkout)
+    except CheckoutRejected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Checkout rejected", "lines": await checkout_shortages(db, cart.lines)}
+        )
+    except OperationFailure as e:
+        if e.code == 20:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Checkout requires MongoDB transactions (replica set or sharded cluster)"
+            )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to record sale"
+            detail=f"An unexpected error occurred: {str(e)}"
         )
-        
-    except HTTPException:
-        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred: {str(e)}"
         )
+
+    sold = defaultdict(int)
+    for line in cart.lines:
+        sold[line.slug] += line.quantity
+    await apply_dashboard_delta(db, *(stock_change_delta(p, -sold[p["slug"]]) for p in products))
+    await apply_rollups(db, movements)
+    redis_client = await get_redis()
+    await invalidate_product_cache(redis_client, [p["_id"] for p in products])
+    return {
+        "date": current_time,
+        "total_quantity": sum(line.quantity for line in cart.lines),
+        "total_amount": sum(line.quantity * line.sale_price for line in cart.lines),
+        "lines": [
+            {
+                "slug": line.slug,
+                "product_id": str(by_slug[line.slug]["_id"]),
+                "quantity": line.quantity,
+                "sale_price": line.sale_price,
+                "remaining_stock": by_slug[line.slug]["stock"]
+            }
+            for line in cart.lines
+        ]
+    }
+
+@router.get("/{slug}/movements", response_model=List[InventoryMovementResponse])
+async def get_product_movements(
+    slug: str,
+    movement_type: Optional[MovementType] = Query(None, alias="type"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Get the full stock and sales history of a product, newest first."""
+    db = await get_database()
+    product = await db.products.find_one({"slug": slug}, {"_id": 1})
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    query = {"product_id": str(product["_id"])}
+    if movement_type:
+        query["type"] = movement_type.value
+    movements = await db.inventory_movements.find(query).sort(
+        [("date", -1), ("_id", -1)]
+    ).skip(skip).limit(limit).to_list(limit)
+    for movement in movements:
+        movement["_id"] = str(movement["_id"])
+    return movements
@@ -1,87 +1,430 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, status
+from pydantic import ValidationError
 from ..db.mongodb import get_database
-from datetime import datetime
-from collections import defaultdict
+from ..db.redis import get_redis
+from ..schemas.reports import (
+    RollupGrouping, SalesRanking, SalesMetric, ReportKind,
+    RollupReportParams, StockValueReportParams, ReportJobCreate, ReportJobResponse
+)
+from ..services.cache import ROLLUPS_TAG, cache_key, cache_get_or_load
+from ..services.jobs import JobStatus, register_job, get_job_queue, submit_job, get_job
+from ..services.rollups import ROLLUP_COUNTERS
+from datetime import datetime, timedelta
+from typing import Optional
 
 router = APIRouter(prefix="/api/reports", tags=["reports"])
 
+# Every report is a single aggregation run by MongoDB: documents are reduced to the
+# fields a report needs before grouping, and only the result rows are returned.
+
+def _stock_value_stages() -> list:
+    return [
+        {"$project": {
+            "_id": 0,
+            "category_id": 1,
+            "stock": {"$ifNull": ["$stock", 0]},
+            "dealer_price": {"$ifNull": ["$dealer_price", 0]},
+        }},
+        {"$group": {
+            "_id": "$category_id",
+            "stock": {"$sum": "$stock"},
+            "value": {"$sum": {"$multiply": ["$stock", "$dealer_price"]}},
+        }},
+    ]
+
+def _name_lookup_stages(collection: str, name_field: str) -> list:
+    """Resolve the name of the document each group's _id refers to (no limit on groups)."""
+    return [
+        {"$addFields": {"_ref_oid": {"$convert": {
+            "input": "$_id", "to": "objectId", "onError": None, "onNull": None
+        }}}},
+        {"$lookup": {
+            "from": collection,
+            "localField": "_ref_oid",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"_id": 0, "name": f"${name_field}"}}],
+            "as": "_ref",
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+def _category_name_stages() -> list:
+    return _name_lookup_stages("categories", "name")
+
+def _resolved_name() -> dict:
+    return {"$ifNull": [{"$arrayElemAt": ["$_ref.name", 0]}, "Unknown"]}
+
+async def category_totals(db) -> list:
+    """Stock quantity and stock value per category."""
+    pipeline = [
+        *_stock_value_stages(),
+        *_category_name_stages(),
+        {"$project": {
+            "_id": 0,
+            "category_id": "$_id",
+            "category_name": _resolved_name(),
+            "stock": 1,
+            "value": 1,
+        }},
+    ]
+    return await db.products.aggregate(pipeline).to_list(None)
+
+async def monthly_stock_totals(db) -> list:
+    """Stock received per month, from the monthly rollups."""
+    pipeline = [
+        {"$match": {"quantity_received": {"$gt": 0}}},
+        {"$group": {"_id": "$month", "stock_added": {"$sum": "$quantity_received"}}},
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0, "month": "$_id", "stock_added": 1}},
+    ]
+    return await db.monthly_rollups.aggregate(pipeline).to_list(None)
+
+# group_by -> (group key expression, output field, (collection, name field) to resolve a name from)
+ROLLUP_GROUPS = {
+    RollupGrouping.DAY: ({"$dateToString": {"format": "%Y-%m-%d", "date": "$day"}}, "day", None),
+    RollupGrouping.MONTH: ({"$dateToString": {"format": "%Y-%m", "date": "$day"}}, "month", None),
+    RollupGrouping.PRODUCT: ("$product_id", "product_id", ("products", "name")),
+    RollupGrouping.CATEGORY: ("$category_id", "category_id", ("categories", "name")),
+    RollupGrouping.DEALER: ("$dealer_id", "dealer_id", ("dealers", "company_name")),
+}
+
+async def rollup_totals(
+    db,
+    date_from: datetime,
+    date_to: datetime,
+    group_by: RollupGrouping,
+    filters: Optional[dict] = None
+) -> list:
+    """Quantity received, quantity sold and revenue between two days (inclusive), from the daily rollups."""
+    key, field, name_source = ROLLUP_GROUPS[group_by]
+    pipeline = [
+        {"$match": {**(filters or {}), "day": {"$gte": date_from, "$lte": date_to}}},
+        {"$group": {"_id": key, **{counter: {"$sum": f"${counter}"} for counter in ROLLUP_COUNTERS}}},
+    ]
+    projection = {"_id": 0, field: "$_id", **{counter: 1 for counter in ROLLUP_COUNTERS}}
+    if name_source:
+        pipeline += _name_lookup_stages(*name_source)
+        projection[field.replace("_id", "_name")] = _resolved_name()
+    else:
+        pipeline.append({"$sort": {"_id": 1}})
+    pipeline.append({"$project": projection})
+    return await db.daily_rollups.aggregate(pipeline).to_list(None)
+
+def rollup_window(date_from: Optional[datetime], date_to: Optional[datetime]) -> tuple:
+    """Whole days from date_from to date_to; defaults to the last 30 days."""
+    date_to = (date_to or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    date_from = (date_from or date_to - timedelta(days=29)).replace(hour=0, minute=0, second=0, microsecond=0)
+    if date_from > date_to:
+        raise ValueError("date_from must not be after date_to")
+    return date_from, date_to
+
+def _report_window(date_from: Optional[datetime], date_to: Optional[datetime]) -> tuple:
+    try:
+        return rollup_window(date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def rollup_filters(product_id: Optional[str], category_id: Optional[str], dealer_id: Optional[str]) -> dict:
+    return {
+        field: value
+        for field, value in (("product_id", product_id), ("category_id", category_id), ("dealer_id", dealer_id))
+        if value
+    }
+
+# Sales analytics over the daily rollups. Gross margin is revenue minus cost,
+# where cost is units sold times the dealer price at the time of each sale.
+
+SALES_FIELDS = ("units", "revenue", "cost", "gross_margin", "margin_pct", "units_per_day")
+
+# Cache TTL of sales reports whose range includes today; closed ranges keep the
+# default TTL and are only invalidated by a rollup rebuild
+SALES_REPORT_LIVE_TTL = 60
+SALES_REPORT_LIMIT_MAX = 500
+
+async def sales_totals(
+    db,
+    date_from: datetime,
+    date_to: datetime,
+    group_by: RollupGrouping,
+    filters: Optional[dict] = None,
+    sort_by: Optional[str] = None,
+    limit: Optional[int] = None
+) -> list:
+    """
+    Units sold, revenue, cost, gross margin (absolute and % of revenue) and units
+    sold per day of the range, per group. Sorted by sort_by (descending) or by
+    group; with a limit, names are only looked up for the returned rows.
+    """
+    key, field, name_source = ROLLUP_GROUPS[group_by]
+    days = (date_to - date_from).days + 1
+    margin = {"$subtract": ["$revenue", "$cost"]}
+    sort = {sort_by: -1, "_id": 1} if sort_by else {"_id": 1}
+    pipeline = [
+        {"$match": {**(filters or {}), "day": {"$gte": date_from, "$lte": date_to}, "quantity_sold": {"$gt": 0}}},
+        {"$group": {
+            "_id": key,
+            "units": {"$sum": "$quantity_sold"},
+            "revenue": {"$sum": "$revenue"},
+            "cost": {"$sum": {"$ifNull": ["$cost", 0]}},
+        }},
+        {"$addFields": {
+            "gross_margin": margin,
+            "margin_pct": {"$cond": [
+                {"$gt": ["$revenue", 0]}, {"$multiply": [{"$divide": [margin, "$revenue"]}, 100]}, None
+            ]},
+            "units_per_day": {"$divide": ["$units", days]},
+        }},
+        {"$sort": sort},
+    ]
+    if limit:
+        pipeline.append({"$limit": limit})
+    projection = {"_id": 0, field: "$_id", **{f: 1 for f in SALES_FIELDS}}
+    if name_source:
+        pipeline += _name_lookup_stages(*name_source)
+        pipeline.append({"$sort": sort})
+        projection[field.replace("_id", "_name")] = _resolved_name()
+    pipeline.append({"$project": projection})
+    return await db.daily_rollups.aggregate(pipeline).to_list(None)
+
+async def cached_sales_report(name: str, date_from: datetime, date_to: datetime, params: dict, loader) -> list:
+    """
+    Cache a sales report per date range and parameters. Ranges that include
+    today refresh every SALES_REPORT_LIVE_TTL seconds.
+    """
+    key = cache_key(
+        "report", "sales", name, f"{date_from:%Y-%m-%d}", f"{date_to:%Y-%m-%d}",
+        *(f"{k}={v}" for k, v in sorted(params.items()) if v is not None)
+    )
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return await cache_get_or_load(
+        await get_redis(), key, loader,
+        tags=lambda _: [ROLLUPS_TAG],
+        ttl=SALES_REPORT_LIVE_TTL if date_to >= today else None
+    )
+
+async def dues_totals(db) -> dict:
+    """
+    Ledger amounts by pending / paid / overdue, from the stored status (the overdue
+    sweeper keeps it current); any other status counts as pending.
+    """
+    pipeline = [
+        {"$group": {"_id": "$status", "amount": {"$sum": {"$ifNull": ["$amount", 0]}}}},
+    ]
+    summary = {"pending": 0.0, "paid": 0.0, "overdue": 0.0}
+    for row in await db.party_ledger.aggregate(pipeline).to_list(None):
+        summary[row["_id"] if row["_id"] in summary else "pending"] += row["amount"]
+    return summary
+
+async def category_stock_values(db) -> list:
+    """Stock value per category."""
+    pipeline = [
+        *_stock_value_stages(),
+        *_category_name_stages(),
+        {"$project": {
+            "_id": 0,
+            "category_id": "$_id",
+            "category_name": _resolved_name(),
+            "value": 1,
+        }},
+    ]
+    return await db.products.aggregate(pipeline).to_list(None)
+
+async def total_stock_value(db) -> float:
+    pipeline = [
+        {"$group": {"_id": None, "value": {"$sum": {"$multiply": [
+            {"$ifNull": ["$stock", 0]}, {"$ifNull": ["$dealer_price", 0]}
+        ]}}}},
+    ]
+    result = await db.products.aggregate(pipeline).to_list(1)
+    return result[0]["value"] if result else 0.0
+
 @router.get("/category-wise")
 async def category_wise_report():
     db = await get_database()
-    # Aggregate stock and value per category
-    category_data = defaultdict(lambda: {"stock": 0, "value": 0.0})
-    async for product in db.products.find({}):
-        cat_id = product.get("category_id")
-        stock = product.get("stock", 0)
-        price = product.get("dealer_price", 0)
-        category_data[cat_id]["stock"] += stock
-        category_data[cat_id]["value"] += stock * price
-    # Get category names
-    categories = {str(cat["_id"]): cat["name"] for cat in await db.categories.find({}).to_list(length=100)}
-    result = []
-    for cat_id, data in category_data.items():
-        result.append({
-            "category_id": cat_id,
-            "category_name": categories.get(cat_id, "Unknown"),
-            "stock": data["stock"],
-            "value": data["value"]
-        })
-    return result
+    return await category_totals(db)
 
 @router.get("/monthly-stock")
 async def monthly_stock_report():
     db = await get_database()
-    # Aggregate stock additions per month
-    monthly = defaultdict(int)
-    async for product in db.products.find({}):
-        for update in product.get("stock_updates", []):
-            date = update.get("date")
-            qty = update.get("quantity", 0)
-            if date:
-                month = date.strftime("%Y-%m")
-                monthly[month] += qty
-    # Return sorted by month
-    return [
-        {"month": month, "stock_added": qty}
-        for month, qty in sorted(monthly.items())
-    ]
+    return await monthly_stock_totals(db)
+
+@router.get("/rollups")
+async def rollup_report(
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    group_by: RollupGrouping = Query(RollupGrouping.DAY),
+    product_id: Optional[str] = None,
+    category_id: Optional[str] = None,
+    dealer_id: Optional[str] = None,
+):
+    """
+    Units received, units sold and revenue for any date range, grouped by day,
+    month, product, category or dealer. Reads the daily rollups only.
+    Defaults to the last 30 days; both ends of the range are inclusive days.
+    """
+    date_from, date_to = _report_window(date_from, date_to)
+    db = await get_database()
+    return await rollup_totals(db, date_from, date_to, group_by, rollup_filters(product_id, category_id, dealer_id))
+
+@router.get("/sales/top")
+async def top_sales_report(
+    by: SalesRanking = Query(SalesRanking.PRODUCT),
+    metric: SalesMetric = Query(SalesMetric.REVENUE),
+    limit: int = Query(10, ge=1, le=SALES_REPORT_LIMIT_MAX),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    category_id: Optional[str] = None,
+    dealer_id: Optional[str] = None,
+):
+    """
+    Top products, categories or dealers by units sold, revenue or gross margin.
+    Defaults to the last 30 days; both ends of the range are inclusive days.
+    """
+    date_from, date_to = _report_window(date_from, date_to)
+    filters = rollup_filters(None, category_id, dealer_id)
+    db = await get_database()
+    return await cached_sales_report(
+        "top", date_from, date_to, {"by": by.value, "metric": metric.value, "limit": limit, **filters},
+        lambda: sales_totals(db, date_from, date_to, RollupGrouping(by.value), filters, metric.value, limit)
+    )
+
+@router.get("/sales/velocity")
+async def sales_velocity_report(
+    by: SalesRanking = Query(SalesRanking.PRODUCT),
+    limit: int = Query(50, ge=1, le=SALES_REPORT_LIMIT_MAX),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    product_id: Optional[str] = None,
+    category_id: Optional[str] = None,
+    dealer_id: Optional[str] = None,
+):
+    """
+    Sales velocity: units sold per day over the range (every day of the range
+    counts, including days without sales), fastest movers first.
+    """
+    date_from, date_to = _report_window(date_from, date_to)
+    filters = rollup_filters(product_id, category_id, dealer_id)
+    db = await get_database()
+    return await cached_sales_report(
+        "velocity", date_from, date_to, {"by": by.value, "limit": limit, **filters},
+        lambda: sales_totals(db, date_from, date_to, RollupGrouping(by.value), filters, "units_per_day", limit)
+    )
+
+@router.get("/sales/margin")
+async def sales_margin_report(
+    group_by: RollupGrouping = Query(RollupGrouping.MONTH),
+    limit: Optional[int] = Query(None, ge=1, le=SALES_REPORT_LIMIT_MAX),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    product_id: Optional[str] = None,
+    category_id: Optional[str] = None,
+    dealer_id: Optional[str] = None,
+):
+    """
+    Revenue, cost and gross margin (sale_price - dealer_price per unit) grouped
+    by day, month, product, category or dealer. Days and months are returned in
+    order, other groupings by gross margin, highest first.
+    """
+    date_from, date_to = _report_window(date_from, date_to)
+    filters = rollup_filters(product_id, category_id, dealer_id)
+    sort_by = None if group_by in (RollupGrouping.DAY, RollupGrouping.MONTH) else "gross_margin"
+    db = await get_database()
+    return await cached_sales_report(
+        "margin", date_from, date_to, {"group_by": group_by.value, "limit": limit, **filters},
+        lambda: sales_totals(db, date_from, date_to, group_by, filters, sort_by, limit)
+    )
 
 @router.get("/dues-summary")
 async def dues_summary_report():
     db = await get_database()
-    summary = {"pending": 0.0, "paid": 0.0, "overdue": 0.0}
-    now = datetime.now()
-    async for entry in db.party_ledger.find({}):
-        status = entry.get("status", "pending")
-        amount = entry.get("amount", 0)
-        due_date = entry.get("due_date")
-        if status == "paid":
-            summary["paid"] += amount
-        elif status == "overdue" or (status != "paid" and due_date and due_date < now):
-            summary["overdue"] += amount
-        else:
-            summary["pending"] += amount
-    return summary
+    return await dues_totals(db)
 
 @router.get("/stock-value")
 async def stock_value_report(group_by_category: bool = Query(False)):
     db = await get_database()
     if group_by_category:
-        category_values = defaultdict(float)
-        async for product in db.products.find({}):
-            cat_id = product.get("category_id")
-            stock = product.get("stock", 0)
-            price = product.get("dealer_price", 0)
-            category_values[cat_id] += stock * price
-        categories = {str(cat["_id"]): cat["name"] for cat in await db.categories.find({}).to_list(length=100)}
-        return [
-            {"category_id": cat_id, "category_name": categories.get(cat_id, "Unknown"), "value": value}
-            for cat_id, value in category_values.items()
-        ]
+        return await category_stock_values(db)
     else:
-        total_value = 0.0
-        async for product in db.products.find({}):
-            stock = product.get("stock", 0)
-            price = product.get("dealer_price", 0)
-            total_value += stock * price
-        return {"total_stock_value": total_value} 
\ No newline at end of file
+        return {"total_stock_value": await total_stock_value(db)}
+
+# Background report jobs: the same reports, run by a job worker and kept for
+# JOB_RESULT_TTL seconds. Identical submissions share one job.
+
+REPORT_JOB_PREFIX = "report:"
+
+def report_job(report: ReportKind, params_model=None):
+    return register_job(REPORT_JOB_PREFIX + report.value, params_model)
+
+@report_job(ReportKind.CATEGORY_WISE)
+async def category_wise_job(db, params):
+    return await category_totals(db)
+
+@report_job(ReportKind.MONTHLY_STOCK)
+async def monthly_stock_job(db, params):
+    return await monthly_stock_totals(db)
+
+@report_job(ReportKind.ROLLUPS, RollupReportParams)
+async def rollups_job(db, params: RollupReportParams):
+    date_from, date_to = rollup_window(params.date_from, params.date_to)
+    filters = rollup_filters(params.product_id, params.category_id, params.dealer_id)
+    return await rollup_totals(db, date_from, date_to, params.group_by, filters)
+
+@report_job(ReportKind.DUES_SUMMARY)
+async def dues_summary_job(db, params):
+    return await dues_totals(db)
+
+@report_job(ReportKind.STOCK_VALUE, StockValueReportParams)
+async def stock_value_job(db, params: StockValueReportParams):
+    if params.group_by_category:
+        return await category_stock_values(db)
+    return {"total_stock_value": await total_stock_value(db)}
+
+def _job_response(job: dict) -> dict:
+    return {**job, "report": job["kind"][len(REPORT_JOB_PREFIX):]}
+
+async def _get_report_job(job_id: str) -> dict:
+    job = await get_job(await get_job_queue(), job_id)
+    if not job or not job["kind"].startswith(REPORT_JOB_PREFIX):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+@router.post("/jobs", response_model=ReportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_report_job(job: ReportJobCreate):
+    """
+    Run a report in the background. params takes the report's query parameters
+    (rollups: date_from, date_to, group_by, product_id, category_id, dealer_id;
+    stock-value: group_by_category). Poll GET /api/reports/jobs/{id} until the
+    status is completed or failed. If the same report with the same parameters
+    is already queued, running or finished within the result TTL, that job is
+    returned instead of a new one.
+    """
+    try:
+        queue = await get_job_queue()
+        submitted = await submit_job(queue, REPORT_JOB_PREFIX + job.report.value, job.params)
+        return _job_response(submitted)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.errors(include_url=False, include_context=False, include_input=False)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
+@router.get("/jobs/{job_id}", response_model=ReportJobResponse)
+async def get_report_job(job_id: str):
+    """Status of a report job, with the result once it has completed."""
+    return _job_response(await _get_report_job(job_id))
+
+@router.get("/jobs/{job_id}/result")
+async def get_report_job_result(job_id: str):
+    """The result of a completed report job, shaped like the report's own endpoint."""
+    job = await _get_report_job(job_id)
+    if job["status"] != JobStatus.COMPLETED.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job['status']}" + (f": {job['error']}" if job.get("error") else "")
+        )
+    return job["result"]
@@ -0,0 +1,52 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from ..services.jobs import JobStatus
+
+class ProductForecastResponse(BaseModel):
+    product_id: str
+    name: Optional[str] = None
+    product_code: Optional[str] = None
+    category_id: Optional[str] = None
+    dealer_id: Optional[str] = None
+    stock: int
+    dealer_price: float
+    demand_rate: float = Field(..., description="Units sold per day, recency weighted")
+    demand_std: float
+    units_sold: int = Field(..., description="Units sold in the forecast window")
+    days_of_cover: Optional[float] = Field(None, description="Days the stock lasts at demand_rate; null without sales")
+    safety_stock: float
+    reorder_point: float
+    needs_reorder: bool
+    suggested_reorder_qty: int
+    reorder_cost: float
+    window_start: datetime
+    window_days: int
+    lead_time_days: float
+    cover_days: float
+    computed_at: datetime
+
+class DealerReorderLine(BaseModel):
+    product_id: str
+    name: Optional[str] = None
+    product_code: Optional[str] = None
+    stock: int
+    days_of_cover: Optional[float] = None
+    suggested_reorder_qty: int
+    reorder_cost: float
+
+class DealerReorderResponse(BaseModel):
+    dealer_id: Optional[str] = None
+    dealer_name: Optional[str] = None
+    total_quantity: int
+    total_cost: float
+    products: List[DealerReorderLine]
+
+class ForecastRefreshJobResponse(BaseModel):
+    id: str
+    status: JobStatus
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from ..models.inventory_movements import MovementType
+
+class InventoryMovementResponse(BaseModel):
+    id: str = Field(..., alias="_id")
+    product_id: str
+    category_id: str
+    dealer_id: str
+    type: MovementType
+    quantity: int
+    sale_price: Optional[float] = None
+    unit_cost: Optional[float] = None
+    notes: Optional[str] = None
+    date: datetime
+
+    class Config:
+        populate_by_name = True
+        arbitrary_types_allowed = True
@@ -1,6 +1,6 @@
 from typing import Optional, List
 from datetime import datetime
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from enum import Enum
 from bson import ObjectId
 
@@ -9,6 +9,10 @@ class ProductStatus(str, Enum):
     OUT_OF_STOCK = "out_of_stock"
     DISCONTINUED = "discontinued"
 
+class ProductView(str, Enum):
+    SUMMARY = "summary"
+    FULL = "full"
+
 class StockUpdateBase(BaseModel):
     quantity: int = Field(..., ge=0, description="Quantity to add to stock (must be non-negative)")
     notes: Optional[str] = None
@@ -24,6 +28,70 @@ class SaleCreate(BaseModel):
 class SaleResponse(SaleCreate):
     date: datetime
 
+class CheckoutLine(SaleCreate):
+    slug: str = Field(..., min_length=1, description="Slug of the product sold")
+
+class CheckoutCreate(BaseModel):
+    lines: List[CheckoutLine] = Field(..., min_length=1, max_length=500)
+
+class CheckoutLineResult(BaseModel):
+    slug: str
+    product_id: str
+    quantity: int
+    sale_price: float
+    remaining_stock: int
+
+class CheckoutResponse(BaseModel):
+    date: datetime
+    total_quantity: int
+    total_amount: float
+    lines: List[CheckoutLineResult]
+
+class BulkStockLine(BaseModel):
+    slug: Optional[str] = None
+    model_number: Optional[str] = None
+    quantity: int = Field(..., ge=0, description="Quantity to add to current stock")
+    notes: Optional[str] = None
+
+    @model_validator(mode="after")
+    def validate_reference(self):
+        if not self.slug and not self.model_number:
+            raise ValueError("Either slug or model_number is required")
+        return self
+
+class BulkStockCreate(BaseModel):
+    lines: List[BulkStockLine] = Field(..., min_length=1, max_length=1000)
+    notes: Optional[str] = Field(None, description="Default notes for lines without their own")
+
+class BulkStockLineResult(BaseModel):
+    index: int
+    slug: Optional[str] = None
+    model_number: Optional[str] = None
+    quantity: int
+    applied: bool
+    stock: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkStockResponse(BaseModel):
+    applied: int
+    failed: int
+    results: List[BulkStockLineResult]
+
+class ProductImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class ProductImportError(BaseModel):
+    row: int = Field(..., description="1-based record number in the file (header excluded)")
+    model_number: Optional[str] = None
+    error: str
+
+class ProductImportResponse(BaseModel):
+    total: int
+    imported: int
+    failed: int
+    errors: List[ProductImportError]
+
 class ProductImage(BaseModel):
     image_id: str
     image_url: str
@@ -36,6 +104,7 @@ class ProductBase(BaseModel):
     dealer_price: float = Field(..., ge=0, description="Price in NPR (must be non-negative)")
     description: Optional[str] = None
     image_id: Optional[str] = None
+    reorder_threshold: Optional[int] = Field(None, ge=0, description="Low-stock alert below this stock (default 5, 0 disables)")
 
     @field_validator('category_id', 'dealer_id', 'image_id')
     @classmethod
@@ -57,6 +126,7 @@ class ProductUpdate(BaseModel):
     description: Optional[str] = None
     image_id: Optional[str] = None
     status: Optional[ProductStatus] = None
+    reorder_threshold: Optional[int] = Field(None, ge=0)
 
     @field_validator('dealer_id', 'image_id')
     @classmethod
@@ -82,6 +152,8 @@ class ProductResponse(ProductBase):
     stock_updates: List[StockUpdateResponse]
     sales_history: List[SaleResponse]
     images: List[ProductImage] = []
+    is_low_stock: Optional[bool] = None
+    stock_ratio: Optional[float] = None
     created_at: Optional[datetime] = None
     category_name: Optional[str] = None
     dealer_name: Optional[str] = None
@@ -89,3 +161,44 @@ class ProductResponse(ProductBase):
     class Config:
         populate_by_name = True
         arbitrary_types_allowed = True
+
+class ProductSummaryResponse(BaseModel):
+    """Shape of a product returned with view=summary (no stock or sales history)."""
+    id: str = Field(..., alias="_id")
+    product_code: str
+    name: str
+    slug: str
+    model_number: str
+    category_id: str
+    dealer_id: str
+    dealer_price: float
+    stock: int
+    total_stock_received: int
+    total_sales: int
+    status: ProductStatus
+    reorder_threshold: Optional[int] = None
+    is_low_stock: Optional[bool] = None
+    image_id: Optional[str] = None
+    images: List[ProductImage] = []
+    created_at: Optional[datetime] = None
+    category_name: Optional[str] = None
+    dealer_name: Optional[str] = None
+
+    class Config:
+        populate_by_name = True
+        arbitrary_types_allowed = True
+
+class LowStockProductResponse(BaseModel):
+    id: str = Field(..., alias="_id")
+    product_code: str
+    name: str
+    slug: str
+    model_number: str
+    dealer_id: str
+    stock: int
+    reorder_threshold: Optional[int] = None
+    stock_ratio: float
+
+    class Config:
+        populate_by_name = True
+        arbitrary_types_allowed = True
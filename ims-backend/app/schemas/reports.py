@@ -0,0 +1,55 @@
+from pydantic import BaseModel, Field
+from typing import Any, Optional
+from datetime import datetime
+from enum import Enum
+from ..services.jobs import JobStatus
+
+class RollupGrouping(str, Enum):
+    DAY = "day"
+    MONTH = "month"
+    PRODUCT = "product"
+    CATEGORY = "category"
+    DEALER = "dealer"
+
+class SalesRanking(str, Enum):
+    PRODUCT = "product"
+    CATEGORY = "category"
+    DEALER = "dealer"
+
+class SalesMetric(str, Enum):
+    UNITS = "units"
+    REVENUE = "revenue"
+    GROSS_MARGIN = "gross_margin"
+
+class ReportKind(str, Enum):
+    CATEGORY_WISE = "category-wise"
+    MONTHLY_STOCK = "monthly-stock"
+    ROLLUPS = "rollups"
+    DUES_SUMMARY = "dues-summary"
+    STOCK_VALUE = "stock-value"
+
+class RollupReportParams(BaseModel):
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    group_by: RollupGrouping = RollupGrouping.DAY
+    product_id: Optional[str] = None
+    category_id: Optional[str] = None
+    dealer_id: Optional[str] = None
+
+class StockValueReportParams(BaseModel):
+    group_by_category: bool = False
+
+class ReportJobCreate(BaseModel):
+    report: ReportKind
+    params: dict = Field(default_factory=dict, description="The report's query parameters")
+
+class ReportJobResponse(BaseModel):
+    id: str
+    report: ReportKind
+    params: dict
+    status: JobStatus
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
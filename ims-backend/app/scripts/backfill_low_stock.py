@@ -0,0 +1,37 @@
+"""
+Populate the low-stock fields (is_low_stock / stock_ratio) of existing products.
+
+Usage:
+    python -m app.scripts.backfill_low_stock [--all]
+
+By default only products without the fields are processed; pass --all to
+recompute every product, e.g. after changing the default threshold. The update
+runs inside MongoDB, and the dashboard counters are reconciled afterwards.
+"""
+import argparse
+import asyncio
+from ..db.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from ..services.dashboard import reconcile_dashboard_stats
+from ..services.stock import low_stock_stage
+
+async def backfill_low_stock(db, rebuild: bool = False) -> int:
+    """Derive the low-stock fields from stock and reorder_threshold. Returns the number of products updated."""
+    query = {} if rebuild else {"is_low_stock": {"$exists": False}}
+    result = await db.products.update_many(query, [low_stock_stage()])
+    return result.modified_count
+
+async def main(rebuild: bool):
+    await connect_to_mongo()
+    try:
+        db = await get_database()
+        updated = await backfill_low_stock(db, rebuild)
+        stats = await reconcile_dashboard_stats(db)
+        print(f"Done. {updated} products updated, {stats['low_stock_count']} low on stock.")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--all", action="store_true", help="Recompute the fields for every product")
+    args = parser.parse_args()
+    asyncio.run(main(args.all))
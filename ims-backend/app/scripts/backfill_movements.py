@@ -0,0 +1,92 @@
+"""
+Move embedded stock_updates / sales_history into inventory_movements.
+
+Usage:
+    python -m app.scripts.backfill_movements [--batch-size 500]
+
+Products already migrated (or created after the movement collection was
+introduced) carry movements_backfilled=True and are skipped. Each backfilled
+movement gets an _id derived from its product and position in the embedded
+array and is upserted, so re-running after an interruption never writes it twice.
+Entries appended since the movement collection was introduced (in_movements) are
+already recorded there and are skipped.
+"""
+import argparse
+import asyncio
+from pymongo import UpdateOne
+from ..db.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from ..models.inventory_movements import MovementType
+from ..services.movements import RECENT_MOVEMENTS_LIMIT, build_movement
+
+# Embedded history array -> type of the movements it holds
+HISTORY_FIELDS = {"stock_updates": MovementType.STOCK_IN, "sales_history": MovementType.SALE}
+
+def movements_from_product(product: dict) -> list:
+    """Build movement documents, with deterministic _ids, from a product's embedded history."""
+    movements = []
+    for field, movement_type in HISTORY_FIELDS.items():
+        for index, entry in enumerate(product.get(field, [])):
+            if entry.get("in_movements"):
+                continue
+            movement = build_movement(
+                product, movement_type, entry.get("quantity", 0), entry.get("date"),
+                notes=entry.get("notes"), sale_price=entry.get("sale_price")
+            )
+            movement["_id"] = f"{product['_id']}:{movement_type.value}:{index}"
+            movements.append(movement)
+    return movements
+
+async def backfill_movements(db, batch_size: int = 500) -> int:
+    """Migrate every pending product in batches. Returns the number of movements written."""
+    written = 0
+    query = {"movements_backfilled": {"$ne": True}}
+    projection = {
+        "category_id": 1, "dealer_id": 1, "dealer_price": 1, "stock_updates": 1, "sales_history": 1
+    }
+    while True:
+        products = await db.products.find(query, projection).limit(batch_size).to_list(batch_size)
+        if not products:
+            break
+        movements = []
+        trims = []
+        for product in products:
+            movements.extend(movements_from_product(product))
+            # Keep only the most recent entries on the product document
+            trims.append(UpdateOne(
+                {"_id": product["_id"]},
+                {
+                    "$set": {"movements_backfilled": True},
+                    "$push": {
+                        "stock_updates": {"$each": [], "$slice": -RECENT_MOVEMENTS_LIMIT},
+                        "sales_history": {"$each": [], "$slice": -RECENT_MOVEMENTS_LIMIT}
+                    }
+                }
+            ))
+        if movements:
+            result = await db.inventory_movements.bulk_write([
+                UpdateOne(
+                    {"_id": movement["_id"]},
+                    {"$setOnInsert": {k: v for k, v in movement.items() if k != "_id"}},
+                    upsert=True
+                )
+                for movement in movements
+            ], ordered=False)
+            written += result.upserted_count
+        await db.products.bulk_write(trims, ordered=False)
+        print(f"Backfilled {len(products)} products ({written} movements so far)")
+    return written
+
+async def main(batch_size: int):
+    await connect_to_mongo()
+    try:
+        db = await get_database()
+        written = await backfill_movements(db, batch_size)
+        print(f"Done. {written} movements written.")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
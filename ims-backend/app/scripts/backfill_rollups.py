@@ -0,0 +1,38 @@
+"""
+Rebuild the daily and monthly sales/stock rollups from inventory_movements.
+
+Usage:
+    python -m app.scripts.backfill_rollups
+
+Run after app.scripts.backfill_movements, and again whenever the rollups need
+to be repaired. The whole rebuild runs inside MongoDB ($group + $merge).
+Sales recorded without a unit cost first get their product's current dealer
+price, and cached sales reports are invalidated afterwards.
+"""
+import argparse
+import asyncio
+from ..db.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from ..db.redis import connect_to_redis, close_redis_connection, get_redis
+from ..services.cache import ROLLUPS_TAG, invalidate_tags
+from ..services.movements import backfill_unit_costs
+from ..services.rollups import rebuild_rollups
+
+async def main():
+    await connect_to_mongo()
+    await connect_to_redis()
+    try:
+        db = await get_database()
+        await backfill_unit_costs(db)
+        await rebuild_rollups(db)
+        await invalidate_tags(await get_redis(), ROLLUPS_TAG)
+        daily = await db.daily_rollups.estimated_document_count()
+        monthly = await db.monthly_rollups.estimated_document_count()
+        print(f"Done. {daily} daily and {monthly} monthly rollups.")
+    finally:
+        await close_redis_connection()
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+    asyncio.run(main())
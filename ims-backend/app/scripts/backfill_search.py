@@ -0,0 +1,48 @@
+"""
+Populate the product search fields (search_words / search_prefixes / search_codes).
+
+Usage:
+    python -m app.scripts.backfill_search [--batch-size 1000] [--all]
+
+By default only products without search fields are processed; pass --all to
+rebuild every product, e.g. after changing the tokenizer.
+"""
+import argparse
+import asyncio
+from pymongo import UpdateOne
+from ..db.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from ..services.search import product_search_fields
+
+async def backfill_search(db, batch_size: int = 1000, rebuild: bool = False) -> int:
+    """Compute search fields in batches. Returns the number of products updated."""
+    query = {} if rebuild else {"search_codes": {"$exists": False}}
+    projection = {"name": 1, "model_number": 1, "product_code": 1, "slug": 1}
+    updated = 0
+    batch = []
+    async for product in db.products.find(query, projection).sort("_id", 1).batch_size(batch_size):
+        batch.append(UpdateOne({"_id": product["_id"]}, {"$set": product_search_fields(product)}))
+        if len(batch) >= batch_size:
+            await db.products.bulk_write(batch, ordered=False)
+            updated += len(batch)
+            batch = []
+            print(f"Indexed {updated} products")
+    if batch:
+        await db.products.bulk_write(batch, ordered=False)
+        updated += len(batch)
+    return updated
+
+async def main(batch_size: int, rebuild: bool):
+    await connect_to_mongo()
+    try:
+        db = await get_database()
+        updated = await backfill_search(db, batch_size, rebuild)
+        print(f"Done. {updated} products updated.")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--all", action="store_true", help="Rebuild search fields for every product")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.all))
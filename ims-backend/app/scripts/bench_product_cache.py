@@ -0,0 +1,90 @@
+"""
+Measure the CPU cost of serving a cached product detail response.
+
+Usage:
+    python -m app.scripts.bench_product_cache [--iterations 20000]
+
+Compares the previous cache hit path (json envelope decoded, payload validated
+through ProductResponse, then re-encoded by the response class) with the current
+one (header parsed, stored JSON body sent as-is). Redis and network time are
+excluded; only the per-request CPU work in the worker is timed.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from ..schemas.products import ProductResponse
+from ..services.cache import _dumps, _split
+from ..services.movements import RECENT_MOVEMENTS_LIMIT
+
+def sample_product() -> dict:
+    now = datetime.utcnow()
+    image_id = str(ObjectId())
+    return {
+        "_id": str(ObjectId()),
+        "product_code": "PRD042",
+        "name": "Samsung 55 inch Crystal UHD Smart TV",
+        "slug": "samsung-55-inch-crystal-uhd-smart-tv",
+        "model_number": "UA55CU8000",
+        "category_id": str(ObjectId()),
+        "dealer_id": str(ObjectId()),
+        "dealer_price": 84999.0,
+        "description": "4K UHD smart television with HDR10+ and built-in voice assistants.",
+        "image_id": image_id,
+        "stock": 37,
+        "total_stock_received": 120,
+        "total_sales": 83,
+        "status": "in_stock",
+        "stock_updates": [
+            {"quantity": 20, "notes": "Restock from dealer", "date": now - timedelta(days=i)}
+            for i in range(RECENT_MOVEMENTS_LIMIT)
+        ],
+        "sales_history": [
+            {"quantity": 1, "sale_price": 99999.0, "notes": None, "date": now - timedelta(hours=i)}
+            for i in range(RECENT_MOVEMENTS_LIMIT)
+        ],
+        "images": [{"image_id": image_id, "image_url": "https://res.cloudinary.com/demo/image/upload/tv.jpg"}],
+        "created_at": now - timedelta(days=90),
+        "category_name": "Televisions",
+        "dealer_name": "Everest Electronics Pvt. Ltd."
+    }
+
+def previous_hit(stored: str) -> bytes:
+    envelope = json.loads(stored)
+    payload = ProductResponse.model_validate(envelope["value"]).model_dump(mode="json", by_alias=True)
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def current_hit(stored: str) -> bytes:
+    header, body = _split(stored)
+    return body.encode("utf-8")
+
+def cpu_per_call(func, stored: str, iterations: int) -> float:
+    """CPU microseconds per call."""
+    start = time.process_time()
+    for _ in range(iterations):
+        func(stored)
+    return (time.process_time() - start) / iterations * 1_000_000
+
+def main(iterations: int):
+    product = sample_product()
+    tags = {f"product:{product['_id']}": 3, f"dealer:{product['dealer_id']}": 1}
+    previous_stored = json.dumps({"tags": tags, "value": product}, default=str)
+    encoded = ProductResponse.model_validate(product).model_dump(mode="json", by_alias=True)
+    current_stored = (_dumps({"tags": tags, "fresh_until": time.time() + 3600}) + b"\n" + _dumps(encoded)).decode()
+
+    # Both paths must produce the same document
+    assert json.loads(previous_hit(previous_stored)) == json.loads(current_hit(current_stored))
+
+    previous = cpu_per_call(previous_hit, previous_stored, iterations)
+    current = cpu_per_call(current_hit, current_stored, iterations)
+    print(f"Payload size:          {len(current_stored)} bytes")
+    print(f"Previous hit path:     {previous:8.2f} us CPU/request")
+    print(f"Current hit path:      {current:8.2f} us CPU/request")
+    print(f"Saved per request:     {previous - current:8.2f} us ({previous / current:.1f}x faster)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.iterations)
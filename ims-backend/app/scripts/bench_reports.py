@@ -0,0 +1,162 @@
+"""
+Compare the report aggregation pipelines with the previous Python-side reports.
+
+Usage:
+    python -m app.scripts.bench_reports [--products 100000] [--runs 5] [--database ims_report_bench] [--keep]
+
+Seeds a scratch database on MONGODB_URL with products, categories, stock-in
+movements and ledger entries, runs every report both ways and prints the median
+wall time of each. The scratch database is dropped afterwards unless --keep is
+given (a kept database is reused by the next run).
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from bson import ObjectId
+from ..db.mongodb import connect_to_mongo, close_mongo_connection, get_client
+from ..routes.reports import (
+    category_totals, monthly_stock_totals, dues_totals, category_stock_values, total_stock_value
+)
+from ..services.ledger import sweep_overdue
+
+BATCH_SIZE = 10000
+
+async def seed(db, products: int):
+    if await db.products.estimated_document_count() >= products:
+        print(f"Reusing {products} seeded products")
+        return
+    await db.products.drop()
+    await db.categories.drop()
+    await db.inventory_movements.drop()
+    await db.party_ledger.drop()
+    rng = random.Random(42)
+    now = datetime.now()
+    categories = [{"_id": ObjectId(), "name": f"Category {i}"} for i in range(max(products // 400, 1))]
+    await db.categories.insert_many(categories)
+    dealer_ids = [str(ObjectId()) for _ in range(200)]
+    for start in range(0, products, BATCH_SIZE):
+        batch = []
+        movements = []
+        for i in range(start, min(start + BATCH_SIZE, products)):
+            stock = rng.randint(0, 50)
+            product = {
+                "_id": ObjectId(),
+                "name": f"Product {i}",
+                "product_code": f"PRD{i + 1:03d}",
+                "category_id": str(rng.choice(categories)["_id"]),
+                "dealer_id": rng.choice(dealer_ids),
+                "dealer_price": round(rng.uniform(100, 100000), 2),
+                "stock": stock,
+                "stock_updates": [{"quantity": stock, "date": now, "notes": None}],
+                "sales_history": [],
+            }
+            batch.append(product)
+            movements.append({
+                "product_id": str(product["_id"]),
+                "type": "stock_in",
+                "quantity": stock,
+                "date": now - timedelta(days=rng.randint(0, 730)),
+            })
+        await db.products.insert_many(batch, ordered=False)
+        await db.inventory_movements.insert_many(movements, ordered=False)
+    ledger = [
+        {
+            "dealer_id": rng.choice(dealer_ids),
+            "amount": round(rng.uniform(1000, 500000), 2),
+            "due_date": now + timedelta(days=rng.randint(-180, 180)),
+            "status": rng.choice(["pending", "paid", "overdue"]),
+        }
+        for _ in range(max(products // 5, 1))
+    ]
+    await db.party_ledger.insert_many(ledger, ordered=False)
+    print(f"Seeded {products} products, {len(categories)} categories, {len(ledger)} ledger entries")
+
+# Previous implementations, kept verbatim in behaviour for comparison
+
+async def previous_category_totals(db) -> list:
+    category_data = defaultdict(lambda: {"stock": 0, "value": 0.0})
+    async for product in db.products.find({}):
+        cat_id = product.get("category_id")
+        stock = product.get("stock", 0)
+        price = product.get("dealer_price", 0)
+        category_data[cat_id]["stock"] += stock
+        category_data[cat_id]["value"] += stock * price
+    categories = {str(cat["_id"]): cat["name"] for cat in await db.categories.find({}).to_list(length=100)}
+    return [
+        {"category_id": cat_id, "category_name": categories.get(cat_id, "Unknown"), **data}
+        for cat_id, data in category_data.items()
+    ]
+
+async def previous_monthly_stock_totals(db) -> list:
+    monthly = defaultdict(int)
+    async for movement in db.inventory_movements.find({"type": "stock_in"}, {"date": 1, "quantity": 1}):
+        if movement.get("date"):
+            monthly[movement["date"].strftime("%Y-%m")] += movement.get("quantity", 0)
+    return [{"month": month, "stock_added": qty} for month, qty in sorted(monthly.items())]
+
+async def previous_dues_totals(db, now: datetime) -> dict:
+    summary = {"pending": 0.0, "paid": 0.0, "overdue": 0.0}
+    async for entry in db.party_ledger.find({}):
+        status = entry.get("status", "pending")
+        amount = entry.get("amount", 0)
+        due_date = entry.get("due_date")
+        if status == "paid":
+            summary["paid"] += amount
+        elif status == "overdue" or (status != "paid" and due_date and due_date < now):
+            summary["overdue"] += amount
+        else:
+            summary["pending"] += amount
+    return summary
+
+async def previous_total_stock_value(db) -> float:
+    total_value = 0.0
+    async for product in db.products.find({}):
+        total_value += product.get("stock", 0) * product.get("dealer_price", 0)
+    return total_value
+
+async def median_seconds(report, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await report()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+async def main(products: int, runs: int, database: str, keep: bool):
+    await connect_to_mongo()
+    client = await get_client()
+    db = client[database]
+    try:
+        await seed(db, products)
+        now = datetime.now()
+        # dues_totals reads the stored status, as the overdue sweeper leaves it
+        await sweep_overdue(db, now)
+        reports = [
+            ("category-wise", lambda: previous_category_totals(db), lambda: category_totals(db)),
+            ("monthly-stock", lambda: previous_monthly_stock_totals(db), lambda: monthly_stock_totals(db)),
+            ("dues-summary", lambda: previous_dues_totals(db, now), lambda: dues_totals(db)),
+            ("stock-value (by category)", lambda: previous_category_totals(db), lambda: category_stock_values(db)),
+            ("stock-value", lambda: previous_total_stock_value(db), lambda: total_stock_value(db)),
+        ]
+        print(f"{'report':<28}{'previous':>12}{'pipeline':>12}{'speedup':>10}")
+        for name, previous, current in reports:
+            before = await median_seconds(previous, runs)
+            after = await median_seconds(current, runs)
+            print(f"{name:<28}{before * 1000:>10.0f}ms{after * 1000:>10.0f}ms{before / after:>9.1f}x")
+    finally:
+        if not keep:
+            await client.drop_database(database)
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database", default="ims_report_bench")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database for later runs")
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.runs, args.database, args.keep))
@@ -0,0 +1,122 @@
+"""
+Measure product search latency against the previous regex search.
+
+Usage:
+    python -m app.scripts.bench_search [--products 100000] [--runs 20] [--database ims_search_bench] [--keep]
+
+Seeds a scratch database on MONGODB_URL with products named from a small
+vocabulary of brands and product types (so common prefixes match thousands of
+products), creates the registry indexes and runs a set of queries both ways: the
+previous unanchored case-insensitive $regex over four fields, and the current
+indexed prefix search with ranking and enrichment, as GET /api/products/?search
+runs it. Prints the median and 95th percentile of each against the
+SEARCH_TARGET_MS budget. The scratch database is dropped afterwards unless
+--keep is given (a kept database is reused by the next run).
+"""
+import argparse
+import asyncio
+import random
+import re
+import statistics
+import time
+from bson import ObjectId
+from ..db.indexes import ensure_indexes
+from ..db.mongodb import connect_to_mongo, close_mongo_connection, get_client
+from ..routes.products import product_enrichment_stages
+from ..services.search import product_search_fields, search_query_tokens, search_filter, search_page_stages
+
+BATCH_SIZE = 10000
+PAGE_SIZE = 10
+
+# Latency budget for one search request
+SEARCH_TARGET_MS = 20
+
+BRANDS = ["Samsung", "LG", "Sony", "Whirlpool", "Panasonic", "Philips", "Haier", "Bosch", "Godrej", "Voltas"]
+TYPES = ["Smart TV", "Refrigerator", "Washing Machine", "Air Conditioner", "Microwave", "Soundbar", "Dishwasher"]
+
+QUERIES = ["s", "sam", "samsung tv", "smart", "washing mach", "lg ref", "prd1", "PRD042", "nothing matches"]
+
+async def seed(db, products: int):
+    if await db.products.estimated_document_count() >= products:
+        print(f"Reusing {products} seeded products")
+        return
+    await db.products.drop()
+    rng = random.Random(42)
+    for start in range(0, products, BATCH_SIZE):
+        batch = []
+        for i in range(start, min(start + BATCH_SIZE, products)):
+            brand, kind = rng.choice(BRANDS), rng.choice(TYPES)
+            product = {
+                "_id": ObjectId(),
+                "name": f"{brand} {kind} {rng.randint(20, 90)}",
+                "model_number": f"{brand[:2].upper()}-{kind[:3].upper()}-{i}",
+                "product_code": f"PRD{i + 1:03d}",
+                "slug": f"{brand}-{kind}-{i}".lower().replace(" ", "-"),
+                "category_id": str(ObjectId()),
+                "dealer_id": str(ObjectId()),
+                "stock": rng.randint(0, 50),
+                "stock_updates": [],
+                "sales_history": [],
+            }
+            product.update(product_search_fields(product))
+            batch.append(product)
+        await db.products.insert_many(batch, ordered=False)
+    print(f"Seeded {products} products")
+
+async def previous_search(db, search: str) -> list:
+    query = {"$or": [
+        {field: {"$regex": re.escape(search), "$options": "i"}}
+        for field in ("name", "model_number", "product_code", "slug")
+    ]}
+    return await db.products.find(query).limit(PAGE_SIZE).to_list(PAGE_SIZE)
+
+async def current_search(db, search: str) -> list:
+    tokens = search_query_tokens(search)
+    pipeline = [
+        {"$match": search_filter(tokens)},
+        *search_page_stages(search, tokens, 0, PAGE_SIZE),
+        *product_enrichment_stages(),
+    ]
+    return await db.products.aggregate(pipeline).to_list(PAGE_SIZE)
+
+async def timings_ms(search, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await search()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def p95(timings: list) -> float:
+    return statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+
+async def main(products: int, runs: int, database: str, keep: bool):
+    await connect_to_mongo()
+    client = await get_client()
+    db = client[database]
+    try:
+        await seed(db, products)
+        await ensure_indexes(db)
+        print(f"{'query':<18}{'matches':>9}{'previous p50':>14}{'current p50':>13}{'current p95':>13}  target {SEARCH_TARGET_MS}ms")
+        for search in QUERIES:
+            matches = await db.products.count_documents(search_filter(search_query_tokens(search)))
+            before = await timings_ms(lambda: previous_search(db, search), runs)
+            after = await timings_ms(lambda: current_search(db, search), runs)
+            verdict = "ok" if p95(after) <= SEARCH_TARGET_MS else "OVER"
+            print(
+                f"{search:<18}{matches:>9}{statistics.median(before):>12.1f}ms"
+                f"{statistics.median(after):>11.1f}ms{p95(after):>11.1f}ms  {verdict}"
+            )
+    finally:
+        if not keep:
+            await client.drop_database(database)
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--database", default="ims_search_bench")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database for later runs")
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.runs, args.database, args.keep))
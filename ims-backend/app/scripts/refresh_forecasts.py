@@ -0,0 +1,37 @@
+"""
+Recompute the demand forecasts and reorder suggestions for every product.
+
+Usage:
+    python -m app.scripts.refresh_forecasts [--window-days 90] [--lead-time-days 7] [--cover-days 30]
+
+The API refreshes forecasts every FORECAST_REFRESH_INTERVAL seconds on its own;
+run this to refresh immediately or to try other parameters (the next scheduled
+refresh goes back to the configured ones).
+"""
+import argparse
+import asyncio
+import time
+from ..db.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from ..services.forecasts import refresh_forecasts
+
+async def main(window_days, lead_time_days, cover_days):
+    await connect_to_mongo()
+    try:
+        db = await get_database()
+        started = time.perf_counter()
+        summary = await refresh_forecasts(db, window_days, lead_time_days, cover_days)
+        elapsed = time.perf_counter() - started
+        print(
+            f"Done in {elapsed:.2f}s. {summary['products']} products, "
+            f"{summary['needs_reorder']} need reordering (sales {summary['window']})."
+        )
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--window-days", type=int)
+    parser.add_argument("--lead-time-days", type=float)
+    parser.add_argument("--cover-days", type=float)
+    args = parser.parse_args()
+    asyncio.run(main(args.window_days, args.lead_time_days, args.cover_days))
@@ -0,0 +1,39 @@
+"""
+Run background job workers (report jobs) outside the API process.
+
+Usage:
+    python -m app.scripts.run_job_worker [--workers N]
+
+Use with JOB_QUEUE_BACKEND=redis and, if the API processes should not run jobs
+themselves, JOB_WORKERS=0 for them. Stop with Ctrl+C; a job interrupted
+mid-run is put back on the queue.
+"""
+import argparse
+import asyncio
+from ..core.config import settings
+from ..db.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from ..db.redis import connect_to_redis, close_redis_connection
+from ..services.jobs import get_job_queue, run_job_workers
+from ..routes import reports, forecasts  # noqa: F401  (register their job handlers)
+
+async def main(workers: int):
+    if settings.JOB_QUEUE_BACKEND == "local":
+        raise SystemExit("JOB_QUEUE_BACKEND=local jobs only run inside the API process")
+    await connect_to_mongo()
+    await connect_to_redis()
+    try:
+        db = await get_database()
+        print(f"Running {workers} job worker(s)...")
+        await run_job_workers(db, await get_job_queue(), workers)
+    finally:
+        await close_redis_connection()
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=max(settings.JOB_WORKERS, 1), help="Concurrent jobs")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.workers))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,394 @@
+"""
+Shared Redis cache with namespaced keys and tag-based invalidation.
+
+Every cached value is stored together with the generation of each tag it depends
+on (e.g. the product itself, its dealer, its category and its image). Invalidating
+a tag advances a global invalidation clock and stamps the tag with it; any cached
+value recorded with an older generation is treated as stale on its next read.
+Renaming a dealer therefore invalidates every cached product referencing it in
+O(1), without knowing their keys.
+
+Loads take a snapshot of the clock before reading the database (cache_snapshot).
+A value whose tags were invalidated after its snapshot may have been read before
+the write that invalidated them, so it is not stored.
+
+Reads that pass local=True are served from a per-worker LocalCache first. Every
+invalidation is applied to the local tier immediately and published on
+INVALIDATION_CHANNEL, so the other workers drop their copies too.
+"""
+import asyncio
+import logging
+import time
+import uuid
+import orjson
+from typing import Awaitable, Callable, Iterable, Optional
+from ..core.config import settings
+from .local_cache import LocalCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ims"
+INVALIDATION_CHANNEL = f"{KEY_PREFIX}:cache:invalidate"
+
+# Seconds one worker may hold the lock to fill a key before others load it too
+FILL_LOCK_TIMEOUT = 5
+FILL_POLL_INTERVAL = 0.05
+
+# Identifies this worker's own messages on the invalidation channel
+WORKER_ID = uuid.uuid4().hex
+
+local_cache = LocalCache(settings.LOCAL_CACHE_MAXSIZE, settings.LOCAL_CACHE_TTL)
+
+def cache_key(*parts) -> str:
+    """Namespaced cache key, e.g. cache_key("product", slug) -> "ims:product:<slug>"."""
+    return ":".join([KEY_PREFIX, *(str(part) for part in parts)])
+
+def _tag_key(tag: str) -> str:
+    return cache_key("gen", tag)
+
+CLOCK_KEY = cache_key("clock")
+
+# Advances the clock once and stamps every tag in KEYS[2:] with its new value
+_INVALIDATE_SCRIPT = """
+local clock = redis.call('INCR', KEYS[1])
+for i = 2, #KEYS do
+    redis.call('SET', KEYS[i], clock)
+end
+return clock
+"""
+
+def product_tag(product_id) -> str:
+    return f"product:{product_id}"
+
+def dealer_tag(dealer_id) -> str:
+    return f"dealer:{dealer_id}"
+
+def category_tag(category_id) -> str:
+    return f"category:{category_id}"
+
+def media_tag(media_id) -> str:
+    return f"media:{media_id}"
+
+# Tag of cached results computed from the rollup collections
+ROLLUPS_TAG = "rollups"
+
+def product_tags(product: dict) -> list:
+    """Tags a cached product depends on: itself and every document it is enriched from."""
+    tags = [product_tag(product["_id"])]
+    if product.get("category_id"):
+        tags.append(category_tag(product["category_id"]))
+    if product.get("dealer_id"):
+        tags.append(dealer_tag(product["dealer_id"]))
+    if product.get("image_id"):
+        tags.append(media_tag(product["image_id"]))
+    return tags
+
+async def _tag_versions(redis_client, tags: list) -> list:
+    if not tags:
+        return []
+    versions = await redis_client.mget([_tag_key(tag) for tag in tags])
+    return [int(version or 0) for version in versions]
+
+async def cache_snapshot(redis_client) -> tuple:
+    """
+    Take before loading a value from the database, and pass to the store: the
+    local tier epoch and the invalidation clock (None when Redis is unreachable,
+    in which case the value is not stored).
+    """
+    epoch = local_cache.epoch
+    try:
+        clock = int(await redis_client.get(CLOCK_KEY) or 0)
+    except Exception as e:
+        logger.warning("Cache clock read failed: %s", e)
+        clock = None
+    return epoch, clock
+
+def _dumps(value) -> bytes:
+    return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+def _split(stored: str):
+    """Split a stored entry into its parsed header and its still-serialized value."""
+    header, separator, body = stored.partition("\n")
+    if not separator:
+        raise ValueError("unrecognized cache entry")
+    return orjson.loads(header), body
+
+async def _read(redis_client, key: str, local: bool = False, raw: bool = False):
+    """
+    Return (value, fresh) for key, or (MISSING, False) when nothing is stored.
+    A value is stale once its fresh_until has passed or any of its tags changed;
+    stale values stay readable for CACHE_STALE_TTL seconds. Fresh values are
+    copied to the local tier when local is set. With raw=True the value is
+    returned as serialized JSON, exactly as stored, without being parsed.
+    """
+    epoch = local_cache.epoch
+    stored = await redis_client.get(key)
+    if not stored:
+        return MISSING, False
+    header, body = _split(stored)
+    if "generations" not in header:
+        # Written before tags were stamped from the invalidation clock
+        return MISSING, False
+    tags = header["generations"]
+    fresh = header.get("fresh_until", float("inf")) > time.time()
+    if fresh and await _tag_versions(redis_client, list(tags)) != list(tags.values()):
+        fresh = False
+    value = body if raw else orjson.loads(body)
+    if fresh and local:
+        local_cache.set(key, value, tags, since=epoch)
+    return value, fresh
+
+async def cache_get(redis_client, key: str, local: bool = False):
+    """
+    Return the cached value for key, or None on a miss or when any of its tags changed.
+    With local=True the in-process tier is checked first and filled from Redis hits.
+    """
+    if local:
+        value = local_cache.get(key)
+        if value is not MISSING:
+            return value
+    try:
+        value, fresh = await _read(redis_client, key, local)
+        return value if fresh else None
+    except Exception as e:
+        logger.warning("Cache read failed for %s: %s", key, e)
+        return None
+
+async def _store(
+    redis_client, key: str, body: bytes, tags: Iterable[str], ttl: Optional[int], local: bool, raw: bool, since: tuple
+):
+    """
+    Store serialized body under key. An entry is a one-line JSON header (tag
+    generations and fresh_until) followed by the value, so readers can check
+    freshness without parsing the value. The value is fresh for ttl seconds and
+    kept CACHE_STALE_TTL seconds longer as a stale fallback for cache_get_or_load.
+    Nothing is stored when a tag was invalidated after the since snapshot.
+    """
+    epoch, clock = since
+    if clock is None:
+        return
+    tags = list(dict.fromkeys(tags))
+    ttl = ttl or settings.REDIS_TTL
+    versions = await _tag_versions(redis_client, tags)
+    if any(version > clock for version in versions):
+        return
+    header = _dumps({"generations": dict(zip(tags, versions)), "fresh_until": time.time() + ttl})
+    await redis_client.set(key, header + b"\n" + body, ex=ttl + settings.CACHE_STALE_TTL)
+    if local:
+        # Store the decoded payload so local hits look exactly like Redis hits
+        local_cache.set(key, body.decode() if raw else orjson.loads(body), tags, since=epoch)
+
+async def cache_set(
+    redis_client,
+    key: str,
+    value,
+    tags: Iterable[str] = (),
+    ttl: Optional[int] = None,
+    local: bool = False,
+    since: Optional[tuple] = None
+):
+    """
+    Cache value under key, recording the current generation of each tag. Pass
+    the cache_snapshot taken before value was read from the database as since;
+    without it a concurrent invalidation can leave a stale value cached as fresh.
+    """
+    try:
+        if since is None:
+            since = await cache_snapshot(redis_client)
+        await _store(redis_client, key, _dumps(value), tags, ttl, local, raw=False, since=since)
+    except Exception as e:
+        logger.warning("Cache write failed for %s: %s", key, e)
+
+# Loads in progress in this worker, by cache key
+_inflight = {}
+
+def _log_background_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        logger.warning("Background cache refresh failed: %s", task.exception())
+
+def _single_flight(key: str, load) -> asyncio.Future:
+    """Start load() for key unless a load for key is already running, and return it."""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(load())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return task
+
+async def _fill(redis_client, key: str, loader, tags, ttl, local: bool, encode, raw: bool, wait: bool):
+    """
+    Run loader() and cache its result while holding the fill lock for key.
+    When another worker holds the lock, either wait for its result to land in
+    Redis (wait=True) or leave the refresh to it (wait=False, returns None).
+    """
+    lock_key = cache_key("lock", key)
+    lock = redis_client.lock(lock_key, timeout=FILL_LOCK_TIMEOUT, blocking=False)
+    try:
+        acquired = await lock.acquire()
+    except Exception as e:
+        logger.warning("Cache fill lock failed for %s: %s", key, e)
+        acquired = None
+    if acquired is False:
+        if not wait:
+            return None
+        deadline = time.monotonic() + FILL_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(FILL_POLL_INTERVAL)
+            try:
+                value, fresh = await _read(redis_client, key, local, raw)
+                if fresh:
+                    return value
+                if not await redis_client.exists(lock_key):
+                    break
+            except Exception as e:
+                logger.warning("Cache read failed for %s: %s", key, e)
+                break
+        # The other worker gave up, found nothing or is too slow: load it ourselves
+    try:
+        since = await cache_snapshot(redis_client)
+        value = await loader()
+        if value is None:
+            return None
+        payload = encode(value) if encode else value
+        body = _dumps(payload)
+        try:
+            await _store(redis_client, key, body, tags(value) if tags else (), ttl, local, raw, since)
+        except Exception as e:
+            logger.warning("Cache write failed for %s: %s", key, e)
+        return body.decode() if raw else payload
+    finally:
+        if acquired:
+            try:
+                await lock.release()
+            except Exception:
+                pass
+
+async def cache_get_or_load(
+    redis_client,
+    key: str,
+    loader: Callable[[], Awaitable],
+    tags: Optional[Callable] = None,
+    ttl: Optional[int] = None,
+    local: bool = False,
+    encode: Optional[Callable] = None,
+    raw: bool = False
+):
+    """
+    Return the cached value for key, calling loader() to produce it on a miss.
+
+    Stampede protection:
+    - concurrent misses within a worker share one loader() call;
+    - across workers a short Redis lock lets one worker load while the others
+      wait for its result;
+    - a stale value (expired, or one of its tags invalidated) is returned at once
+      while a single background refresh replaces it.
+
+    tags(value) returns the tags of a freshly loaded value and encode(value) the
+    payload to cache for it (defaults to the value itself). A loader result of
+    None (e.g. not found) is returned but not cached. With raw=True the payload
+    is returned as serialized JSON, ready to be sent as a response body.
+    """
+    if local:
+        value = local_cache.get(key)
+        if value is not MISSING:
+            return value
+    try:
+        value, fresh = await _read(redis_client, key, local, raw)
+    except Exception as e:
+        logger.warning("Cache read failed for %s: %s", key, e)
+        value, fresh = MISSING, False
+    if fresh:
+        return value
+    if value is not MISSING:
+        if key not in _inflight:
+            refresh = _single_flight(
+                key, lambda: _fill(redis_client, key, loader, tags, ttl, local, encode, raw, wait=False)
+            )
+            refresh.add_done_callback(_log_background_failure)
+        return value
+    # shield: a cancelled request must not cancel the load other requests wait on
+    return await asyncio.shield(_single_flight(
+        key, lambda: _fill(redis_client, key, loader, tags, ttl, local, encode, raw, wait=True)
+    ))
+
+def _invalidation_message(tags: list, keys: list) -> bytes:
+    return orjson.dumps({"origin": WORKER_ID, "tags": tags, "keys": keys})
+
+async def invalidate(redis_client, tags: Iterable[str] = (), keys: Iterable[str] = ()):
+    """
+    Bump the generation of each tag, invalidating every value that depends on it,
+    and drop the given keys. Everything, including the message telling other
+    workers to drop their local copies, is sent as one pipelined round trip;
+    keys are removed with UNLINK so large values are freed off Redis' main thread.
+    Tag generations never expire: an expired one would make an old value look
+    current again. Redis failures are logged, not raised: the write that called
+    for the invalidation has already succeeded, and the local tier is cleared
+    regardless.
+    """
+    tags = list(dict.fromkeys(tags))
+    keys = list(dict.fromkeys(keys))
+    if not tags and not keys:
+        return
+    local_cache.invalidate_tags(tags)
+    local_cache.invalidate_keys(keys)
+    pipe = redis_client.pipeline(transaction=False)
+    if tags:
+        pipe.eval(_INVALIDATE_SCRIPT, len(tags) + 1, CLOCK_KEY, *(_tag_key(tag) for tag in tags))
+    if keys:
+        pipe.unlink(*keys)
+    pipe.publish(INVALIDATION_CHANNEL, _invalidation_message(tags, keys))
+    try:
+        await pipe.execute()
+    except Exception as e:
+        logger.error("Cache invalidation failed for tags %s and keys %s: %s", tags, keys, e)
+
+async def invalidate_tags(redis_client, *tags: str):
+    """Invalidate every value that depends on any of tags."""
+    await invalidate(redis_client, tags=tags)
+
+async def invalidate_keys(redis_client, *keys: str):
+    """Drop cache entries by key."""
+    await invalidate(redis_client, keys=keys)
+
+def _apply_invalidation(message: dict):
+    try:
+        payload = orjson.loads(message["data"])
+    except (TypeError, orjson.JSONDecodeError):
+        return
+    if payload.get("origin") == WORKER_ID:
+        return
+    local_cache.invalidate_tags(payload.get("tags", []))
+    local_cache.invalidate_keys(payload.get("keys", []))
+
+async def listen_for_invalidations(redis_client, retry_delay: float = 1.0):
+    """
+    Apply invalidations published by other workers to the local tier until cancelled.
+    Messages sent while disconnected are lost, so the local tier is cleared on every
+    (re)subscribe.
+    """
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            local_cache.clear()
+            while True:
+                # Bounded waits keep an idle subscription clear of the socket
+                # timeout and let health checks run
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message and message.get("type") == "message":
+                    _apply_invalidation(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Cache invalidation listener failed, resubscribing: %s", e)
+            local_cache.clear()
+            await asyncio.sleep(retry_delay)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+def cache_stats() -> dict:
+    """Hit/miss/eviction counters of this worker's local tier."""
+    return {"worker": WORKER_ID, **local_cache.stats()}
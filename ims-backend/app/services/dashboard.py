@@ -0,0 +1,149 @@
+"""
+Materialized dashboard counters.
+
+The totals shown on the dashboard live in a single dashboard_stats document that
+write paths adjust with $inc as they change products and ledger entries, so the
+summary never scans the catalog. A periodic reconciliation recomputes the
+document from scratch to correct drift (e.g. from a write that failed between
+updating a product and adjusting the counters).
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+from ..core.config import settings
+from .periodic import run_periodic
+
+logger = logging.getLogger(__name__)
+
+STATS_ID = "summary"
+
+# Products with less stock than their reorder_threshold are reported as low-stock
+# alerts; this is the threshold of products without their own
+LOW_STOCK_THRESHOLD = 5
+
+# Ledger statuses whose amount counts as outstanding
+OUTSTANDING_STATUSES = ("pending", "overdue")
+
+RECONCILE_LOCK_KEY = "ims:lock:dashboard-reconcile"
+
+def reorder_threshold(product: dict) -> int:
+    """The product's own reorder threshold, or the default for products without one."""
+    threshold = product.get("reorder_threshold")
+    return LOW_STOCK_THRESHOLD if threshold is None else threshold
+
+def product_delta(product: dict, sign: int = 1) -> dict:
+    """Counter changes for adding (sign=1) or removing (sign=-1) a product."""
+    stock = product.get("stock", 0)
+    return {
+        "total_products": sign,
+        "total_stock_quantity": sign * stock,
+        "total_stock_value": sign * stock * product.get("dealer_price", 0),
+        "out_of_stock_count": sign * int(stock == 0),
+        "low_stock_count": sign * int(stock < reorder_threshold(product)),
+    }
+
+def stock_change_delta(product: dict, quantity: int) -> dict:
+    """Counter changes for a product whose stock changed by quantity; product is the updated document."""
+    after = product.get("stock", 0)
+    before = after - quantity
+    return {
+        "total_stock_quantity": quantity,
+        "total_stock_value": quantity * product.get("dealer_price", 0),
+        "out_of_stock_count": int(after == 0) - int(before == 0),
+        "low_stock_count": int(after < reorder_threshold(product)) - int(before < reorder_threshold(product)),
+    }
+
+def threshold_change_delta(product: dict, previous_threshold: Optional[int]) -> dict:
+    """Counter changes for a reorder_threshold change; product is the updated document."""
+    stock = product.get("stock", 0)
+    previous = LOW_STOCK_THRESHOLD if previous_threshold is None else previous_threshold
+    return {"low_stock_count": int(stock < reorder_threshold(product)) - int(stock < previous)}
+
+def price_change_delta(product: dict, previous_price: float) -> dict:
+    """Counter changes for a dealer_price change; product is the updated document."""
+    return {
+        "total_stock_value": product.get("stock", 0) * (product.get("dealer_price", 0) - previous_price)
+    }
+
+def _outstanding(entry: Optional[dict]) -> float:
+    # Entries without a status are pending, here and in reconcile_dashboard_stats
+    if entry and (entry.get("status") or "pending") in OUTSTANDING_STATUSES:
+        return entry.get("amount", 0)
+    return 0
+
+def ledger_delta(before: Optional[dict] = None, after: Optional[dict] = None) -> dict:
+    """Counter changes for creating (before=None), updating or deleting (after=None) a ledger entry."""
+    return {"total_outstanding_dues": _outstanding(after) - _outstanding(before)}
+
+def merge_deltas(*deltas: dict) -> dict:
+    merged = defaultdict(int)
+    for delta in deltas:
+        for field, value in delta.items():
+            merged[field] += value
+    return dict(merged)
+
+async def apply_dashboard_delta(db, *deltas: dict):
+    """
+    Apply counter changes to the stats document. Failures are logged, not raised:
+    the write they describe has already happened and reconciliation repairs the drift.
+    The document is never created here, so a partial document cannot pass for a
+    reconciled one.
+    """
+    delta = {field: value for field, value in merge_deltas(*deltas).items() if value}
+    if not delta:
+        return
+    try:
+        await db.dashboard_stats.update_one({"_id": STATS_ID}, {"$inc": delta})
+    except Exception as e:
+        logger.warning("Dashboard stats update failed: %s", e)
+
+async def reconcile_dashboard_stats(db) -> dict:
+    """Recompute the stats document from products and party_ledger."""
+    product_totals = await db.products.aggregate([
+        {"$project": {
+            "stock": {"$ifNull": ["$stock", 0]},
+            "dealer_price": {"$ifNull": ["$dealer_price", 0]},
+            "reorder_threshold": {"$ifNull": ["$reorder_threshold", LOW_STOCK_THRESHOLD]},
+        }},
+        {"$group": {
+            "_id": None,
+            "total_products": {"$sum": 1},
+            "total_stock_quantity": {"$sum": "$stock"},
+            "total_stock_value": {"$sum": {"$multiply": ["$stock", "$dealer_price"]}},
+            "out_of_stock_count": {"$sum": {"$cond": [{"$eq": ["$stock", 0]}, 1, 0]}},
+            "low_stock_count": {"$sum": {"$cond": [{"$lt": ["$stock", "$reorder_threshold"]}, 1, 0]}},
+        }},
+    ]).to_list(1)
+    ledger_totals = await db.party_ledger.aggregate([
+        # None also matches a missing status, which counts as pending
+        {"$match": {"status": {"$in": [*OUTSTANDING_STATUSES, None]}}},
+        {"$group": {"_id": None, "total_outstanding_dues": {"$sum": "$amount"}}},
+    ]).to_list(1)
+    stats = {
+        "total_products": 0,
+        "total_stock_quantity": 0,
+        "total_stock_value": 0.0,
+        "out_of_stock_count": 0,
+        "low_stock_count": 0,
+        "total_outstanding_dues": 0.0,
+    }
+    for totals in product_totals + ledger_totals:
+        totals.pop("_id")
+        stats.update(totals)
+    stats["reconciled_at"] = datetime.now()
+    await db.dashboard_stats.replace_one({"_id": STATS_ID}, stats, upsert=True)
+    return stats
+
+async def get_dashboard_stats(db) -> dict:
+    """The stats document, built on first use."""
+    stats = await db.dashboard_stats.find_one({"_id": STATS_ID})
+    if not stats:
+        stats = await reconcile_dashboard_stats(db)
+    stats.pop("_id", None)
+    return stats
+
+async def run_dashboard_reconciler(db, redis_client, interval: Optional[int] = None):
+    """Reconcile the stats document every interval seconds until cancelled."""
+    interval = interval or settings.DASHBOARD_RECONCILE_INTERVAL
+    await run_periodic(redis_client, RECONCILE_LOCK_KEY, interval, lambda: reconcile_dashboard_stats(db))
@@ -0,0 +1,191 @@
+"""
+Demand forecasts and reorder suggestions.
+
+A refresh reads the last FORECAST_WINDOW_DAYS complete days of daily_rollups for
+the whole catalog into one products x days NumPy matrix and derives, for every
+product at once:
+
+- demand_rate: units sold per day, a recency-weighted mean (half-life
+  DEMAND_HALF_LIFE_DAYS) so a product that has picked up recently is not
+  averaged away;
+- demand_std: the weighted standard deviation of daily sales;
+- days_of_cover: how many days the current stock lasts at that rate;
+- reorder_point: lead-time demand plus safety stock (SERVICE_LEVEL_Z standard
+  deviations of lead-time demand);
+- suggested_reorder_qty: for products at or below their reorder point, enough
+  to cover the lead time plus FORECAST_COVER_DAYS and the safety stock.
+
+Results are stored one document per product in product_forecasts and served
+from there; the refresh runs on a schedule (FORECAST_REFRESH_INTERVAL) or on
+demand as a background job.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+import numpy as np
+from pymongo import ReplaceOne
+from ..core.config import settings
+from .periodic import run_periodic
+from .rollups import day_key
+
+logger = logging.getLogger(__name__)
+
+# Weight of a day's sales halves every DEMAND_HALF_LIFE_DAYS days back
+DEMAND_HALF_LIFE_DAYS = 30
+
+# Safety stock in standard deviations of lead-time demand (~95% service level)
+SERVICE_LEVEL_Z = 1.65
+
+FORECAST_WRITE_BATCH_SIZE = 1000
+
+REFRESH_LOCK_KEY = "ims:lock:forecast-refresh"
+
+PRODUCT_FIELDS = {"name": 1, "product_code": 1, "category_id": 1, "dealer_id": 1, "stock": 1, "dealer_price": 1, "status": 1}
+
+async def load_sales_matrix(db, product_index: dict, start: datetime, days: int) -> np.ndarray:
+    """Units sold per product (rows, in product_index order) and day (columns) from the daily rollups."""
+    rows, columns, units = [], [], []
+    pipeline = [
+        {"$match": {"day": {"$gte": start, "$lt": start + timedelta(days=days)}, "quantity_sold": {"$gt": 0}}},
+        {"$project": {"_id": 0, "product_id": 1, "day": 1, "quantity_sold": 1}},
+    ]
+    async for rollup in db.daily_rollups.aggregate(pipeline):
+        row = product_index.get(rollup["product_id"])
+        if row is not None:
+            rows.append(row)
+            columns.append((rollup["day"] - start).days)
+            units.append(rollup["quantity_sold"])
+    sales = np.zeros((len(product_index), days), dtype=np.float64)
+    np.add.at(sales, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)), np.asarray(units, dtype=np.float64))
+    return sales
+
+def compute_forecasts(
+    sales: np.ndarray,
+    stock: np.ndarray,
+    active: np.ndarray,
+    lead_time_days: float,
+    cover_days: float
+) -> dict:
+    """
+    Vectorized forecast for every product. sales is products x days (oldest day
+    first), stock the current stock per product and active False for products
+    that should never be reordered (e.g. discontinued).
+    """
+    days = sales.shape[1]
+    age = np.arange(days - 1, -1, -1, dtype=np.float64)
+    weights = 0.5 ** (age / DEMAND_HALF_LIFE_DAYS)
+    weights /= weights.sum()
+
+    demand_rate = sales @ weights
+    demand_std = np.sqrt(((sales - demand_rate[:, None]) ** 2) @ weights)
+    safety_stock = SERVICE_LEVEL_Z * demand_std * np.sqrt(lead_time_days)
+    reorder_point = demand_rate * lead_time_days + safety_stock
+    target_stock = demand_rate * (lead_time_days + cover_days) + safety_stock
+
+    selling = demand_rate > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_of_cover = np.where(selling, stock / np.where(selling, demand_rate, 1), np.nan)
+    needs_reorder = active & selling & (stock <= reorder_point)
+    suggested = np.where(needs_reorder, np.ceil(np.maximum(target_stock - stock, 0)), 0)
+
+    return {
+        "demand_rate": demand_rate,
+        "demand_std": demand_std,
+        "units_sold": sales.sum(axis=1),
+        "days_of_cover": days_of_cover,
+        "safety_stock": safety_stock,
+        "reorder_point": reorder_point,
+        "needs_reorder": needs_reorder,
+        "suggested_reorder_qty": suggested.astype(np.int64),
+    }
+
+def _round(values: np.ndarray, digits: int = 3) -> list:
+    """Rounded floats with NaN as None, ready for BSON."""
+    rounded = np.round(values, digits)
+    return [None if value != value else value for value in rounded.tolist()]
+
+async def refresh_forecasts(
+    db,
+    window_days: Optional[int] = None,
+    lead_time_days: Optional[float] = None,
+    cover_days: Optional[float] = None
+) -> dict:
+    """Recompute product_forecasts for the whole catalog. Returns a summary of the run."""
+    window_days = window_days or settings.FORECAST_WINDOW_DAYS
+    lead_time_days = lead_time_days or settings.FORECAST_LEAD_TIME_DAYS
+    cover_days = cover_days or settings.FORECAST_COVER_DAYS
+    computed_at = datetime.now()
+    today = computed_at.replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=window_days)
+
+    products = await db.products.find({}, PRODUCT_FIELDS).to_list(None)
+    product_ids = [str(product["_id"]) for product in products]
+    product_index = {product_id: row for row, product_id in enumerate(product_ids)}
+    stock = np.array([product.get("stock") or 0 for product in products], dtype=np.float64)
+    dealer_price = np.array([product.get("dealer_price") or 0 for product in products], dtype=np.float64)
+    active = np.array([product.get("status") != "discontinued" for product in products], dtype=bool)
+
+    sales = await load_sales_matrix(db, product_index, start, window_days)
+    forecast = await asyncio.to_thread(compute_forecasts, sales, stock, active, lead_time_days, cover_days)
+
+    columns = {
+        "demand_rate": _round(forecast["demand_rate"]),
+        "demand_std": _round(forecast["demand_std"]),
+        "units_sold": forecast["units_sold"].astype(np.int64).tolist(),
+        "days_of_cover": _round(forecast["days_of_cover"], 1),
+        "safety_stock": _round(forecast["safety_stock"], 1),
+        "reorder_point": _round(forecast["reorder_point"], 1),
+        "needs_reorder": forecast["needs_reorder"].tolist(),
+        "suggested_reorder_qty": forecast["suggested_reorder_qty"].tolist(),
+        "reorder_cost": _round(forecast["suggested_reorder_qty"] * dealer_price, 2),
+    }
+    parameters = {
+        "window_start": start,
+        "window_days": window_days,
+        "lead_time_days": lead_time_days,
+        "cover_days": cover_days,
+    }
+    for batch_start in range(0, len(products), FORECAST_WRITE_BATCH_SIZE):
+        operations = []
+        for row in range(batch_start, min(batch_start + FORECAST_WRITE_BATCH_SIZE, len(products))):
+            product = products[row]
+            operations.append(ReplaceOne({"_id": product_ids[row]}, {
+                "product_id": product_ids[row],
+                "name": product.get("name"),
+                "product_code": product.get("product_code"),
+                "category_id": product.get("category_id"),
+                "dealer_id": product.get("dealer_id"),
+                "stock": product.get("stock") or 0,
+                "dealer_price": product.get("dealer_price") or 0,
+                **{field: values[row] for field, values in columns.items()},
+                **parameters,
+                "computed_at": computed_at,
+            }, upsert=True))
+        await db.product_forecasts.bulk_write(operations, ordered=False)
+    # Forecasts of products deleted since the last run. A run that started earlier
+    # may still be writing older forecasts of current products, so only forecasts
+    # of products missing from this run are removed.
+    current = set(product_ids)
+    stale = [
+        forecast["_id"]
+        async for forecast in db.product_forecasts.find({"computed_at": {"$lt": computed_at}}, {"_id": 1})
+        if forecast["_id"] not in current
+    ]
+    for batch_start in range(0, len(stale), FORECAST_WRITE_BATCH_SIZE):
+        await db.product_forecasts.delete_many({
+            "_id": {"$in": stale[batch_start:batch_start + FORECAST_WRITE_BATCH_SIZE]},
+            "computed_at": {"$lt": computed_at},
+        })
+
+    return {
+        "products": len(products),
+        "needs_reorder": int(forecast["needs_reorder"].sum()),
+        "window": f"{day_key(start)}..{day_key(today - timedelta(days=1))}",
+        "computed_at": computed_at,
+    }
+
+async def run_forecast_refresher(db, redis_client, interval: Optional[int] = None):
+    """Refresh the forecasts every interval seconds until cancelled."""
+    interval = interval or settings.FORECAST_REFRESH_INTERVAL
+    await run_periodic(redis_client, REFRESH_LOCK_KEY, interval, lambda: refresh_forecasts(db))
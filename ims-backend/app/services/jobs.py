@@ -0,0 +1,278 @@
+"""
+Background jobs for slow work such as full-catalog reports.
+
+A job is submitted with its kind and parameters, queued, and run by a worker:
+either the in-process workers started with the app (JOB_WORKERS) or a separate
+process (python -m app.scripts.run_job_worker). The job record holds the status
+and, once done, the result; it expires JOB_RESULT_TTL seconds after its last
+change. Submitting the same kind and parameters while an earlier job is queued,
+running or still holds its result returns that job instead of queueing another.
+
+A running job holds a lease (lease_until) that its worker renews every third of
+JOB_LEASE_TTL. A job whose lease ran out belongs to a worker that died; the next
+submission or status read of it puts it back on the queue.
+
+The queue lives in Redis so any worker can pick a job up. JOB_QUEUE_BACKEND=local
+keeps everything in process memory instead, for development and tests; jobs are
+then only visible to, and run by, the process that submitted them.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+import orjson
+from ..core.config import settings
+from ..db.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "ims:jobs:queue"
+JOB_KEY_PREFIX = "ims:job:"
+DEDUP_KEY_PREFIX = "ims:job-dedup:"
+
+# Seconds a worker blocks waiting for a job; below the Redis socket timeout
+DEQUEUE_TIMEOUT = 1
+
+# Lease renewals per JOB_LEASE_TTL, so a late renewal or two does not lose the lease
+LEASE_RENEWALS = 3
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+# kind -> (handler, params model)
+JOB_HANDLERS = {}
+
+def register_job(kind: str, params_model=None):
+    """
+    Register an async handler(db, params) for a job kind. params_model (a pydantic
+    model) validates and normalizes the parameters when the job is submitted.
+    """
+    def decorator(handler):
+        JOB_HANDLERS[kind] = (handler, params_model)
+        return handler
+    return decorator
+
+def _dumps(value) -> str:
+    return orjson.dumps(value, default=str).decode()
+
+class RedisJobQueue:
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    async def save(self, job: dict, ttl: int):
+        await self.redis.set(JOB_KEY_PREFIX + job["id"], _dumps(job), ex=ttl)
+
+    async def load(self, job_id: str) -> Optional[dict]:
+        value = await self.redis.get(JOB_KEY_PREFIX + job_id)
+        return orjson.loads(value) if value else None
+
+    async def claim(self, dedup_key: str, job_id: str, ttl: int) -> Optional[str]:
+        """Bind dedup_key to job_id unless it is taken; return the id it is bound to if taken."""
+        if await self.redis.set(DEDUP_KEY_PREFIX + dedup_key, job_id, nx=True, ex=ttl):
+            return None
+        return await self.redis.get(DEDUP_KEY_PREFIX + dedup_key)
+
+    async def release(self, dedup_key: str, job_id: str):
+        """Unbind dedup_key if it still belongs to job_id."""
+        key = DEDUP_KEY_PREFIX + dedup_key
+        if await self.redis.get(key) == job_id:
+            await self.redis.delete(key)
+
+    async def enqueue(self, job_id: str):
+        await self.redis.lpush(QUEUE_KEY, job_id)
+
+    async def dequeue(self, timeout: int) -> Optional[str]:
+        item = await self.redis.brpop(QUEUE_KEY, timeout=timeout)
+        return item[1] if item else None
+
+class LocalJobQueue:
+    def __init__(self):
+        self.jobs = {}
+        self.dedup = {}
+        self.queue = asyncio.Queue()
+
+    def _live(self, store: dict, key: str):
+        entry = store.get(key)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        store.pop(key, None)
+        return None
+
+    async def save(self, job: dict, ttl: int):
+        # Round-trip through JSON so results look the same as with Redis
+        self.jobs[job["id"]] = (orjson.loads(_dumps(job)), time.monotonic() + ttl)
+
+    async def load(self, job_id: str) -> Optional[dict]:
+        return self._live(self.jobs, job_id)
+
+    async def claim(self, dedup_key: str, job_id: str, ttl: int) -> Optional[str]:
+        existing = self._live(self.dedup, dedup_key)
+        if existing:
+            return existing
+        self.dedup[dedup_key] = (job_id, time.monotonic() + ttl)
+        return None
+
+    async def release(self, dedup_key: str, job_id: str):
+        if self._live(self.dedup, dedup_key) == job_id:
+            del self.dedup[dedup_key]
+
+    async def enqueue(self, job_id: str):
+        self.queue.put_nowait(job_id)
+
+    async def dequeue(self, timeout: int) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class JobQueueHolder:
+    queue = None
+
+async def get_job_queue():
+    """Return the job queue for the configured backend."""
+    if JobQueueHolder.queue is None:
+        if settings.JOB_QUEUE_BACKEND == "local":
+            JobQueueHolder.queue = LocalJobQueue()
+        else:
+            JobQueueHolder.queue = RedisJobQueue(await get_redis())
+    return JobQueueHolder.queue
+
+def normalize_params(kind: str, params: Optional[dict]) -> dict:
+    """Validate params for a job kind; raises KeyError for unknown kinds and ValidationError for bad params."""
+    _, params_model = JOB_HANDLERS[kind]
+    if params_model is None:
+        return {}
+    return params_model.model_validate(params or {}).model_dump(mode="json")
+
+def _dedup_key(kind: str, params: dict) -> str:
+    payload = orjson.dumps({"kind": kind, "params": params}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+def _lease_expired(job: dict) -> bool:
+    return job["status"] == JobStatus.RUNNING.value and (job.get("lease_until") or 0) < time.time()
+
+async def _requeue_if_stale(queue, job: dict) -> dict:
+    """Put a running job whose worker stopped renewing its lease back on the queue."""
+    if not _lease_expired(job):
+        return job
+    # One requeue per lost lease, however many requests notice it
+    if await queue.claim(f"requeue:{job['id']}:{job['lease_until']}", job["id"], settings.JOB_LEASE_TTL) is None:
+        logger.warning("Job %s (%s) lost its worker, requeueing", job["id"], job["kind"])
+        job.update(status=JobStatus.QUEUED.value, started_at=None, lease_until=None)
+        await queue.save(job, settings.JOB_RESULT_TTL)
+        await queue.enqueue(job["id"])
+    else:
+        job = await queue.load(job["id"]) or job
+    return job
+
+async def submit_job(queue, kind: str, params: Optional[dict] = None, reuse_completed: bool = True) -> dict:
+    """
+    Queue a job, or return the job already queued, running or (unless
+    reuse_completed is False) completed for the same kind and parameters.
+    """
+    params = normalize_params(kind, params)
+    dedup_key = _dedup_key(kind, params)
+    job_id = uuid.uuid4().hex
+    for _ in range(2):
+        existing_id = await queue.claim(dedup_key, job_id, settings.JOB_RESULT_TTL)
+        if existing_id is None:
+            break
+        existing = await queue.load(existing_id)
+        if existing and (reuse_completed or existing["status"] != JobStatus.COMPLETED.value):
+            return await _requeue_if_stale(queue, existing)
+        # The job record expired before its dedup key, or its result is not wanted; take the key over
+        await queue.release(dedup_key, existing_id)
+    job = {
+        "id": job_id,
+        "kind": kind,
+        "params": params,
+        "dedup_key": dedup_key,
+        "status": JobStatus.QUEUED.value,
+        "created_at": datetime.now(),
+        "started_at": None,
+        "finished_at": None,
+        "lease_until": None,
+        "result": None,
+        "error": None,
+    }
+    await queue.save(job, settings.JOB_RESULT_TTL)
+    await queue.enqueue(job_id)
+    return orjson.loads(_dumps(job))
+
+async def get_job(queue, job_id: str) -> Optional[dict]:
+    job = await queue.load(job_id)
+    return await _requeue_if_stale(queue, job) if job else None
+
+async def _renew_lease(queue, job: dict):
+    interval = settings.JOB_LEASE_TTL / LEASE_RENEWALS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            job["lease_until"] = time.time() + settings.JOB_LEASE_TTL
+            await queue.save(job, settings.JOB_RESULT_TTL)
+        except Exception as e:
+            logger.warning("Job %s lease renewal failed: %s", job["id"], e)
+
+async def run_job(db, queue, job: dict):
+    """Run one job and store its result or error."""
+    job.update(
+        status=JobStatus.RUNNING.value,
+        started_at=datetime.now(),
+        lease_until=time.time() + settings.JOB_LEASE_TTL
+    )
+    await queue.save(job, settings.JOB_RESULT_TTL)
+    lease = asyncio.create_task(_renew_lease(queue, job))
+    try:
+        try:
+            if job["kind"] not in JOB_HANDLERS:
+                raise ValueError(f"Unknown job kind: {job['kind']}")
+            handler, params_model = JOB_HANDLERS[job["kind"]]
+            params = params_model.model_validate(job["params"]) if params_model else None
+            result = await asyncio.wait_for(handler(db, params), settings.JOB_TIMEOUT)
+        finally:
+            # Stop renewing before the final save, which the renewal must not overwrite
+            lease.cancel()
+            await asyncio.gather(lease, return_exceptions=True)
+        job.update(status=JobStatus.COMPLETED.value, result=result, lease_until=None)
+    except asyncio.CancelledError:
+        # Worker shutting down: requeue so another worker runs it
+        job.update(status=JobStatus.QUEUED.value, started_at=None, lease_until=None)
+        await queue.save(job, settings.JOB_RESULT_TTL)
+        await queue.enqueue(job["id"])
+        raise
+    except Exception as e:
+        logger.warning("Job %s (%s) failed: %s", job["id"], job["kind"], e)
+        job.update(status=JobStatus.FAILED.value, error=str(e) or type(e).__name__, lease_until=None)
+        # A failed job should not be returned for the next identical submission
+        await queue.release(job["dedup_key"], job["id"])
+    job["finished_at"] = datetime.now()
+    await queue.save(job, settings.JOB_RESULT_TTL)
+
+async def run_job_worker(db, queue):
+    """Take jobs off the queue and run them one at a time until cancelled."""
+    while True:
+        try:
+            job_id = await queue.dequeue(DEQUEUE_TIMEOUT)
+            if job_id is None:
+                continue
+            job = await queue.load(job_id)
+            if not job or job["status"] != JobStatus.QUEUED.value:
+                continue
+            await run_job(db, queue, job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Job worker error: %s", e)
+            await asyncio.sleep(DEQUEUE_TIMEOUT)
+
+async def run_job_workers(db, queue, count: Optional[int] = None):
+    """Run count workers concurrently until cancelled."""
+    count = count or settings.JOB_WORKERS
+    await asyncio.gather(*(run_job_worker(db, queue) for _ in range(count)))
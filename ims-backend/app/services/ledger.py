@@ -0,0 +1,58 @@
+"""
+Persisted party ledger status.
+
+An unpaid entry is stored as pending until its due date passes and as overdue
+after that, so status filters and reports read the stored status (served by the
+(status, due_date) index) instead of comparing due_date with the clock on every
+row. Writes normalize the status of the entry they touch; a periodic sweep moves
+entries that have fallen due since from pending to overdue with one update_many.
+"""
+import logging
+from datetime import datetime
+from typing import Optional
+from ..core.config import settings
+from .periodic import run_periodic
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+OVERDUE = "overdue"
+PAID = "paid"
+
+SWEEP_LOCK_KEY = "ims:lock:ledger-overdue-sweep"
+
+def ledger_status(entry: dict, now: datetime) -> str:
+    """The status to store for entry: paid (and any other explicit status) is kept, unpaid follows the due date."""
+    status = entry.get("status") or PENDING
+    if status not in (PENDING, OVERDUE):
+        return status
+    due_date = entry.get("due_date")
+    return OVERDUE if isinstance(due_date, datetime) and due_date < now else PENDING
+
+def ledger_status_stage(now: datetime) -> dict:
+    """Update pipeline stage applying ledger_status to the document written by the previous stage."""
+    status = {"$ifNull": ["$status", PENDING]}
+    return {"$set": {"status": {"$cond": [
+        {"$in": [status, [PENDING, OVERDUE]]},
+        {"$cond": [{"$lt": ["$due_date", now]}, OVERDUE, PENDING]},
+        status,
+    ]}}}
+
+async def sweep_overdue(db, now: Optional[datetime] = None) -> int:
+    """Mark every pending entry past its due date as overdue. Returns the number of entries updated."""
+    now = now or datetime.now()
+    result = await db.party_ledger.update_many(
+        {"status": {"$in": [PENDING, None]}, "due_date": {"$lt": now}},
+        {"$set": {"status": OVERDUE}}
+    )
+    return result.modified_count
+
+async def run_overdue_sweeper(db, redis_client, interval: Optional[int] = None):
+    """Sweep overdue entries every interval seconds until cancelled."""
+    async def sweep():
+        swept = await sweep_overdue(db)
+        if swept:
+            logger.info("Marked %d ledger entries overdue", swept)
+
+    interval = interval or settings.LEDGER_OVERDUE_SWEEP_INTERVAL
+    await run_periodic(redis_client, SWEEP_LOCK_KEY, interval, sweep)
@@ -0,0 +1,102 @@
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+# Returned by LocalCache.get on a miss (None is a valid cached value)
+MISSING = object()
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with a per-entry TTL and tag index.
+
+    Sits in front of Redis for hot, rarely changing entities. Entries are dropped
+    when their TTL passes, when they are the least recently used entry of a full
+    cache, or when one of their tags is invalidated (locally or by another worker
+    through the Redis invalidation channel).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._keys_by_tag = {}  # tag -> set of keys
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped on every invalidation; see set(since=...)
+        self.epoch = 0
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value, tags: Iterable[str] = (), since: Optional[int] = None):
+        """
+        Store value under key. When since is given (the epoch read before fetching
+        value from Redis) the value is only stored if nothing was invalidated in
+        the meantime, so a read racing an invalidation cannot pin a stale value.
+        """
+        if self.maxsize <= 0 or (since is not None and since != self.epoch):
+            return
+        if key in self._entries:
+            self._remove(key)
+        tags = tuple(tags)
+        self._entries[key] = (time.monotonic() + self.ttl, tags, value)
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate_tags(self, tags: Iterable[str]):
+        self.epoch += 1
+        for tag in tags:
+            for key in list(self._keys_by_tag.get(tag, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_keys(self, keys: Iterable[str]):
+        self.epoch += 1
+        for key in keys:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        self.epoch += 1
+        self._entries.clear()
+        self._keys_by_tag.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+    def _remove(self, key: str):
+        _, tags, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Optional
+from ..models.inventory_movements import MovementType
+from .rollups import apply_rollups
+
+# Number of stock_updates / sales_history entries kept on the product document.
+# The complete history lives in the append-only inventory_movements collection.
+RECENT_MOVEMENTS_LIMIT = 5
+
+def build_movement(
+    product: dict,
+    movement_type: MovementType,
+    quantity: int,
+    date: datetime,
+    notes: Optional[str] = None,
+    sale_price: Optional[float] = None
+) -> dict:
+    """Build an inventory_movements document for a product."""
+    movement = {
+        "product_id": str(product["_id"]),
+        "category_id": product.get("category_id"),
+        "dealer_id": product.get("dealer_id"),
+        "type": movement_type.value,
+        "quantity": quantity,
+        "notes": notes,
+        "date": date
+    }
+    if movement_type == MovementType.SALE:
+        movement["sale_price"] = sale_price
+        # Cost basis for gross margin: the product's dealer price at the time of sale
+        movement["unit_cost"] = product.get("dealer_price")
+    return movement
+
+async def backfill_unit_costs(db):
+    """
+    Give sales recorded before unit_cost existed their product's current
+    dealer_price as unit cost. Runs entirely inside MongoDB.
+    """
+    await db.inventory_movements.aggregate([
+        {"$match": {"type": MovementType.SALE.value, "unit_cost": {"$exists": False}}},
+        {"$project": {"product_oid": {"$convert": {
+            "input": "$product_id", "to": "objectId", "onError": None, "onNull": None
+        }}}},
+        {"$lookup": {
+            "from": "products",
+            "localField": "product_oid",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"_id": 0, "dealer_price": 1}}],
+            "as": "product",
+        }},
+        {"$project": {"unit_cost": {"$ifNull": [{"$arrayElemAt": ["$product.dealer_price", 0]}, None]}}},
+        {"$merge": {"into": "inventory_movements", "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}},
+    ]).to_list(None)
+
+async def record_movements(db, movements: list):
+    """Append movements to the inventory_movements collection and add them to the rollups."""
+    if not movements:
+        return
+    await db.inventory_movements.insert_many(movements, ordered=False)
+    await apply_rollups(db, movements)
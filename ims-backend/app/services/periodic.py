@@ -0,0 +1,24 @@
+"""
+Periodic background work shared by every app worker.
+
+Each task runs in every worker process, so a Redis key set with NX and an expiry
+of one interval elects the worker that does the work for that interval; the
+others skip it and try again when the interval is over.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+async def run_periodic(redis_client, lock_key: str, interval: int, fn: Callable[[], Awaitable]):
+    """Await fn every interval seconds, starting at once, until cancelled. Failures are logged and retried next interval."""
+    while True:
+        try:
+            if await redis_client.set(lock_key, "1", nx=True, ex=interval):
+                await fn()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Periodic task %s failed: %s", lock_key, e)
+        await asyncio.sleep(interval)
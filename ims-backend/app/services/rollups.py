@@ -0,0 +1,125 @@
+"""
+Pre-aggregated sales and stock rollups.
+
+daily_rollups holds one document per (day, product) and monthly_rollups one per
+(month, product), each carrying the product's category and dealer together with
+quantity_received, quantity_sold, revenue and cost (units sold times their unit
+cost, so revenue - cost is the gross margin). Every recorded movement is added
+with $inc, so time-range reports read a few rollup documents instead of
+replaying the movement history. The backfill rebuilds both collections from
+inventory_movements.
+"""
+import logging
+from collections import defaultdict
+from pymongo import UpdateOne
+from ..models.inventory_movements import MovementType
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COUNTERS = ("quantity_received", "quantity_sold", "revenue", "cost")
+
+def day_key(date) -> str:
+    return date.strftime("%Y-%m-%d")
+
+def month_key(date) -> str:
+    return date.strftime("%Y-%m")
+
+def _counters(movement: dict) -> dict:
+    if movement["type"] == MovementType.SALE.value:
+        quantity = movement["quantity"]
+        return {
+            "quantity_sold": quantity,
+            "revenue": quantity * (movement.get("sale_price") or 0),
+            "cost": quantity * (movement.get("unit_cost") or 0),
+        }
+    return {"quantity_received": movement["quantity"]}
+
+def rollup_updates(movements: list) -> tuple:
+    """Upserts for daily_rollups and monthly_rollups, one per (period, product)."""
+    daily = {}
+    monthly = {}
+    for movement in movements:
+        date = movement["date"]
+        product_id = movement["product_id"]
+        fields = {
+            "product_id": product_id,
+            "category_id": movement.get("category_id"),
+            "dealer_id": movement.get("dealer_id"),
+        }
+        for rollups, key, period in (
+            (daily, f"{day_key(date)}:{product_id}", {"day": date.replace(hour=0, minute=0, second=0, microsecond=0)}),
+            (monthly, f"{month_key(date)}:{product_id}", {"month": month_key(date)}),
+        ):
+            if key not in rollups:
+                rollups[key] = ({**period, **fields}, defaultdict(int))
+            for counter, value in _counters(movement).items():
+                rollups[key][1][counter] += value
+    return tuple(
+        [
+            UpdateOne({"_id": key}, {"$inc": dict(counters), "$setOnInsert": fields}, upsert=True)
+            for key, (fields, counters) in rollups.items()
+        ]
+        for rollups in (daily, monthly)
+    )
+
+async def apply_rollups(db, movements: list):
+    """
+    Add movements to the rollup collections. Failures are logged, not raised: the
+    movements are already recorded and the backfill can rebuild the rollups.
+    """
+    if not movements:
+        return
+    daily, monthly = rollup_updates(movements)
+    try:
+        await db.daily_rollups.bulk_write(daily, ordered=False)
+        await db.monthly_rollups.bulk_write(monthly, ordered=False)
+    except Exception as e:
+        logger.warning("Rollup update failed: %s", e)
+
+def _backfill_pipeline(period_field: str, date_format: str, period_value: dict, target: str) -> list:
+    return [
+        {"$match": {"date": {"$type": "date"}}},
+        {"$project": {
+            "_id": 0,
+            "period": {"$dateToString": {"format": date_format, "date": "$date"}},
+            period_field: period_value,
+            "product_id": 1,
+            "category_id": 1,
+            "dealer_id": 1,
+            "quantity_received": {"$cond": [{"$eq": ["$type", MovementType.STOCK_IN.value]}, "$quantity", 0]},
+            "quantity_sold": {"$cond": [{"$eq": ["$type", MovementType.SALE.value]}, "$quantity", 0]},
+            "revenue": {"$cond": [
+                {"$eq": ["$type", MovementType.SALE.value]},
+                {"$multiply": ["$quantity", {"$ifNull": ["$sale_price", 0]}]},
+                0,
+            ]},
+            "cost": {"$cond": [
+                {"$eq": ["$type", MovementType.SALE.value]},
+                {"$multiply": ["$quantity", {"$ifNull": ["$unit_cost", 0]}]},
+                0,
+            ]},
+        }},
+        {"$group": {
+            "_id": {"$concat": ["$period", ":", "$product_id"]},
+            period_field: {"$first": f"${period_field}"},
+            "product_id": {"$first": "$product_id"},
+            "category_id": {"$first": "$category_id"},
+            "dealer_id": {"$first": "$dealer_id"},
+            **{counter: {"$sum": f"${counter}"} for counter in ROLLUP_COUNTERS},
+        }},
+        {"$merge": {"into": target, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+async def rebuild_rollups(db):
+    """
+    Recompute both rollup collections from inventory_movements, entirely inside
+    MongoDB. Rollups of products no longer in the movement history are left alone.
+    Movements recorded while the rebuild runs may be counted twice or not at all
+    for their period; run it while writes are quiet or run it again.
+    """
+    await db.inventory_movements.aggregate(_backfill_pipeline(
+        "day", "%Y-%m-%d", {"$dateTrunc": {"date": "$date", "unit": "day"}}, "daily_rollups"
+    )).to_list(None)
+    await db.inventory_movements.aggregate(_backfill_pipeline(
+        "month", "%Y-%m", {"$dateToString": {"format": "%Y-%m", "date": "$date"}}, "monthly_rollups"
+    )).to_list(None)
@@ -0,0 +1,80 @@
+from typing import Optional
+from slugify import slugify
+
+# Longest prefix stored per word; longer query tokens are truncated to match
+MAX_PREFIX_LENGTH = 15
+
+# Relevance weights used by search_score_stage
+EXACT_CODE_WEIGHT = 10
+WORD_MATCH_WEIGHT = 2
+
+def tokenize(text: Optional[str]) -> list:
+    """Split text into lowercase ASCII words. Punctuation never reaches a query operator."""
+    if not text:
+        return []
+    return [word for word in slugify(text).split("-") if word]
+
+def _compact(text: Optional[str]) -> Optional[str]:
+    """Model numbers and codes without separators: "SM-TV2024-001" -> "smtv2024001"."""
+    compact = "".join(tokenize(text))
+    return compact or None
+
+def _prefixes(word: str) -> list:
+    return [word[:i] for i in range(1, min(len(word), MAX_PREFIX_LENGTH) + 1)]
+
+def product_search_fields(product: dict) -> dict:
+    """
+    Search fields stored on a product document:
+    - search_words: whole words of name, model_number, product_code and slug
+    - search_prefixes: every prefix of those words, matched through a multikey index
+    - search_codes: model_number and product_code without separators, for exact code matches
+    """
+    words = set()
+    for field in ("name", "model_number", "product_code", "slug"):
+        words.update(tokenize(product.get(field)))
+    codes = {_compact(product.get(field)) for field in ("model_number", "product_code")} - {None}
+    words.update(codes)
+    prefixes = set()
+    for word in words:
+        prefixes.update(_prefixes(word))
+    return {"search_words": sorted(words), "search_prefixes": sorted(prefixes), "search_codes": sorted(codes)}
+
+def search_query_tokens(search: str) -> list:
+    """Normalized query tokens, truncated to the longest stored prefix."""
+    return sorted({token[:MAX_PREFIX_LENGTH] for token in tokenize(search)})
+
+def search_filter(tokens: list) -> dict:
+    """Every token must be a prefix of some word of the product."""
+    return {"search_prefixes": {"$all": tokens}}
+
+def search_score_stage(search: str, tokens: list) -> dict:
+    """
+    $addFields stage computing a relevance score: an exact model_number or
+    product_code match ranks first, then products matching whole words.
+    """
+    compact = _compact(search) or ""
+    return {"$addFields": {"_score": {"$add": [
+        {"$cond": [{"$in": [compact, {"$ifNull": ["$search_codes", []]}]}, EXACT_CODE_WEIGHT, 0]},
+        {"$multiply": [
+            WORD_MATCH_WEIGHT,
+            {"$size": {"$setIntersection": [{"$ifNull": ["$search_words", []]}, tokens]}}
+        ]},
+    ]}}}
+
+def search_page_stages(search: str, tokens: list, skip: int, limit: int) -> list:
+    """
+    Stages ranking the documents matched so far and returning one page of full
+    products, best match first. Candidates are cut down to _id and _score before
+    the sort, so ranking a broad query sorts small documents instead of whole
+    products; only the page is then fetched back by _id.
+    """
+    return [
+        {"$project": {"search_words": 1, "search_codes": 1}},
+        search_score_stage(search, tokens),
+        {"$project": {"_score": 1}},
+        {"$sort": {"_score": -1, "_id": 1}},
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$lookup": {"from": "products", "localField": "_id", "foreignField": "_id", "as": "_product"}},
+        {"$replaceRoot": {"newRoot": {"$arrayElemAt": ["$_product", 0]}}},
+    ]
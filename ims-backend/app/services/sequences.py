@@ -0,0 +1,159 @@
+import asyncio
+import re
+from collections import Counter
+from typing import Optional
+from pymongo import ReturnDocument
+from slugify import slugify
+
+# Concurrent counter updates issued by allocate_slugs
+SLUG_ALLOCATION_CONCURRENCY = 100
+
+# Slugs per query when checking allocated slugs against the collection
+SLUG_CHECK_BATCH_SIZE = 1000
+
+# Code sequences: name -> (collection, code field, prefix)
+SEQUENCES = {
+    "product_code": ("products", "product_code", "PRD"),
+    "dealer_code": ("dealers", "dealer_code", "DLR"),
+}
+
+def format_code(name: str, number: int) -> str:
+    """Render a sequence number as a code, e.g. PRD007."""
+    prefix = SEQUENCES[name][2]
+    return f"{prefix}{number:03d}"
+
+async def ensure_sequences(db):
+    """
+    Seed code counters from existing data the first time they are used.
+    Codes are compared numerically, so PRD1000 correctly follows PRD999.
+    """
+    for name, (collection, field, prefix) in SEQUENCES.items():
+        if await db.counters.find_one({"_id": name}):
+            continue
+        pipeline = [
+            {"$match": {field: {"$regex": f"^{prefix}[0-9]+$"}}},
+            {"$group": {"_id": None, "max": {"$max": {
+                "$toLong": {"$ltrim": {"input": f"${field}", "chars": prefix}}
+            }}}},
+        ]
+        result = await db[collection].aggregate(pipeline).to_list(1)
+        highest = result[0]["max"] if result else 0
+        await db.counters.update_one({"_id": name}, {"$max": {"seq": highest}}, upsert=True)
+
+async def next_sequence(db, name: str, count: int = 1) -> int:
+    """Atomically reserve count numbers and return the last one of the block."""
+    counter = await db.counters.find_one_and_update(
+        {"_id": name},
+        {"$inc": {"seq": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter["seq"]
+
+async def next_code(db, name: str) -> str:
+    """Allocate the next code of a sequence, e.g. the next product_code."""
+    return format_code(name, await next_sequence(db, name))
+
+async def next_codes(db, name: str, count: int) -> list:
+    """Allocate count consecutive codes of a sequence with a single counter update."""
+    if count <= 0:
+        return []
+    last = await next_sequence(db, name, count)
+    return [format_code(name, number) for number in range(last - count + 1, last + 1)]
+
+def _slug_pattern(base: str):
+    return re.compile(rf"^{re.escape(base)}(?:-([0-9]+))?$")
+
+def _slug_for(base: str, seq: int) -> str:
+    """Sequence 1 is the bare slug, 2 is base-1, 3 is base-2, ..."""
+    return base if seq == 1 else f"{base}-{seq - 1}"
+
+async def _skip_used_slugs(db, collection: str, base: str) -> int:
+    """
+    Move the counter of a base past every slug of that base already in the
+    collection, with one anchored, index-backed query. Needed the first time a
+    base is seen, and whenever a slug was taken outside its counter: "Samsung
+    TV 2" gets the bare slug samsung-tv-2 of its own base, which the samsung-tv
+    counter would hand out again.
+    """
+    used = 0
+    pattern = _slug_pattern(base)
+    async for doc in db[collection].find({"slug": {"$regex": pattern.pattern}}, {"slug": 1}):
+        match = pattern.match(doc["slug"])
+        used = max(used, int(match.group(1)) + 1 if match.group(1) else 1)
+    if used:
+        await db.counters.update_one({"_id": f"slug:{collection}:{base}"}, {"$max": {"seq": used}})
+    return used
+
+async def _reserve_slugs(db, collection: str, base: str, count: int) -> int:
+    """Reserve count slugs of a base and return the last sequence number reserved."""
+    seq = await next_sequence(db, f"slug:{collection}:{base}", count)
+    if seq == count and await _skip_used_slugs(db, collection, base):
+        # New counter: account for slugs created before the counter existed
+        seq = await next_sequence(db, f"slug:{collection}:{base}", count)
+    return seq
+
+async def _taken_slugs(db, collection: str, slugs: list) -> set:
+    taken = set()
+    for start in range(0, len(slugs), SLUG_CHECK_BATCH_SIZE):
+        chunk = slugs[start:start + SLUG_CHECK_BATCH_SIZE]
+        docs = await db[collection].find({"slug": {"$in": chunk}}, {"slug": 1}).to_list(None)
+        taken.update(doc["slug"] for doc in docs)
+    return taken
+
+async def allocate_slug(db, collection: str, text: str, current_slug: Optional[str] = None) -> str:
+    """
+    Allocate a unique slug for text in collection with one atomic counter update.
+
+    Each base slug has its own counter in the counters collection; every
+    allocation after the first is a single $inc, no matter how many
+    "samsung-tv-N" slugs exist. When current_slug already belongs to the same
+    base (a rename that does not change the slug) it is kept.
+    """
+    base = slugify(text)
+    if current_slug and _slug_pattern(base).match(current_slug):
+        return current_slug
+    while True:
+        slug = _slug_for(base, await _reserve_slugs(db, collection, base, 1))
+        if not await _taken_slugs(db, collection, [slug]):
+            return slug
+        await _skip_used_slugs(db, collection, base)
+
+async def _slugs_for_bases(db, collection: str, bases: list) -> list:
+    counts = Counter(bases)
+    last = {}
+    items = list(counts.items())
+    for start in range(0, len(items), SLUG_ALLOCATION_CONCURRENCY):
+        chunk = items[start:start + SLUG_ALLOCATION_CONCURRENCY]
+        reserved = await asyncio.gather(*(_reserve_slugs(db, collection, base, count) for base, count in chunk))
+        last.update({base: seq for (base, _), seq in zip(chunk, reserved)})
+    next_seq = {base: last[base] - count + 1 for base, count in counts.items()}
+    slugs = []
+    for base in bases:
+        slugs.append(_slug_for(base, next_seq[base]))
+        next_seq[base] += 1
+    return slugs
+
+async def allocate_slugs(db, collection: str, texts: list) -> list:
+    """
+    Allocate unique slugs for many texts at once, in order. Each distinct base
+    slug costs one counter update for all of its texts, and the updates run
+    concurrently. Slugs already taken, or handed out twice in the batch (by two
+    bases, as with "Samsung TV" and "Samsung TV 2"), are allocated again.
+    """
+    bases = [slugify(text) for text in texts]
+    slugs = await _slugs_for_bases(db, collection, bases)
+    while True:
+        taken = await _taken_slugs(db, collection, slugs)
+        seen = set()
+        clashing = []
+        for index, slug in enumerate(slugs):
+            if slug in taken or slug in seen:
+                clashing.append(index)
+            seen.add(slug)
+        if not clashing:
+            return slugs
+        await asyncio.gather(*(_skip_used_slugs(db, collection, base) for base in {bases[index] for index in clashing}))
+        replacements = await _slugs_for_bases(db, collection, [bases[index] for index in clashing])
+        for index, slug in zip(clashing, replacements):
+            slugs[index] = slug
@@ -0,0 +1,91 @@
+from datetime import datetime
+from typing import Optional
+from ..schemas.products import ProductStatus
+from .dashboard import LOW_STOCK_THRESHOLD
+from .movements import RECENT_MOVEMENTS_LIMIT
+
+def _append_recent(field: str, entry: dict) -> dict:
+    """
+    Pipeline expression appending entry to an array field. Products whose history
+    has been backfilled into inventory_movements keep only the latest entries;
+    until then the array is the only copy of the older ones, so it is not trimmed.
+    The entry is marked in_movements: callers record it in inventory_movements
+    as well, so the backfill must not copy it again.
+    """
+    entry = {**entry, "in_movements": True}
+    appended = {"$concatArrays": [{"$ifNull": [f"${field}", []]}, {"$literal": [entry]}]}
+    return {"$cond": [
+        {"$eq": ["$movements_backfilled", True]},
+        {"$slice": [appended, -RECENT_MOVEMENTS_LIMIT]},
+        appended
+    ]}
+
+def low_stock_fields(stock: int, threshold: Optional[int]) -> dict:
+    """
+    is_low_stock and stock_ratio (stock / threshold) as stored on a product; a
+    threshold of None means the default. Low stock products are listed from a
+    partial index on is_low_stock, most urgent (lowest ratio) first; a threshold
+    of 0 turns the alert off.
+    """
+    if threshold is None:
+        threshold = LOW_STOCK_THRESHOLD
+    return {
+        "is_low_stock": stock < threshold,
+        "stock_ratio": stock / threshold if threshold > 0 else None,
+    }
+
+def low_stock_stage() -> dict:
+    """Pipeline stage deriving is_low_stock and stock_ratio from stock and reorder_threshold."""
+    threshold = {"$ifNull": ["$reorder_threshold", LOW_STOCK_THRESHOLD]}
+    return {"$set": {
+        "is_low_stock": {"$lt": ["$stock", threshold]},
+        "stock_ratio": {"$cond": [{"$gt": [threshold, 0]}, {"$divide": ["$stock", threshold]}, None]},
+    }}
+
+def _status_stage() -> dict:
+    """Derive status from the stock computed by the previous stage."""
+    return {"$set": {"status": {"$cond": [
+        {"$gt": ["$stock", 0]}, ProductStatus.IN_STOCK.value, ProductStatus.OUT_OF_STOCK.value
+    ]}}}
+
+def sale_filter(quantity: int) -> dict:
+    """Filter clause that only matches products with enough stock for the sale."""
+    return {"stock": {"$gte": quantity}}
+
+def sale_update(quantity: int, sale_price: float, date: datetime, notes: Optional[str] = None) -> list:
+    """
+    Update pipeline recording a sale: decrement stock, bump total_sales, keep the
+    latest sales_history entries and derive status and low-stock state, all in
+    one atomic write.
+    Combine with sale_filter so the stock check happens inside the update.
+    """
+    entry = {"quantity": quantity, "sale_price": sale_price, "date": date, "notes": notes}
+    return [
+        {"$set": {
+            "stock": {"$subtract": ["$stock", quantity]},
+            "total_sales": {"$add": [{"$ifNull": ["$total_sales", 0]}, quantity]},
+            "sales_history": _append_recent("sales_history", entry),
+            "updated_at": date
+        }},
+        _status_stage(),
+        low_stock_stage()
+    ]
+
+def stock_in_update(quantity: int, date: datetime, notes: Optional[str] = None) -> list:
+    """
+    Update pipeline receiving stock: increment stock and total_stock_received,
+    keep the latest stock_updates entries and derive status and low-stock state
+    in one atomic write.
+    """
+    entry = {"quantity": quantity, "date": date, "notes": notes}
+    return [
+        {"$set": {
+            "stock": {"$add": [{"$ifNull": ["$stock", 0]}, quantity]},
+            "total_stock_received": {"$add": [{"$ifNull": ["$total_stock_received", 0]}, quantity]},
+            "stock_updates": _append_recent("stock_updates", entry),
+            "last_updated_date": date,
+            "updated_at": date
+        }},
+        _status_stage(),
+        low_stock_stage()
+    ]
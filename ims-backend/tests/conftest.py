@@ -0,0 +1,126 @@
+import os
+
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+
+import fakeredis
+import httpx
+import pytest
+from bson import ObjectId
+from bson.errors import InvalidId
+from mongomock import aggregate as mongomock_aggregate
+from mongomock.collection import BulkOperationBuilder
+from mongomock_motor import AsyncMongoMockClient
+
+from app.db.mongodb import MongoDB
+from app.db.redis import RedisClient
+from app.main import app
+from app.services import cache
+from app.services.jobs import JobQueueHolder
+
+# mongomock gaps the app's queries run into: $convert (only the objectId
+# conversions used for lookups), $setIntersection, $lookup with both
+# localField/foreignField and a pipeline, and the sort option pymongo passes to
+# bulk updates
+
+_handle_type_convertion_operator = mongomock_aggregate._Parser._handle_type_convertion_operator
+
+def _convert_to_object_id(self, operator, values):
+    if operator == "$convert" and values.get("to") == "objectId":
+        try:
+            value = self.parse(values["input"])
+        except KeyError:
+            value = None
+        if value is None:
+            return values.get("onNull")
+        try:
+            return value if isinstance(value, ObjectId) else ObjectId(value)
+        except (InvalidId, TypeError):
+            return values.get("onError")
+    return _handle_type_convertion_operator(self, operator, values)
+
+mongomock_aggregate._Parser._handle_type_convertion_operator = _convert_to_object_id
+
+_handle_set_operator = mongomock_aggregate._Parser._handle_set_operator
+
+def _set_intersection(self, operator, values):
+    if operator == "$setIntersection":
+        first, *others = [self.parse(value) for value in values]
+        return [value for value in dict.fromkeys(first) if all(value in other for other in others)]
+    return _handle_set_operator(self, operator, values)
+
+mongomock_aggregate._Parser._handle_set_operator = _set_intersection
+
+_handle_lookup_stage = mongomock_aggregate._PIPELINE_HANDLERS["$lookup"]
+
+def _lookup_with_pipeline(in_collection, database, options):
+    if "pipeline" not in options or "let" in options:
+        return _handle_lookup_stage(in_collection, database, options)
+    options = dict(options)
+    pipeline = options.pop("pipeline")
+    for doc in _handle_lookup_stage(in_collection, database, options):
+        doc[options["as"]] = list(mongomock_aggregate.process_pipeline(doc[options["as"]], database, pipeline, None))
+    return in_collection
+
+mongomock_aggregate._PIPELINE_HANDLERS["$lookup"] = _lookup_with_pipeline
+
+_add_update = BulkOperationBuilder.add_update
+_add_replace = BulkOperationBuilder.add_replace
+BulkOperationBuilder.add_update = lambda self, *args, sort=None, **kwargs: _add_update(self, *args, **kwargs)
+BulkOperationBuilder.add_replace = lambda self, *args, sort=None, **kwargs: _add_replace(self, *args, **kwargs)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def db():
+    MongoDB.client = AsyncMongoMockClient()
+    yield MongoDB.client["inventory_db"]
+    MongoDB.client = None
+
+@pytest.fixture
+def redis_client():
+    RedisClient.client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    cache.local_cache.clear()
+    cache._inflight.clear()
+    JobQueueHolder.queue = None
+    yield RedisClient.client
+    RedisClient.client = None
+    JobQueueHolder.queue = None
+
+@pytest.fixture
+async def client(db, redis_client):
+    # No lifespan: the fixtures above stand in for the connections it would open
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+@pytest.fixture
+async def category(db):
+    category = {"_id": ObjectId(), "name": "Televisions", "slug": "televisions"}
+    await db.categories.insert_one(category)
+    return category
+
+@pytest.fixture
+async def dealer(db):
+    dealer = {"_id": ObjectId(), "company_name": "Acme Distributors", "slug": "acme-distributors"}
+    await db.dealers.insert_one(dealer)
+    return dealer
+
+@pytest.fixture
+def create_product(client, category, dealer):
+    """POST a product with valid references; keyword arguments override the request body."""
+    async def create(**fields):
+        body = {
+            "category_id": str(category["_id"]),
+            "dealer_id": str(dealer["_id"]),
+            "name": "Samsung TV",
+            "model_number": f"MN-{ObjectId()}",
+            "dealer_price": 100.0,
+            "initial_stock": 10,
+            **fields,
+        }
+        response = await client.post("/api/products/", json=body)
+        assert response.status_code == 201, response.text
+        return response.json()
+    return create
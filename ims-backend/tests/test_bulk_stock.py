@@ -0,0 +1,61 @@
+import pytest
+from bson import ObjectId
+from mongomock.collection import Collection
+from pymongo.errors import BulkWriteError
+
+pytestmark = pytest.mark.anyio
+
+async def test_shipment_adds_stock_and_reports_missing_lines(client, db, create_product):
+    tv = await create_product(name="Samsung TV", initial_stock=5)
+    fridge = await create_product(name="LG Fridge", initial_stock=0)
+
+    response = await client.post("/api/products/stock/bulk", json={"notes": "INV-118", "lines": [
+        {"slug": tv["slug"], "quantity": 3},
+        {"model_number": fridge["model_number"], "quantity": 4, "notes": "Damaged box x1"},
+        {"slug": "missing", "quantity": 1},
+        {"slug": tv["slug"], "quantity": 2},
+    ]})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["applied"], body["failed"]) == (3, 1)
+    assert [r["stock"] for r in body["results"]] == [10, 4, None, 10]
+    assert body["results"][2] == {
+        "index": 2, "slug": "missing", "model_number": None, "quantity": 1,
+        "applied": False, "stock": None, "error": "Product not found"
+    }
+    assert await db.inventory_movements.count_documents({"notes": {"$in": ["INV-118", "Damaged box x1"]}}) == 3
+
+async def test_shipment_reports_write_errors_per_line(client, db, create_product, monkeypatch):
+    tv = await create_product(name="Samsung TV", initial_stock=5)
+    fridge = await create_product(name="LG Fridge", initial_stock=5)
+    failing_id = ObjectId(fridge["_id"])
+    bulk_write = Collection.bulk_write
+
+    def fail_fridge_updates(self, requests, **kwargs):
+        if self.name != "products":
+            return bulk_write(self, requests, **kwargs)
+        # What an unordered bulk_write does when some operations fail
+        failed = [i for i, request in enumerate(requests) if request._filter["_id"] == failing_id]
+        bulk_write(self, [r for i, r in enumerate(requests) if i not in failed], **kwargs)
+        raise BulkWriteError({"writeErrors": [
+            {"index": i, "code": 121, "errmsg": "Document failed validation"} for i in failed
+        ]})
+
+    monkeypatch.setattr(Collection, "bulk_write", fail_fridge_updates)
+
+    response = await client.post("/api/products/stock/bulk", json={"notes": "INV-119", "lines": [
+        {"slug": fridge["slug"], "quantity": 1},
+        {"slug": "missing", "quantity": 1},
+        {"slug": tv["slug"], "quantity": 3},
+    ]})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["applied"], body["failed"]) == (1, 2)
+    fridge_result, _, tv_result = body["results"]
+    assert not fridge_result["applied"] and fridge_result["error"] == "Document failed validation"
+    assert fridge_result["stock"] is None
+    assert tv_result["applied"] and tv_result["stock"] == 8
+    movements = await db.inventory_movements.find({"notes": "INV-119"}).to_list(None)
+    assert [str(m["product_id"]) for m in movements] == [tv["_id"]]
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from app.services import cache
+from app.services.cache import (
+    cache_get, cache_get_or_load, cache_key, cache_set, cache_snapshot, dealer_tag, invalidate_tags
+)
+
+pytestmark = pytest.mark.anyio
+
+KEY = cache_key("product", "samsung-tv")
+TAGS = [dealer_tag("d1")]
+
+async def test_invalidating_a_tag_makes_dependent_values_stale(redis_client):
+    await cache_set(redis_client, KEY, {"dealer_name": "Acme"}, tags=TAGS, local=True)
+    assert await cache_get(redis_client, KEY, local=True) == {"dealer_name": "Acme"}
+
+    await invalidate_tags(redis_client, *TAGS)
+
+    assert await cache_get(redis_client, KEY, local=True) is None
+
+async def test_value_loaded_before_a_concurrent_invalidation_is_not_cached(redis_client):
+    # The writer updates the database and invalidates while the reader's load is
+    # in flight: the reader got the old document, which must not be cached as fresh
+    async def load_then_race():
+        await invalidate_tags(redis_client, *TAGS)
+        return {"dealer_name": "Acme"}
+
+    value = await cache_get_or_load(redis_client, KEY, load_then_race, tags=lambda _: TAGS, local=True)
+
+    assert value == {"dealer_name": "Acme"}
+    assert await redis_client.get(KEY) is None
+    assert cache.local_cache.get(KEY) is cache.MISSING
+
+    async def load():
+        return {"dealer_name": "Acme Renamed"}
+
+    assert await cache_get_or_load(redis_client, KEY, load, tags=lambda _: TAGS) == {"dealer_name": "Acme Renamed"}
+    assert await cache_get(redis_client, KEY) == {"dealer_name": "Acme Renamed"}
+
+async def test_cache_set_skips_values_read_before_an_invalidation(redis_client):
+    since = await cache_snapshot(redis_client)
+    await invalidate_tags(redis_client, *TAGS)
+
+    await cache_set(redis_client, KEY, {"dealer_name": "Acme"}, tags=TAGS, since=since)
+
+    assert await redis_client.get(KEY) is None
+
+async def test_tag_generations_do_not_expire(redis_client):
+    await invalidate_tags(redis_client, *TAGS, "rollups")
+
+    generations = [key for key in await redis_client.keys("ims:gen:*")]
+    assert len(generations) == 2
+    assert [await redis_client.ttl(key) for key in generations] == [-1, -1]
+    assert await redis_client.get(cache.CLOCK_KEY) == "1"
+
+async def test_entries_without_generations_are_misses(redis_client):
+    await redis_client.set(KEY, '{"tags": {}}\n{"dealer_name": "Acme"}')
+
+    assert await cache_get(redis_client, KEY) is None
+
+async def test_concurrent_misses_share_one_load(redis_client):
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.05)
+        return {"dealer_name": "Acme"}
+
+    values = await asyncio.gather(*(cache_get_or_load(redis_client, KEY, load) for _ in range(10)))
+
+    assert values == [{"dealer_name": "Acme"}] * 10
+    assert len(loads) == 1
+
+async def test_stale_values_are_served_while_one_refresh_runs(redis_client):
+    await cache_set(redis_client, KEY, {"dealer_name": "Acme"}, tags=TAGS)
+    await invalidate_tags(redis_client, *TAGS)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return {"dealer_name": "Acme Renamed"}
+
+    stale = await asyncio.gather(*(cache_get_or_load(redis_client, KEY, load, tags=lambda _: TAGS) for _ in range(5)))
+    assert stale == [{"dealer_name": "Acme"}] * 5
+    await asyncio.gather(*cache._inflight.values())
+
+    assert len(loads) == 1
+    assert await cache_get(redis_client, KEY) == {"dealer_name": "Acme Renamed"}
+
+async def test_workers_wait_for_the_fill_lock_holder(redis_client):
+    # Another worker holds the fill lock and stores its result shortly after
+    lock = redis_client.lock(cache_key("lock", KEY), timeout=cache.FILL_LOCK_TIMEOUT)
+    await lock.acquire()
+
+    async def other_worker():
+        await asyncio.sleep(0.1)
+        await cache_set(redis_client, KEY, {"dealer_name": "Acme"})
+        await lock.release()
+
+    async def load():
+        raise AssertionError("loaded while another worker held the fill lock")
+
+    _, value = await asyncio.gather(other_worker(), cache_get_or_load(redis_client, KEY, load))
+
+    assert value == {"dealer_name": "Acme"}
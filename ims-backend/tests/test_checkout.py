@@ -0,0 +1,125 @@
+import contextlib
+from types import SimpleNamespace
+
+import pytest
+from motor.core import AgnosticClientSession
+from pymongo.errors import OperationFailure
+
+from app.db.mongodb import MongoDB
+
+pytestmark = pytest.mark.anyio
+
+TRANSACTION_COLLECTIONS = ("products", "inventory_movements")
+
+class MockSession:
+    """
+    Just enough of a transaction for mongomock: the collections are snapshotted
+    when a transaction starts and restored when it aborts. with_transaction is
+    Motor's own, so its retry rules are the ones under test. Falsy, because
+    mongomock refuses any truthy session argument.
+    """
+    with_transaction = AgnosticClientSession.with_transaction
+
+    def __init__(self, db, commit_errors):
+        self.db = db
+        self.commit_errors = commit_errors
+        self.in_transaction = False
+        self.attempts = 0
+
+    def __bool__(self):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    @contextlib.asynccontextmanager
+    async def start_transaction(self, *args):
+        self.attempts += 1
+        self.snapshot = {name: await self.db[name].find().to_list(None) for name in TRANSACTION_COLLECTIONS}
+        self.in_transaction = True
+        yield
+
+    async def commit_transaction(self):
+        if self.commit_errors:
+            await self.abort_transaction()
+            raise self.commit_errors.pop(0)
+        self.in_transaction = False
+
+    async def abort_transaction(self):
+        for name, documents in self.snapshot.items():
+            await self.db[name].delete_many({})
+            if documents:
+                await self.db[name].insert_many(documents)
+        self.in_transaction = False
+
+@pytest.fixture
+def sessions(db):
+    """Sessions started by the app; append to commit_errors to fail the next commits."""
+    sessions = SimpleNamespace(started=[], commit_errors=[])
+
+    async def start_session():
+        sessions.started.append(MockSession(db, sessions.commit_errors))
+        return sessions.started[-1]
+
+    MongoDB.client.start_session = start_session
+    return sessions
+
+async def test_checkout_applies_every_line(client, db, create_product, sessions):
+    tv = await create_product(name="Samsung TV", initial_stock=5)
+    fridge = await create_product(name="LG Fridge", initial_stock=3)
+
+    response = await client.post("/api/products/checkout", json={"lines": [
+        {"slug": tv["slug"], "quantity": 2, "sale_price": 150},
+        {"slug": fridge["slug"], "quantity": 3, "sale_price": 200},
+    ]})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["total_quantity"] == 5 and body["total_amount"] == 900
+    assert [line["remaining_stock"] for line in body["lines"]] == [3, 0]
+    assert await db.inventory_movements.count_documents({"type": "sale"}) == 2
+
+async def test_checkout_rolls_back_when_a_line_is_short(client, db, create_product, sessions):
+    tv = await create_product(name="Samsung TV", initial_stock=5)
+    fridge = await create_product(name="LG Fridge", initial_stock=1)
+
+    response = await client.post("/api/products/checkout", json={"lines": [
+        {"slug": tv["slug"], "quantity": 2, "sale_price": 150},
+        {"slug": fridge["slug"], "quantity": 3, "sale_price": 200},
+        {"slug": "missing", "quantity": 1, "sale_price": 10},
+    ]})
+
+    assert response.status_code == 400
+    assert [line["slug"] for line in response.json()["detail"]["lines"]] == [fridge["slug"], "missing"]
+    assert (await db.products.find_one({"slug": tv["slug"]}))["stock"] == 5
+    assert await db.inventory_movements.count_documents({"type": "sale"}) == 0
+
+async def test_checkout_retries_transient_commit_errors(client, db, create_product, sessions):
+    tv = await create_product(name="Samsung TV", initial_stock=5)
+    sessions.commit_errors.append(
+        OperationFailure("WriteConflict", code=112, details={"errorLabels": ["TransientTransactionError"]})
+    )
+
+    response = await client.post("/api/products/checkout", json={"lines": [
+        {"slug": tv["slug"], "quantity": 2, "sale_price": 150},
+    ]})
+
+    assert response.status_code == 200, response.text
+    assert sessions.started[0].attempts == 2
+    assert (await db.products.find_one({"slug": tv["slug"]}))["stock"] == 3
+    assert await db.inventory_movements.count_documents({"type": "sale"}) == 1
+
+async def test_checkout_on_standalone_server_is_unavailable(client, create_product, sessions):
+    tv = await create_product()
+    sessions.commit_errors.append(
+        OperationFailure("Transaction numbers are only allowed on a replica set member or mongos", code=20)
+    )
+
+    response = await client.post("/api/products/checkout", json={"lines": [
+        {"slug": tv["slug"], "quantity": 1, "sale_price": 150},
+    ]})
+
+    assert response.status_code == 503
@@ -0,0 +1,60 @@
+import fakeredis
+import pytest
+from pymongo import _csot
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.db.mongodb import RequestTimeoutMiddleware
+from app.db.redis import RedisClient, connect_to_redis, close_redis_connection
+from app.services import cache
+from app.services.cache import invalidate_tags
+
+pytestmark = pytest.mark.anyio
+
+async def test_redis_pool_waits_for_a_free_connection(monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_MAX_CONNECTIONS", 7)
+    monkeypatch.setattr(settings, "REDIS_POOL_TIMEOUT", 2.5)
+    await connect_to_redis()
+    try:
+        pool = RedisClient.client.connection_pool
+        assert isinstance(pool, redis.BlockingConnectionPool)
+        assert (pool.max_connections, pool.timeout) == (7, 2.5)
+    finally:
+        await close_redis_connection()
+        RedisClient.client = None
+
+async def test_api_requests_bound_their_queries_but_exports_do_not(monkeypatch):
+    monkeypatch.setattr(settings, "MONGODB_REQUEST_TIMEOUT_MS", 2000)
+    timeouts = {}
+    async def app(scope, receive, send):
+        timeouts[scope["path"]] = _csot.get_timeout()
+    middleware = RequestTimeoutMiddleware(app, exclude_prefixes=("/api/export",))
+
+    for path in ("/api/products/", "/api/export/products"):
+        await middleware({"type": "http", "path": path}, None, None)
+
+    assert timeouts == {"/api/products/": 2.0, "/api/export/products": None}
+    assert settings.model_fields["MONGODB_SOCKET_TIMEOUT_MS"].default is None
+
+@pytest.fixture
+def redis_down(redis_client):
+    server = fakeredis.FakeServer()
+    server.connected = False
+    RedisClient.client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    return RedisClient.client
+
+async def test_invalidation_failures_are_logged_not_raised(redis_down, caplog):
+    cache.local_cache.set("product", 1, tags=["dealer:1"])
+
+    await invalidate_tags(redis_down, "dealer:1")
+
+    assert cache.local_cache.get("product") is cache.MISSING
+    assert "Cache invalidation failed" in caplog.text
+
+async def test_writes_succeed_while_redis_is_down(client, create_product, redis_down):
+    product = await create_product(name="Samsung TV")
+
+    response = await client.put(f"/api/products/{product['slug']}", json={"dealer_price": 120})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["dealer_price"] == 120
@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.dashboard import STATS_ID, ledger_delta, reconcile_dashboard_stats, run_dashboard_reconciler
+
+pytestmark = pytest.mark.anyio
+
+COUNTERS = (
+    "total_products", "total_stock_quantity", "total_stock_value",
+    "out_of_stock_count", "low_stock_count", "total_outstanding_dues",
+)
+
+async def test_write_paths_keep_the_counters_equal_to_a_reconciliation(client, db, dealer, create_product):
+    assert (await client.get("/api/dashboard/summary")).json()["total_products"] == 0
+
+    tv = await create_product(name="Samsung TV", initial_stock=10, dealer_price=100)
+    fridge = await create_product(name="LG Fridge", initial_stock=3, dealer_price=250)
+    washer = await create_product(name="Bosch Washer", initial_stock=0, dealer_price=300)
+    assert (await client.post(f"/api/products/{tv['slug']}/sell", json={"quantity": 7, "sale_price": 150})).status_code == 200
+    assert (await client.post(f"/api/products/{fridge['slug']}/stock", json={"quantity": 5})).status_code == 200
+    assert (await client.put(f"/api/products/{fridge['slug']}", json={"dealer_price": 200, "reorder_threshold": 10})).status_code == 200
+    assert (await client.delete(f"/api/products/{washer['slug']}")).status_code == 204
+    entries = []
+    for amount in (500, 700):
+        response = await client.post("/api/party-ledger/", json={
+            "dealer_id": str(dealer["_id"]), "amount": amount,
+            "due_date": (datetime.now() + timedelta(days=3)).isoformat()
+        })
+        entries.append(response.json())
+    assert (await client.put(f"/api/party-ledger/{entries[0]['_id']}", json={"paid_at": datetime.now().isoformat()})).status_code == 200
+
+    summary = (await client.get("/api/dashboard/summary")).json()
+    assert summary["total_products"] == 2
+    assert summary["total_stock_quantity"] == 11
+    assert summary["total_stock_value"] == 3 * 100 + 8 * 200
+    assert summary["low_stock_alerts"]["count"] == 2
+    assert summary["total_outstanding_dues"] == 700
+
+    maintained = await db.dashboard_stats.find_one({"_id": STATS_ID})
+    reconciled = await reconcile_dashboard_stats(db)
+    assert {field: maintained[field] for field in COUNTERS} == {field: reconciled[field] for field in COUNTERS}
+
+async def test_the_reconciler_corrects_drifted_counters(client, db, redis_client, create_product):
+    await create_product(initial_stock=4, dealer_price=100)
+    await db.dashboard_stats.update_one({"_id": STATS_ID}, {"$inc": {"total_stock_quantity": 5}}, upsert=True)
+
+    reconciler = asyncio.create_task(run_dashboard_reconciler(db, redis_client, interval=60))
+    await asyncio.sleep(0.05)
+    reconciler.cancel()
+
+    assert (await client.get("/api/dashboard/summary")).json()["total_stock_quantity"] == 4
+
+async def test_entries_without_a_status_count_as_outstanding(db, dealer):
+    entries = [{"dealer_id": str(dealer["_id"]), "amount": 100}, {"dealer_id": str(dealer["_id"]), "amount": 50, "status": None}]
+    await db.party_ledger.insert_many(entries)
+
+    reconciled = await reconcile_dashboard_stats(db)
+
+    assert reconciled["total_outstanding_dues"] == sum(ledger_delta(after=entry)["total_outstanding_dues"] for entry in entries) == 150
@@ -0,0 +1,40 @@
+import csv
+import io
+
+import orjson
+import pytest
+
+from app.routes import export
+
+pytestmark = pytest.mark.anyio
+
+async def test_products_stream_as_ndjson_across_batches(client, create_product, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    created = [await create_product(name=f"Samsung TV {i}") for i in range(5)]
+
+    response = await client.get("/api/export/products")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"].startswith('attachment; filename="products-')
+    rows = [orjson.loads(line) for line in response.content.splitlines()]
+    assert [row["_id"] for row in rows] == [product["_id"] for product in created]
+    assert set(rows[0]) == set(export.PRODUCT_EXPORT_FIELDS)
+
+async def test_sales_stream_as_csv_with_one_header(client, create_product, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    tv = await create_product(name="Samsung TV", initial_stock=10)
+    for quantity in (1, 2, 3):
+        await client.post(f"/api/products/{tv['slug']}/sell", json={"quantity": quantity, "sale_price": 150})
+
+    response = await client.get("/api/export/sales", params={"format": "csv", "product_id": tv["_id"]})
+
+    assert response.headers["content-type"].startswith("text/csv")
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == export.SALE_EXPORT_FIELDS
+    assert [row[header.index("quantity")] for row in rows] == ["1", "2", "3"]
+
+async def test_empty_csv_export_is_just_the_header(client):
+    response = await client.get("/api/export/party-ledger", params={"format": "csv"})
+
+    assert response.text.splitlines() == [",".join(export.LEDGER_EXPORT_FIELDS)]
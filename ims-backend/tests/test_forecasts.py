@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import mongomock
+import numpy as np
+import pytest
+
+from app.services.forecasts import compute_forecasts, refresh_forecasts
+
+pytestmark = pytest.mark.anyio
+
+def test_forecasts_weight_recent_sales():
+    # Same units over the window, sold early by one product and late by the other
+    sales = np.zeros((2, 60))
+    sales[0, :30] = 2
+    sales[1, 30:] = 2
+
+    forecast = compute_forecasts(sales, np.array([20.0, 20.0]), np.array([True, True]), 7, 30)
+
+    assert forecast["units_sold"].tolist() == [60, 60]
+    assert forecast["demand_rate"][1] > 1 > forecast["demand_rate"][0]
+    assert forecast["days_of_cover"][1] < forecast["days_of_cover"][0]
+
+async def seed_daily_sales(db, product, units_per_day, days=90):
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    await db.daily_rollups.insert_many([
+        {"product_id": product["_id"], "day": today - timedelta(days=age), "quantity_sold": units_per_day}
+        for age in range(1, days + 1)
+    ])
+
+async def test_refresh_suggests_reorders_per_dealer(client, db, dealer, create_product):
+    tv = await create_product(name="Samsung TV", initial_stock=10, dealer_price=100)
+    fridge = await create_product(name="LG Fridge", initial_stock=500, dealer_price=300)
+    radio = await create_product(name="Idle Radio", initial_stock=0, dealer_price=50)
+    old = await create_product(name="Old Washer", initial_stock=0, dealer_price=200)
+    await client.put(f"/api/products/{old['slug']}", json={"status": "discontinued"})
+    for product in (tv, fridge, old):
+        await seed_daily_sales(db, product, 2)
+
+    summary = await refresh_forecasts(db, lead_time_days=7, cover_days=30)
+    assert (summary["products"], summary["needs_reorder"]) == (4, 1)
+
+    tv_forecast = (await client.get(f"/api/forecasts/{tv['_id']}")).json()
+    assert (tv_forecast["demand_rate"], tv_forecast["demand_std"], tv_forecast["days_of_cover"]) == (2, 0, 5)
+    assert (tv_forecast["reorder_point"], tv_forecast["suggested_reorder_qty"]) == (14, 2 * 37 - 10)
+
+    listed = (await client.get("/api/forecasts/")).json()
+    assert [row["name"] for row in listed] == ["Old Washer", "Samsung TV", "LG Fridge"]
+    assert len((await client.get("/api/forecasts/", params={"include_idle": True})).json()) == 4
+
+    assert (await client.get("/api/forecasts/reorders")).json() == [{
+        "dealer_id": str(dealer["_id"]), "dealer_name": dealer["company_name"],
+        "total_quantity": 64, "total_cost": 6400,
+        "products": [{
+            "product_id": tv["_id"], "name": "Samsung TV", "product_code": tv["product_code"], "stock": 10,
+            "days_of_cover": 5, "suggested_reorder_qty": 64, "reorder_cost": 6400,
+        }],
+    }]
+
+    # A deleted product's forecast goes with the next refresh
+    assert (await client.delete(f"/api/products/{radio['slug']}")).status_code == 204
+    await refresh_forecasts(db)
+    assert (await client.get(f"/api/forecasts/{radio['_id']}")).status_code == 404
+
+async def test_overlapping_refreshes_keep_every_forecast(db, create_product, monkeypatch):
+    tv = await create_product(name="Samsung TV", initial_stock=10)
+    earlier_start = datetime.now() - timedelta(seconds=1)
+    delete_many = mongomock.collection.Collection.delete_many
+
+    def overlapping_delete_many(self, filter, *args, **kwargs):
+        if self.name == "product_forecasts":
+            # A refresh that started earlier writes its forecast of the TV just now
+            self.update_one({"_id": tv["_id"]}, {"$set": {"computed_at": earlier_start}})
+        return delete_many(self, filter, *args, **kwargs)
+    monkeypatch.setattr(mongomock.collection.Collection, "delete_many", overlapping_delete_many)
+
+    await refresh_forecasts(db)
+
+    assert await db.product_forecasts.count_documents({"_id": tv["_id"]}) == 1
@@ -0,0 +1,47 @@
+import pytest
+from bson import ObjectId
+
+pytestmark = pytest.mark.anyio
+
+async def test_csv_import_reports_failed_rows_and_imports_the_rest(client, db, category, dealer, create_product):
+    await create_product(model_number="EXISTING-1")
+    refs = f"{category['_id']},{dealer['_id']}"
+    content = "\n".join([
+        "category_id,dealer_id,name,model_number,dealer_price,initial_stock,stock_notes",
+        f"{refs},Samsung TV,IMP-1,100,5,Opening stock",
+        f"{refs},LG Fridge,IMP-2,250,0,",
+        f"{refs},Duplicate,EXISTING-1,100,1,",
+        f"{refs},Repeated,IMP-1,100,1,",
+        f"{ObjectId()},{dealer['_id']},No Category,IMP-3,100,1,",
+        f"{refs},Bad Price,IMP-4,-5,1,",
+    ]).encode()
+
+    response = await client.post("/api/products/import", files={"file": ("products.csv", content)})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["total"], body["imported"], body["failed"]) == (6, 2, 4)
+    assert [(e["row"], e["model_number"]) for e in body["errors"]] == [
+        (3, "EXISTING-1"), (4, "IMP-1"), (5, "IMP-3"), (6, "IMP-4")
+    ]
+    assert body["errors"][0]["error"] == "Product with this model number already exists"
+    assert body["errors"][1]["error"] == "Duplicate model number in file"
+    assert body["errors"][2]["error"] == "Category not found"
+    assert body["errors"][3]["error"].startswith("dealer_price:")
+
+    tv = await db.products.find_one({"model_number": "IMP-1"})
+    assert tv["slug"] == "samsung-tv-1" and tv["stock"] == 5 and tv["search_prefixes"]
+    codes = sorted(p["product_code"] for p in await db.products.find().to_list(None))
+    assert len(set(codes)) == 3
+    movements = await db.inventory_movements.find({"product_id": str(tv["_id"])}).to_list(None)
+    assert [(m["quantity"], m["notes"]) for m in movements] == [(5, "Opening stock")]
+
+async def test_unparseable_records_and_unknown_formats(client):
+    response = await client.post(
+        "/api/products/import", files={"file": ("products.ndjson", b'{"name": "ok"\n[1, 2]\n')}
+    )
+    assert response.status_code == 200
+    assert [e["row"] for e in response.json()["errors"]] == [1, 2]
+
+    response = await client.post("/api/products/import", files={"file": ("products.xlsx", b"")})
+    assert response.status_code == 400
@@ -0,0 +1,22 @@
+import pytest
+from app.db.indexes import INDEXES, ensure_indexes
+
+pytestmark = pytest.mark.anyio
+
+async def test_ensure_indexes_creates_the_registry(db):
+    assert await ensure_indexes(db) == []
+
+    for collection, indexes in INDEXES.items():
+        existing = await db[collection].index_information()
+        assert {index.document["name"] for index in indexes} <= set(existing)
+
+async def test_one_failing_index_does_not_block_the_others(db):
+    # Legacy duplicates keep slug_unique from being built
+    await db.products.insert_many([{"slug": "tv", "model_number": "A"}, {"slug": "tv", "model_number": "B"}])
+
+    failed = await ensure_indexes(db)
+
+    assert failed == ["products.slug_unique"]
+    existing = await db.products.index_information()
+    assert "slug_unique" not in existing
+    assert {"model_number_unique", "search_prefixes", "low_stock"} <= set(existing)
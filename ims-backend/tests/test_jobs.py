@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.jobs import (
+    JOB_HANDLERS, JobStatus, get_job, get_job_queue, register_job, run_job, submit_job
+)
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def job_kinds():
+    """Register test job kinds for one test."""
+    registered = []
+
+    def register(kind: str, handler):
+        register_job(kind)(handler)
+        registered.append(kind)
+
+    yield register
+    for kind in registered:
+        JOB_HANDLERS.pop(kind, None)
+
+async def run_next(db, queue):
+    """Do what a job worker does for the next queued job."""
+    job = await queue.load(await queue.dequeue(1))
+    await run_job(db, queue, job)
+
+async def test_report_jobs_run_in_the_background_and_are_shared(client, db, create_product):
+    await create_product(initial_stock=4, dealer_price=100)
+    params = {"report": "stock-value", "params": {"group_by_category": False}}
+
+    submitted = await client.post("/api/reports/jobs", json=params)
+    assert submitted.status_code == 202
+    job = submitted.json()
+    assert job["status"] == "queued"
+    assert (await client.post("/api/reports/jobs", json=params)).json()["id"] == job["id"]
+    assert (await client.get(f"/api/reports/jobs/{job['id']}/result")).status_code == 409
+
+    await run_next(db, await get_job_queue())
+
+    assert (await client.get(f"/api/reports/jobs/{job['id']}")).json()["status"] == "completed"
+    result = (await client.get(f"/api/reports/jobs/{job['id']}/result")).json()
+    assert result == (await client.get("/api/reports/stock-value")).json()
+
+async def test_failed_jobs_are_not_reused(db, redis_client, job_kinds):
+    async def fail(db, params):
+        raise RuntimeError("boom")
+    job_kinds("test:fail", fail)
+    queue = await get_job_queue()
+
+    first = await submit_job(queue, "test:fail")
+    await run_next(db, queue)
+
+    assert (await get_job(queue, first["id"]))["error"] == "boom"
+    assert (await submit_job(queue, "test:fail"))["id"] != first["id"]
+
+async def test_running_jobs_of_a_dead_worker_are_requeued(db, redis_client, job_kinds):
+    async def report(db, params):
+        return 42
+    job_kinds("test:report", report)
+    queue = await get_job_queue()
+    job = await submit_job(queue, "test:report")
+    # A worker took the job off the queue, marked it running and died
+    await queue.dequeue(1)
+    job.update(status=JobStatus.RUNNING.value, lease_until=time.time() - 1)
+    await queue.save(job, settings.JOB_RESULT_TTL)
+
+    resubmitted = await submit_job(queue, "test:report")
+    assert resubmitted["id"] == job["id"] and resubmitted["status"] == "queued"
+    assert (await get_job(queue, job["id"]))["status"] == "queued"
+
+    await run_next(db, queue)
+    assert (await get_job(queue, job["id"]))["result"] == 42
+
+async def test_workers_renew_the_lease_of_long_jobs(db, redis_client, job_kinds, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_LEASE_TTL", 0.3)
+    async def slow(db, params):
+        await asyncio.sleep(0.6)
+        return "done"
+    job_kinds("test:slow", slow)
+    queue = await get_job_queue()
+    job = await submit_job(queue, "test:slow")
+    worker = asyncio.create_task(run_next(db, queue))
+
+    await asyncio.sleep(0.45)
+    running = await submit_job(queue, "test:slow")
+    assert running["status"] == "running" and running["lease_until"] > time.time()
+
+    await worker
+    assert (await get_job(queue, job["id"]))["result"] == "done"
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.ledger import SWEEP_LOCK_KEY, run_overdue_sweeper
+from app.services.periodic import run_periodic
+
+pytestmark = pytest.mark.anyio
+
+async def test_entries_are_stored_overdue_once_due(client, db, redis_client, dealer):
+    async def create(days):
+        response = await client.post("/api/party-ledger/", json={
+            "dealer_id": str(dealer["_id"]), "amount": 100,
+            "due_date": (datetime.now() + timedelta(days=days)).isoformat()
+        })
+        return response.json()
+    late, current = await create(-1), await create(3)
+    assert (late["status"], current["status"]) == ("overdue", "pending")
+    # current falls due without being written to
+    await db.party_ledger.update_many({}, {"$set": {"due_date": datetime.now() - timedelta(days=1)}})
+
+    workers = [asyncio.create_task(run_overdue_sweeper(db, redis_client, interval=60)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+    for worker in workers:
+        worker.cancel()
+
+    overdue = (await client.get("/api/party-ledger/", params={"status": "overdue"})).json()
+    assert sorted(entry["_id"] for entry in overdue) == sorted([late["_id"], current["_id"]])
+    assert await redis_client.ttl(SWEEP_LOCK_KEY) > 0
+
+async def test_periodic_work_survives_failures(redis_client, caplog):
+    calls = []
+    async def flaky():
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    tasks = [asyncio.create_task(run_periodic(redis_client, "ims:lock:test", 60, flaky)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+
+    # Only the worker holding the lock ran, and it is still scheduled after failing
+    assert calls == [1]
+    assert "Periodic task ims:lock:test failed: boom" in caplog.text
+    assert not any(task.done() for task in tasks)
+    for task in tasks:
+        task.cancel()
@@ -0,0 +1,63 @@
+import asyncio
+
+import orjson
+import pytest
+
+from app.services import cache
+from app.services.cache import INVALIDATION_CHANNEL, WORKER_ID, listen_for_invalidations
+from app.services.local_cache import LocalCache, MISSING
+
+def test_least_recently_used_entries_are_evicted():
+    local = LocalCache(maxsize=2, ttl=60)
+    local.set("a", 1)
+    local.set("b", 2)
+    local.get("a")
+    local.set("c", 3)
+
+    assert [local.get(key) for key in ("a", "b", "c")] == [1, MISSING, 3]
+    assert local.stats()["evictions"] == 1
+
+def test_expired_entries_are_misses():
+    local = LocalCache(maxsize=10, ttl=-1)
+    local.set("a", 1)
+
+    assert local.get("a") is MISSING
+
+def test_invalidation_drops_tagged_entries_and_racing_sets():
+    local = LocalCache(maxsize=10, ttl=60)
+    local.set("product", 1, tags=["dealer:1"])
+    local.set("dealer", 2, tags=["dealer:2"])
+    since = local.epoch
+
+    local.invalidate_tags(["dealer:1"])
+    local.set("late", 3, since=since)
+
+    assert [local.get(key) for key in ("product", "dealer", "late")] == [MISSING, 2, MISSING]
+
+async def wait_until(predicate, timeout: float = 5):
+    async def poll():
+        while not await predicate():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+@pytest.mark.anyio
+async def test_other_workers_invalidations_are_applied(redis_client):
+    epoch = cache.local_cache.epoch
+    listener = asyncio.create_task(listen_for_invalidations(redis_client))
+    try:
+        # The listener clears the local tier once it is subscribed
+        async def subscribed():
+            return cache.local_cache.epoch > epoch
+        await wait_until(subscribed)
+        cache.local_cache.set("mine", 1, tags=["dealer:1"])
+        cache.local_cache.set("theirs", 2, tags=["dealer:2"])
+
+        await redis_client.publish(INVALIDATION_CHANNEL, orjson.dumps({"origin": WORKER_ID, "tags": ["dealer:1"]}))
+        await redis_client.publish(INVALIDATION_CHANNEL, orjson.dumps({"origin": "other", "tags": ["dealer:2"]}))
+        async def dropped():
+            return cache.local_cache.get("theirs") is MISSING
+        await wait_until(dropped)
+
+        assert cache.local_cache.get("mine") == 1
+    finally:
+        listener.cancel()
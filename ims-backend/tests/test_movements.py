@@ -0,0 +1,70 @@
+import pytest
+from datetime import datetime, timedelta
+from bson import ObjectId
+from app.scripts.backfill_movements import backfill_movements
+from app.services.movements import RECENT_MOVEMENTS_LIMIT
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def legacy_product(db, category, dealer):
+    """A product from before inventory_movements, with more history than is kept once migrated."""
+    start = datetime(2024, 1, 1)
+    product = {
+        "_id": ObjectId(),
+        "product_code": "PRD001",
+        "slug": "legacy-tv",
+        "name": "Legacy TV",
+        "model_number": "LEG-1",
+        "category_id": str(category["_id"]),
+        "dealer_id": str(dealer["_id"]),
+        "dealer_price": 100.0,
+        "stock": 8,
+        "total_stock_received": 10,
+        "total_sales": 2,
+        "status": "in_stock",
+        "stock_updates": [{"quantity": 1, "date": start + timedelta(days=i), "notes": None} for i in range(8)],
+        "sales_history": [{"quantity": 1, "sale_price": 150.0, "date": start + timedelta(days=i), "notes": None} for i in range(2)],
+    }
+    await db.products.insert_one(product)
+    return product
+
+async def test_writes_record_movements_and_keep_recent_history(client, db, create_product):
+    product = await create_product(initial_stock=10)
+    for _ in range(RECENT_MOVEMENTS_LIMIT + 2):
+        response = await client.post(f"/api/products/{product['slug']}/stock", json={"quantity": 1})
+        assert response.status_code == 200
+    response = await client.post(f"/api/products/{product['slug']}/sell", json={"quantity": 3, "sale_price": 150})
+    assert response.status_code == 200
+    assert response.json()["stock"] == 10 + RECENT_MOVEMENTS_LIMIT + 2 - 3
+
+    stored = await db.products.find_one({"_id": ObjectId(product["_id"])})
+    assert len(stored["stock_updates"]) == RECENT_MOVEMENTS_LIMIT
+    movements = (await client.get(f"/api/products/{product['slug']}/movements", params={"limit": 100})).json()
+    assert [m["type"] for m in movements].count("stock_in") == RECENT_MOVEMENTS_LIMIT + 3
+    assert movements[0]["type"] == "sale" and movements[0]["quantity"] == 3
+
+async def test_writes_before_backfill_keep_full_history_and_are_not_copied_twice(client, db, legacy_product):
+    response = await client.post("/api/products/legacy-tv/stock", json={"quantity": 5})
+    assert response.status_code == 200
+
+    stored = await db.products.find_one({"_id": legacy_product["_id"]})
+    assert len(stored["stock_updates"]) == 9
+    assert await db.inventory_movements.count_documents({}) == 1
+
+    written = await backfill_movements(db)
+
+    assert written == 10
+    assert await db.inventory_movements.count_documents({"type": "stock_in"}) == 9
+    assert await db.inventory_movements.count_documents({"type": "sale"}) == 2
+    stored = await db.products.find_one({"_id": legacy_product["_id"]})
+    assert stored["movements_backfilled"] is True
+    assert len(stored["stock_updates"]) == RECENT_MOVEMENTS_LIMIT
+
+async def test_backfill_rerun_after_interruption_writes_nothing_twice(db, legacy_product):
+    await backfill_movements(db)
+    # Interrupted before the product was flagged: its history is still untrimmed and unflagged
+    await db.products.replace_one({"_id": legacy_product["_id"]}, legacy_product)
+
+    assert await backfill_movements(db) == 0
+    assert await db.inventory_movements.count_documents({}) == 10
@@ -0,0 +1,60 @@
+import pytest
+from datetime import datetime, timedelta
+from bson import ObjectId
+from app.core.pagination import NEXT_CURSOR_HEADER
+
+pytestmark = pytest.mark.anyio
+
+async def _walk(client, path, limit, **params):
+    pages, cursor = [], None
+    while True:
+        response = await client.get(path, params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return pages
+
+async def test_product_pages_follow_the_cursor(client, create_product):
+    created = [await create_product(name=f"Product {i}") for i in range(5)]
+
+    pages = await _walk(client, "/api/products/", 2, view="summary")
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [p["_id"] for page in pages for p in page] == [p["_id"] for p in created]
+
+async def test_ledger_pages_follow_due_date_then_id(client, db, dealer):
+    due = datetime(2030, 1, 1)
+    # Ties on due_date are broken by _id
+    await db.party_ledger.insert_many([
+        {"_id": ObjectId(), "dealer_id": str(dealer["_id"]), "amount": i, "due_date": due + timedelta(days=i // 2),
+         "status": "pending", "created_at": due}
+        for i in range(5)
+    ])
+
+    pages = await _walk(client, "/api/party-ledger/", 2)
+
+    assert [entry["amount"] for page in pages for entry in page] == [0, 1, 2, 3, 4]
+
+async def test_malformed_cursor_is_rejected(client):
+    response = await client.get("/api/products/", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+
+async def test_low_stock_pages_follow_writes_to_stock_and_thresholds(client, create_product):
+    radio = await create_product(name="Radio", initial_stock=1)
+    tv = await create_product(name="TV", initial_stock=4, reorder_threshold=10)
+    fridge = await create_product(name="Fridge", initial_stock=20)
+    await create_product(name="Washer", initial_stock=3)
+    await client.post(f"/api/products/{fridge['slug']}/sell", json={"quantity": 18, "sale_price": 100})
+    await client.post(f"/api/products/{radio['slug']}/stock", json={"quantity": 10})
+
+    pages = await _walk(client, "/api/products/low-stock", 2)
+    assert [[(p["name"], p["stock_ratio"]) for p in page] for page in pages] == [
+        [("TV", 0.4), ("Fridge", 0.4)], [("Washer", 0.6)]
+    ]
+
+    await client.put(f"/api/products/{tv['slug']}", json={"reorder_threshold": 2})
+    low_stock = (await client.get("/api/products/low-stock")).json()
+    assert [p["name"] for p in low_stock] == ["Fridge", "Washer"]
+    assert (await client.get("/api/dashboard/summary")).json()["low_stock_alerts"]["count"] == 2
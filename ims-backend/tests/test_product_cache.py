@@ -0,0 +1,49 @@
+import pytest
+
+from app.db.mongodb import MongoDB
+from app.services import cache
+
+pytestmark = pytest.mark.anyio
+
+async def test_detail_hits_are_served_without_the_database(client, create_product):
+    product = await create_product(name="Samsung TV")
+    first = await client.get(f"/api/products/{product['slug']}")
+    assert first.status_code == 200
+    assert first.json()["dealer_name"] == "Acme Distributors"
+
+    # Only the Redis tier is left, and any database call would now fail
+    cache.local_cache.clear()
+    MongoDB.client = None
+    second = await client.get(f"/api/products/{product['slug']}")
+
+    assert second.status_code == 200
+    assert second.json() == first.json()
+
+async def test_product_updates_replace_the_cached_detail(client, create_product):
+    product = await create_product(name="Samsung TV", dealer_price=100)
+    await client.get(f"/api/products/{product['slug']}")
+
+    response = await client.put(f"/api/products/{product['slug']}", json={"dealer_price": 120})
+    assert response.status_code == 200, response.text
+
+    detail = (await client.get(f"/api/products/{product['slug']}")).json()
+    assert detail["dealer_price"] == 120
+
+async def test_missing_products_are_not_cached(client, redis_client):
+    response = await client.get("/api/products/no-such-product")
+
+    assert response.status_code == 404
+    assert await redis_client.get(cache.cache_key("product", "no-such-product")) is None
+
+async def test_cached_detail_is_sent_as_stored_and_matches_the_validated_response(client, redis_client, create_product):
+    product = await create_product(name="Samsung TV")
+    miss = await client.get(f"/api/products/{product['slug']}")
+    cache.local_cache.clear()
+    hit = await client.get(f"/api/products/{product['slug']}")
+
+    stored = await redis_client.get(cache.cache_key("product", product["slug"]))
+    assert hit.headers["content-type"] == "application/json"
+    assert hit.content == miss.content == stored.partition("\n")[2].encode()
+    # Same payload as response_model validation produces for the list endpoint
+    listed = (await client.get("/api/products/")).json()[0]
+    assert hit.json() == listed
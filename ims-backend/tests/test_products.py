@@ -0,0 +1,83 @@
+import pytest
+from bson import ObjectId
+
+pytestmark = pytest.mark.anyio
+
+async def test_list_enriches_category_dealer_and_image(client, db, create_product):
+    media = {"_id": ObjectId(), "image_url": "https://cdn.example/tv.jpg"}
+    await db.media_center.insert_one(media)
+    await create_product(name="Samsung TV", image_id=str(media["_id"]))
+    await create_product(name="LG Fridge")
+
+    response = await client.get("/api/products/")
+
+    assert response.status_code == 200
+    products = {p["name"]: p for p in response.json()}
+    assert products["Samsung TV"]["category_name"] == "Televisions"
+    assert products["Samsung TV"]["dealer_name"] == "Acme Distributors"
+    assert products["Samsung TV"]["images"] == [{"image_id": str(media["_id"]), "image_url": media["image_url"]}]
+    assert products["LG Fridge"]["images"] == []
+    assert all("search_prefixes" not in p for p in products.values())
+
+async def test_list_tolerates_dangling_references(client, db, create_product, dealer):
+    await create_product()
+    await db.dealers.delete_one({"_id": dealer["_id"]})
+
+    response = await client.get("/api/products/")
+
+    assert response.status_code == 200
+    assert response.json()[0]["dealer_name"] is None
+
+async def test_summary_view_and_field_selection(client, create_product):
+    product = await create_product(name="Samsung TV")
+
+    summary = (await client.get("/api/products/", params={"view": "summary"})).json()[0]
+    assert "stock_updates" not in summary and "sales_history" not in summary
+    assert summary["name"] == "Samsung TV" and summary["category_name"] == "Televisions"
+
+    listed = (await client.get("/api/products/", params={"fields": "name,stock"})).json()
+    assert listed == [{"_id": product["_id"], "name": "Samsung TV", "stock": 10}]
+
+    detail = (await client.get(f"/api/products/{product['slug']}", params={"fields": "slug,dealer_name"})).json()
+    assert detail == {"_id": product["_id"], "slug": product["slug"], "dealer_name": "Acme Distributors"}
+
+async def test_unknown_fields_are_rejected(client, create_product):
+    await create_product()
+
+    response = await client.get("/api/products/", params={"fields": "name,secret"})
+
+    assert response.status_code == 400
+    assert "secret" in response.json()["detail"]
+
+async def test_search_matches_word_prefixes_and_ranks_exact_codes_first(client, create_product):
+    await create_product(name="Samsung Fridge", model_number="SM-FR-100")
+    await create_product(name="Samsung TV", model_number="SM-TV2024-001")
+    await create_product(name="LG TV", model_number="LG-TV-7")
+
+    both = (await client.get("/api/products/", params={"search": "sam tv"})).json()
+    assert [p["name"] for p in both] == ["Samsung TV"]
+    assert "_score" not in both[0] and both[0]["stock_updates"]
+
+    ranked = (await client.get("/api/products/", params={"search": "smtv2024001"})).json()
+    assert [p["model_number"] for p in ranked] == ["SM-TV2024-001"]
+
+    tv = (await client.get("/api/products/", params={"search": "tv", "fields": "name"})).json()
+    assert sorted(p["name"] for p in tv) == ["LG TV", "Samsung TV"]
+    assert all(set(p) == {"_id", "name"} for p in tv)
+
+async def test_only_codes_get_the_exact_code_boost(client, create_product):
+    await create_product(name="LG TV", model_number="LG-TV-7")
+    await create_product(name="Sony Bravia", model_number="TV")
+
+    ranked = (await client.get("/api/products/", params={"search": "tv"})).json()
+
+    assert [p["name"] for p in ranked] == ["Sony Bravia", "LG TV"]
+    assert all("search_codes" not in p for p in ranked)
+
+async def test_search_input_is_not_a_pattern(client, create_product):
+    await create_product(name="Samsung TV")
+
+    response = await client.get("/api/products/", params={"search": ".*(["})
+
+    assert response.status_code == 200
+    assert response.json() == []
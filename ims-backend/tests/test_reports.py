@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+pytestmark = pytest.mark.anyio
+
+async def test_stock_reports_group_by_category(client, db, category, create_product):
+    await create_product(name="Samsung TV", initial_stock=4, dealer_price=100)
+    await create_product(name="LG TV", initial_stock=1, dealer_price=300)
+    await create_product(name="Unfiled Radio", initial_stock=2, dealer_price=50)
+    # A product whose category was deleted is reported under "Unknown"
+    orphan_category = str(ObjectId())
+    await db.products.update_one({"name": "Unfiled Radio"}, {"$set": {"category_id": orphan_category}})
+
+    category_wise = (await client.get("/api/reports/category-wise")).json()
+    assert sorted(category_wise, key=lambda row: row["category_name"]) == [
+        {"category_id": str(category["_id"]), "category_name": "Televisions", "stock": 5, "value": 700},
+        {"category_id": orphan_category, "category_name": "Unknown", "stock": 2, "value": 100},
+    ]
+    assert (await client.get("/api/reports/stock-value")).json() == {"total_stock_value": 800}
+    by_category = (await client.get("/api/reports/stock-value", params={"group_by_category": True})).json()
+    assert sorted(row["value"] for row in by_category) == [100, 700]
+
+async def test_dues_summary_totals_by_stored_status(client, db, dealer):
+    due = datetime.now() + timedelta(days=3)
+    await db.party_ledger.insert_many([
+        {"dealer_id": str(dealer["_id"]), "amount": 100, "due_date": due, "status": "pending"},
+        {"dealer_id": str(dealer["_id"]), "amount": 200, "due_date": due, "status": "paid"},
+        {"dealer_id": str(dealer["_id"]), "amount": 300, "due_date": due, "status": "overdue"},
+        {"dealer_id": str(dealer["_id"]), "amount": 50, "due_date": due, "status": "partial"},
+    ])
+
+    summary = (await client.get("/api/reports/dues-summary")).json()
+
+    assert summary == {"pending": 150, "paid": 200, "overdue": 300}
+
+async def test_movements_are_rolled_up_by_day_and_month(client, db, category, create_product):
+    tv = await create_product(name="Samsung TV", initial_stock=10, dealer_price=100)
+    fridge = await create_product(name="LG Fridge", initial_stock=5, dealer_price=200)
+    await client.post(f"/api/products/{tv['slug']}/sell", json={"quantity": 2, "sale_price": 150})
+    await client.post(f"/api/products/{tv['slug']}/sell", json={"quantity": 1, "sale_price": 160})
+    await client.post(f"/api/products/{fridge['slug']}/stock", json={"quantity": 4})
+
+    assert await db.daily_rollups.count_documents({}) == 2
+    assert await db.monthly_rollups.count_documents({}) == 2
+
+    by_day = (await client.get("/api/reports/rollups")).json()
+    assert by_day == [{
+        "day": datetime.now().strftime("%Y-%m-%d"),
+        "quantity_received": 19, "quantity_sold": 3, "revenue": 460, "cost": 300,
+    }]
+    by_product = (await client.get("/api/reports/rollups", params={"group_by": "product"})).json()
+    assert {row["product_name"]: (row["quantity_received"], row["quantity_sold"]) for row in by_product} == {
+        "Samsung TV": (10, 3), "LG Fridge": (9, 0)
+    }
+    filtered = (await client.get("/api/reports/rollups", params={"product_id": fridge["_id"]})).json()
+    assert [row["quantity_received"] for row in filtered] == [9]
+    assert (await client.get("/api/reports/monthly-stock")).json() == [
+        {"month": datetime.now().strftime("%Y-%m"), "stock_added": 19}
+    ]
+
+async def test_rollup_report_rejects_inverted_ranges(client):
+    response = await client.get("/api/reports/rollups", params={"date_from": "2024-02-01", "date_to": "2024-01-01"})
+
+    assert response.status_code == 400
+
+async def test_sales_analytics_rank_by_units_revenue_and_margin(client, create_product):
+    tv = await create_product(name="Samsung TV", initial_stock=20, dealer_price=100)
+    fridge = await create_product(name="LG Fridge", initial_stock=20, dealer_price=300)
+    await client.post(f"/api/products/{tv['slug']}/sell", json={"quantity": 6, "sale_price": 120})
+    await client.post(f"/api/products/{fridge['slug']}/sell", json={"quantity": 2, "sale_price": 400})
+    # A later price change does not rewrite the cost of earlier sales
+    await client.put(f"/api/products/{tv['slug']}", json={"dealer_price": 500})
+
+    by_units = (await client.get("/api/reports/sales/top", params={"metric": "units", "limit": 1})).json()
+    assert [row["product_name"] for row in by_units] == ["Samsung TV"]
+    by_margin = (await client.get("/api/reports/sales/top", params={"metric": "gross_margin"})).json()
+    assert [(row["product_name"], row["gross_margin"]) for row in by_margin] == [("LG Fridge", 200), ("Samsung TV", 120)]
+    assert by_margin[1]["margin_pct"] == pytest.approx(100 * 120 / 720)
+
+    velocity = (await client.get("/api/reports/sales/velocity", params={"date_from": datetime.now().date().isoformat()})).json()
+    assert [(row["product_name"], row["units_per_day"]) for row in velocity] == [("Samsung TV", 6), ("LG Fridge", 2)]
+
+    margin = (await client.get("/api/reports/sales/margin")).json()
+    assert margin == [{
+        "month": datetime.now().strftime("%Y-%m"), "units": 8, "revenue": 1520, "cost": 1200,
+        "gross_margin": 320, "margin_pct": pytest.approx(100 * 320 / 1520), "units_per_day": pytest.approx(8 / 30),
+    }]
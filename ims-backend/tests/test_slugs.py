@@ -0,0 +1,36 @@
+import orjson
+import pytest
+
+from app.db.indexes import ensure_indexes
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def indexes(db):
+    assert await ensure_indexes(db) == []
+
+async def test_names_with_numeric_suffixes_do_not_collide(indexes, create_product):
+    slugs = [
+        (await create_product(name=name))["slug"]
+        for name in ("Samsung TV", "Samsung TV 2", "Samsung TV", "Samsung TV", "Samsung TV 2")
+    ]
+
+    assert slugs == ["samsung-tv", "samsung-tv-2", "samsung-tv-1", "samsung-tv-3", "samsung-tv-2-1"]
+
+async def test_import_allocates_around_taken_and_repeated_slugs(indexes, client, category, dealer, create_product):
+    await create_product(name="Samsung TV")
+    await create_product(name="Samsung TV 2")
+    records = [
+        {"category_id": str(category["_id"]), "dealer_id": str(dealer["_id"]),
+         "name": name, "model_number": f"IMP-{index}", "dealer_price": 100, "initial_stock": 1}
+        for index, name in enumerate(["Samsung TV", "Samsung TV", "Samsung TV 3", "Samsung TV"])
+    ]
+    content = b"\n".join(orjson.dumps(record) for record in records)
+
+    response = await client.post("/api/products/import", files={"file": ("products.ndjson", content)})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == 4, response.json()["errors"]
+    listed = (await client.get("/api/products/", params={"fields": "slug", "limit": 10})).json()
+    slugs = [p["slug"] for p in listed]
+    assert len(slugs) == len(set(slugs)) == 6